@@ -1,15 +1,86 @@
+import asyncio
+import csv
 import io
 import json
+import os
 import zipfile
-from typing import Optional
+from contextlib import asynccontextmanager
+from datetime import date
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.types import Message
 
-from engine.rentguard import evaluate
+from engine import metrics
+from engine.batch import build_columns, columns_from_records, evaluate_columns
+from engine.ledger import Ledger as ReceiptLedger, LedgerSink
+from engine.packet import PacketCache, iter_tenant_packet, packet_key
+from engine.ingest import epoch_day
+from engine.rentguard import branch_for, evaluate
+from engine.residue import ARTIFACT_DIR, artifact_name, envelope_for, envelope_json
+from engine.result_cache import ResultCache, evaluation_key
+from engine.rules import RuleSet, active_rules
 
-app = FastAPI(title="RentGuard API", version="2.0.0")
+STORE_NAME = "ledger"
+PACKET_CACHE_NAME = "packets"
+# Set to a directory to share evaluation results between worker processes.
+RESULT_CACHE_DIR: Optional[Path] = None
+# Stage timers behind /api/metrics, switched on while the app is running; the
+# engine records nothing while disabled. Set RENTGUARD_METRICS_ENABLED=false to opt out.
+METRICS_ENABLED = os.environ.get("RENTGUARD_METRICS_ENABLED", "true").lower() not in ("0", "false")
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    was_enabled = metrics.ENABLED
+    metrics.enable(METRICS_ENABLED or was_enabled)
+    yield
+    metrics.enable(was_enabled)
+
+
+app = FastAPI(title="RentGuard API", version="2.0.0", lifespan=lifespan)
+
+_artifact_sink: Optional[LedgerSink] = None
+_packet_cache: Optional[PacketCache] = None
+_result_cache: Optional[ResultCache] = None
+
+
+def artifact_sink() -> LedgerSink:
+    """Process-wide sink shared by every persisting endpoint.
+
+    Receipts go to the segmented ledger under ``ARTIFACT_DIR``, whose tenant
+    index is what server-assembled Judge Packets read from.
+    """
+    global _artifact_sink
+    if _artifact_sink is None:
+        _artifact_sink = LedgerSink(ReceiptLedger(ARTIFACT_DIR / STORE_NAME))
+    return _artifact_sink
+
+
+def artifact_store() -> ReceiptLedger:
+    return artifact_sink().ledger
+
+
+def packet_cache() -> PacketCache:
+    """Process-wide cache of server-assembled Judge Packets."""
+    global _packet_cache
+    if _packet_cache is None:
+        _packet_cache = PacketCache(ARTIFACT_DIR / PACKET_CACHE_NAME)
+    return _packet_cache
+
+
+def result_cache() -> ResultCache:
+    """Process-wide cache of ``/api/evaluate`` receipts."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(RESULT_CACHE_DIR)
+    return _result_cache
 
 
 class Ledger(BaseModel):
@@ -17,15 +88,20 @@ class Ledger(BaseModel):
     due_date: str = Field(..., description="ISO formatted due date (YYYY-MM-DD)")
     balance: float = Field(..., description="Outstanding balance")
     no_notice_sent: Optional[bool] = Field(True, description="Whether no notice has been sent")
-    current_date: Optional[str] = Field(None, description="Optional override for current date (ISO)")
+    current_date: Optional[str] = Field(None, description="Optional as-of date for the evaluation (ISO)")
     human_block: Optional[bool] = Field(False, description="Flag indicating human blocked logic")
     human_override: Optional[bool] = Field(False, description="Flag indicating human override")
     override_reason: Optional[str] = Field(None, description="Reason for human override")
+    late_count_window: int = Field(..., description="Late payments within the lookback window")
+    days_since_eligible_filing: int = Field(..., description="Days since filing first became eligible")
+    portfolio_late_rate_milli: int = Field(..., description="Portfolio late rate in milli (0-1000)")
 
 
 class JudgePacketRequest(BaseModel):
     tenant_id: Optional[str] = Field(None, description="Optional tenant identifier")
-    artifacts: list[dict] = Field(..., description="List of artifact payloads to package")
+    artifacts: Optional[list[dict]] = Field(
+        None, description="Artifact payloads to package; omit to assemble the tenant's stored receipts"
+    )
 
 
 @app.get("/api/health")
@@ -33,21 +109,311 @@ async def health():
     return {"status": "ok", "engine": "RentGuard", "version": "2.0.0"}
 
 
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Stage timers and counters in the Prometheus text format."""
+    counters = {}
+    for name, cache in (("result_cache", _result_cache), ("packet_cache", _packet_cache)):
+        if cache is not None:
+            counters[f"{name}_hits"] = cache.hits
+            counters[f"{name}_misses"] = cache.misses
+    return Response(metrics.render_prometheus(counters=counters), media_type=METRICS_CONTENT_TYPE)
+
+
+def _iso_date(value: str, field: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be an ISO date") from None
+
+
+def _as_of(value: Optional[str], field: str) -> date:
+    if not value:
+        return date.today()
+    return _iso_date(value, field)
+
+
+def _evaluate_ledger(ledger: Dict, as_of: date, explicit: bool, persist: bool) -> Dict:
+    rules = active_rules()
+    key = evaluation_key(ledger, rules, as_of)
+    cache = result_cache()
+    with cache.lock(key):
+        entry = cache.get(key)
+        if entry is not None and (entry["persisted"] or not persist):
+            return entry["envelope"]
+
+        if entry is not None:
+            envelope = entry["envelope"]
+        else:
+            # Only an explicit current_date is recorded in the receipt.
+            envelope = evaluate(ledger, rules, persist=False, as_of=as_of if explicit else None)
+        if not envelope:
+            raise HTTPException(status_code=400, detail="Evaluation did not produce an artifact")
+        if persist:
+            sink = artifact_sink()
+            payload = envelope["payload"]
+            sink.ledger.append_once(envelope_json(envelope), payload["decision_id"], payload["outputs"]["tenant_id"])
+            sink.flush()
+        cache.put(key, envelope, persisted=persist)
+    return envelope
+
+
 @app.post("/api/evaluate")
 async def evaluate_ledger(record: Ledger, persist: bool = Query(False)):
-    payload = evaluate(record.dict(), persist=persist)
-    if not payload:
-        raise HTTPException(status_code=400, detail="Evaluation did not produce an artifact")
-    return JSONResponse(content=payload)
+    """Evaluate one ledger; repeats of the same request return the same receipt.
+
+    The ledger skips a decision it already stores, so retries of a persisting
+    call never append a duplicate artifact, whether or not the receipt is
+    still cached. Runs in the threadpool so that concurrent evaluations of the
+    same request wait on one another instead of the event loop.
+    """
+    _iso_date(record.due_date, "due_date")
+    as_of = _as_of(record.current_date, "current_date")
+    envelope = await run_in_threadpool(_evaluate_ledger, record.dict(), as_of, bool(record.current_date), persist)
+    return JSONResponse(content=envelope)
+
+
+BATCH_CHUNK_SIZE = 500
+MAX_BATCH_CHUNK_SIZE = 10_000
+
+
+# Body chunks read ahead of evaluation.
+BODY_QUEUE_CHUNKS = 16
+
+
+class _BodyReader:
+    """Reads the request body into a bounded queue from a task of its own."""
+
+    def __init__(self, request: Request, depth: int = BODY_QUEUE_CHUNKS):
+        self.request = request
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        self.finished = asyncio.Event()
+        self.error: Optional[Exception] = None
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            async for part in self.request.stream():
+                if part:
+                    await self.queue.put(part)
+        except Exception as exc:
+            self.error = exc
+        self.finished.set()
+        await self.queue.put(None)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            part = await self.queue.get()
+            if part is None:
+                break
+            yield part
+        if self.error is not None:
+            raise self.error
+
+    async def receive(self) -> Message:
+        """``receive`` for the response: waits until the body has been read."""
+        await self.finished.wait()
+        if self.error is not None:
+            return {"type": "http.disconnect"}
+        return await self.request.receive()
+
+    async def disconnected(self) -> bool:
+        if not self.finished.is_set():
+            return False
+        return isinstance(self.error, ClientDisconnect) or await self.request.is_disconnected()
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse whose content is still reading the request body.
+
+    Starlette's disconnect listener would compete with the body reader for
+    ``receive`` messages, so it listens on ``_BodyReader.receive`` instead,
+    which forwards to the real ``receive`` once the body has been read.
+    """
+
+    def __init__(self, content, reader: _BodyReader, **kwargs):
+        super().__init__(content, **kwargs)
+        self.reader = reader
+
+    async def __call__(self, scope, receive, send) -> None:
+        await super().__call__(scope, self.reader.receive, send)
+
+
+async def _iter_body_lines(parts: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield body lines as they arrive; only one partial line is buffered."""
+    pending = b""
+    async for part in parts:
+        pending += part
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def _iter_batch_rows(parts: AsyncIterator[bytes], is_csv: bool) -> AsyncIterator[Union[dict, str]]:
+    """Yield one raw row dict, or an error message, per non-blank data line."""
+    header: Optional[List[str]] = None
+    async for line in _iter_body_lines(parts):
+        if not line.strip():
+            continue
+        if not is_csv:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield "Line is not valid JSON"
+                continue
+            yield row if isinstance(row, dict) else "Line must be a JSON object"
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield {h: v.strip() for h, v in zip(header, values) if v.strip() != ""}
+
+
+def _normalize_row(row: dict, default_rate: Optional[int], default_date: Optional[str], valid_dates: set) -> Union[Dict, str]:
+    if default_rate is not None and "portfolio_late_rate_milli" not in row:
+        row = dict(row, portfolio_late_rate_milli=default_rate)
+    if default_date is not None and not row.get("current_date"):
+        # Recorded in the receipt so the verifier replays the same date.
+        row = dict(row, current_date=default_date)
+    try:
+        record = Ledger(**row).dict()
+    except ValidationError as exc:
+        return f"Invalid ledger row: {exc.errors()[0].get('msg', 'validation failed')}"
+    for field in ("due_date", "current_date"):
+        value = record[field]
+        if value is None or value in valid_dates:
+            continue
+        try:
+            epoch_day(value)
+        except ValueError:
+            return f"{field} must be an ISO date"
+        valid_dates.add(value)
+    return record
+
+
+def _evaluate_batch_chunk(items: List[Union[Dict, str]], first_row: int, today: date, rules: RuleSet, persist: bool) -> str:
+    records = [item for item in items if isinstance(item, dict)]
+    columns = columns_from_records(records)
+    _, branches = evaluate_columns(columns, today=today, thresholds=rules)
+    today_iso = today.isoformat()
+    for i, record in enumerate(records):
+        # Rows carrying their own as-of date are evaluated as of that date.
+        if record["current_date"] and record["current_date"] != today_iso:
+            branches[i] = branch_for(record, epoch_day(record["current_date"]) - columns["due_day"][i], rules)
+    payloads = iter(build_columns(records, branches, rules))
+    sink = artifact_sink() if persist else None
+
+    lines = []
+    for offset, item in enumerate(items):
+        if not isinstance(item, dict):
+            lines.append(json.dumps({"row": first_row + offset, "error": item}, ensure_ascii=False))
+            continue
+        payload = next(payloads)
+        data = envelope_json(envelope_for(payload))
+        if sink is not None:
+            sink.write(artifact_name(payload), data, payload=payload)
+        lines.append(data)
+    if sink is not None:
+        sink.flush()
+    return "\n".join(lines) + "\n"
+
+
+@app.post("/api/evaluate/batch")
+async def evaluate_batch(
+    request: Request,
+    persist: bool = Query(False),
+    chunk_size: int = Query(BATCH_CHUNK_SIZE, ge=1, le=MAX_BATCH_CHUNK_SIZE),
+    portfolio_late_rate_milli: Optional[int] = Query(None, description="Applied to rows that do not carry their own rate"),
+    as_of: Optional[str] = Query(None, description="Evaluation date for every row (ISO, default today)"),
+):
+    """Evaluate a streamed NDJSON or CSV portfolio and stream NDJSON envelopes back.
+
+    The body is read at most ``BODY_QUEUE_CHUNKS`` chunks ahead of the
+    response and evaluated ``chunk_size`` rows at a time, so memory does not
+    grow with the upload. Evaluation stops when the client disconnects.
+    Output lines follow input order; rows that fail validation produce an
+    ``{"row", "error"}`` object in their place. Rows are evaluated as of
+    their own ``current_date`` when present, else as of ``as_of``, which is
+    then recorded as the row's ``current_date``. CSV rows must not contain
+    quoted newlines.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    today = _as_of(as_of, "as_of")
+    default_date = today.isoformat() if as_of else None
+    rules = active_rules()
+
+    reader = _BodyReader(request)
+
+    async def produce() -> AsyncIterator[str]:
+        valid_dates: set = set()
+        chunk: List[Union[Dict, str]] = []
+        first_row = 1
+        try:
+            async for row in _iter_batch_rows(reader.chunks(), is_csv):
+                if isinstance(row, dict):
+                    row = _normalize_row(row, portfolio_late_rate_milli, default_date, valid_dates)
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    if await reader.disconnected():
+                        return
+                    yield await run_in_threadpool(_evaluate_batch_chunk, chunk, first_row, today, rules, persist)
+                    first_row += len(chunk)
+                    chunk = []
+            if chunk and not await reader.disconnected():
+                yield await run_in_threadpool(_evaluate_batch_chunk, chunk, first_row, today, rules, persist)
+        finally:
+            reader.cancel()
+
+    return BodyStreamingResponse(produce(), reader, media_type="application/x-ndjson")
+
+
+def _packet_headers(filename: str) -> Dict[str, str]:
+    return {"Content-Disposition": f"attachment; filename={filename}.zip"}
+
+
+def _stream_tenant_packet(tenant_id: str, if_none_match: Optional[str] = None) -> Response:
+    """Serve the tenant's packet from the cache, or stream and cache it.
+
+    The cache key doubles as a strong ETag.
+    """
+    store = artifact_store()
+    entries = store.tenant_entries(tenant_id)
+    if not entries:
+        raise HTTPException(status_code=404, detail="No stored receipts for tenant")
+
+    key = packet_key(did for did, _, _ in entries)
+    headers = dict(_packet_headers(tenant_id), ETag=f'"{key}"')
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    cache = packet_cache()
+    body = cache.open(key)
+    if body is None:
+        body = cache.tee(key, metrics.timed_iter("zip_build", iter_tenant_packet(store, tenant_id, entries)))
+    return StreamingResponse(body, media_type="application/zip", headers=headers)
+
+
+@app.get("/api/judge-packet/{tenant_id}")
+async def tenant_judge_packet(tenant_id: str, if_none_match: Optional[str] = Header(None)):
+    """Stream a Judge Packet assembled from the tenant's stored receipts."""
+    return _stream_tenant_packet(tenant_id, if_none_match)
 
 
 @app.post("/api/judge-packet")
-async def judge_packet(request: JudgePacketRequest):
+async def judge_packet(request: JudgePacketRequest, if_none_match: Optional[str] = Header(None)):
+    if request.artifacts is None and request.tenant_id:
+        return _stream_tenant_packet(request.tenant_id, if_none_match)
     if not request.artifacts:
         raise HTTPException(status_code=400, detail="At least one artifact is required")
 
     buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zipf:
+    with metrics.timer("zip_build"), zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zipf:
         for artifact in request.artifacts:
             tenant_id = artifact.get("tenant_id", request.tenant_id or "tenant")
             artifact_id = artifact.get("artifact_id", "artifact")
@@ -56,6 +422,4 @@ async def judge_packet(request: JudgePacketRequest):
 
     buffer.seek(0)
     filename = request.tenant_id or "judge_packet"
-    headers = {"Content-Disposition": f"attachment; filename={filename}.zip"}
-
-    return StreamingResponse(buffer, media_type="application/zip", headers=headers)
+    return StreamingResponse(buffer, media_type="application/zip", headers=_packet_headers(filename))
@@ -3,17 +3,25 @@ import hashlib
 import io
 import json
 import logging
+import os
+import re
 import threading
+from collections import OrderedDict
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, send_file, url_for
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
+from engine import metrics
+
+from backend.jobs import QueueFullError, RenderQueue
+from backend.roster import DEFAULT_RETENTION_DAYS, SigninStore
+from backend.store import DEFAULT_MAX_AGE_SECONDS, DEFAULT_MAX_BYTES, PdfStore
 from backend.validation import (
     PayloadShapeError,
     SignatureError,
@@ -24,12 +32,49 @@ from backend.validation import (
 
 OUTPUT_DIR = Path(__file__).resolve().parent / "output"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+SIGNIN_DB = Path(__file__).resolve().parent / "signins.sqlite3"
 
 app = Flask(__name__)
+# Render job and PDF store limits; override with RENTGUARD_<NAME> environment variables.
+app.config.update(
+    RENDER_WORKERS=os.cpu_count() or 1,
+    RENDER_QUEUE_DEPTH=64,
+    PDF_STORE_MAX_BYTES=DEFAULT_MAX_BYTES,
+    PDF_STORE_MAX_AGE=DEFAULT_MAX_AGE_SECONDS,
+    # Re-encode signatures as small grayscale PNGs (changes their artifact_id).
+    NORMALIZE_SIGNATURES=False,
+    SIGNIN_RETENTION_DAYS=DEFAULT_RETENTION_DAYS,
+    METRICS_ENABLED=True,
+)
+app.config.from_prefixed_env("RENTGUARD")
 logging.basicConfig(level=logging.INFO)
 
-_today_signins: Dict[str, set[str]] = {}
+ARTIFACT_ID_RE = re.compile(r"[0-9a-f]{64}")
+_render_queue: RenderQueue | None = None
+_render_queue_lock = threading.Lock()
+_pdf_store: PdfStore | None = None
+_pdf_store_lock = threading.Lock()
+
+_signin_store: SigninStore | None = None
 _signin_lock = threading.Lock()
+_metrics_configured = False
+
+# Validated signature images and their pixel size, keyed by sha256 of the
+# image bytes and bounded by those bytes. Crews re-sign with the same image
+# every day.
+SIGNATURE_CACHE_BYTES = 64 * 1024 * 1024
+_signature_cache: "OrderedDict[str, Tuple[bytes, Tuple[int, int]]]" = OrderedDict()
+_signature_cache_size = 0
+_signature_cache_lock = threading.Lock()
+
+
+@app.before_request
+def _configure_metrics() -> None:
+    # Switched on once the app serves its first request, not on import.
+    global _metrics_configured
+    if not _metrics_configured:
+        metrics.enable(app.config["METRICS_ENABLED"] or metrics.ENABLED)
+        _metrics_configured = True
 
 
 def _canonical_payload(project: str, sign_date: date, workers: List[Dict[str, bytes]]) -> Dict[str, object]:
@@ -59,23 +104,62 @@ def _log_with_context(level: int, message: str, *, project: str, sign_date: date
     )
 
 
-def _record_signins(sign_date: date, worker_names: List[str]) -> None:
-    date_key = sign_date.isoformat()
+def signin_store() -> SigninStore:
+    global _signin_store
     with _signin_lock:
-        existing = _today_signins.setdefault(date_key, set())
-        for name in worker_names:
-            existing.add(name)
-
-
-def _build_pdf(project: str, sign_date: date, workers: List[Dict[str, bytes]], *, artifact_id: str | None = None) -> Path:
+        if _signin_store is None:
+            _signin_store = SigninStore(SIGNIN_DB, retention_days=app.config["SIGNIN_RETENTION_DAYS"])
+        return _signin_store
+
+
+def _record_signins(sign_date: date, project: str, worker_names: List[str]) -> None:
+    signin_store().record(sign_date, project, worker_names)
+
+
+def _signature_image(signature_bytes: bytes) -> Tuple[ImageReader, Tuple[int, int]]:
+    """A fresh reader over the cached signature image, and its pixel size."""
+    global _signature_cache_size
+    digest = hashlib.sha256(signature_bytes).hexdigest()
+    with _signature_cache_lock:
+        cached = _signature_cache.get(digest)
+        if cached is not None:
+            _signature_cache.move_to_end(digest)
+            data, size = cached
+            return ImageReader(io.BytesIO(data)), size
+
+    reader = ImageReader(io.BytesIO(signature_bytes))
+    size = reader.getSize()
+    with _signature_cache_lock:
+        if digest not in _signature_cache:
+            _signature_cache[digest] = (signature_bytes, size)
+            _signature_cache_size += len(signature_bytes)
+        while _signature_cache_size > SIGNATURE_CACHE_BYTES and len(_signature_cache) > 1:
+            _, (evicted, _) = _signature_cache.popitem(last=False)
+            _signature_cache_size -= len(evicted)
+    return reader, size
+
+
+def _pdf_filename(project: str, sign_date: date, artifact_id: str | None) -> str:
     filename_base = f"{safe_filename_component(project)}_{safe_filename_component(sign_date.isoformat())}"
     if artifact_id:
         filename_base = f"{filename_base}_{artifact_id}"
-    filename = f"{filename_base}.pdf"
-    pdf_path = OUTPUT_DIR / filename
+    return f"{filename_base}.pdf"
+
+
+def pdf_store() -> PdfStore:
+    global _pdf_store
+    with _pdf_store_lock:
+        if _pdf_store is None:
+            _pdf_store = PdfStore(OUTPUT_DIR, app.config["PDF_STORE_MAX_BYTES"], app.config["PDF_STORE_MAX_AGE"])
+        return _pdf_store
 
+
+@metrics.timed("pdf_render")
+def _build_pdf(project: str, sign_date: date, workers: List[Dict[str, bytes]], *, artifact_id: str | None = None) -> Path:
     buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
+    # invariant=1 drops the creation date and random document ID, so identical
+    # payloads produce identical bytes.
+    pdf = canvas.Canvas(buffer, pagesize=letter, invariant=1)
     width, height = letter
 
     margin = 0.75 * inch
@@ -91,9 +175,8 @@ def _build_pdf(project: str, sign_date: date, workers: List[Dict[str, bytes]], *
         pdf.drawString(margin, y, f"Name: {worker['name']}")
         y -= 0.35 * inch
 
-        sig_image = ImageReader(io.BytesIO(worker["signature_bytes"]))
+        sig_image, (sig_width, sig_height) = _signature_image(worker["signature_bytes"])
         max_width = width - (2 * margin)
-        sig_width, sig_height = sig_image.getSize()
         scale = min(max_width / sig_width, 1)
         render_height = sig_height * scale
 
@@ -101,16 +184,13 @@ def _build_pdf(project: str, sign_date: date, workers: List[Dict[str, bytes]], *
             pdf.showPage()
             y = height - margin
 
+        # drawImage names the XObject by a digest of the pixel data, so a
+        # signature repeated within this PDF is embedded once.
         pdf.drawImage(sig_image, margin, y - render_height, width=sig_width * scale, height=render_height)
         y -= render_height + 0.5 * inch
 
     pdf.save()
-    buffer.seek(0)
-
-    with pdf_path.open("wb") as f:
-        f.write(buffer.read())
-
-    return pdf_path
+    return pdf_store().put(_pdf_filename(project, sign_date, artifact_id), buffer.getvalue())
 
 
 @app.route("/sign", methods=["POST"])
@@ -123,7 +203,7 @@ def sign():
     context_sign_date = date.today()
 
     try:
-        project, sign_date, workers = validate_payload(payload)
+        project, sign_date, workers = validate_payload(payload, normalize=app.config["NORMALIZE_SIGNATURES"])
         steps.append("validated_payload")
         canonical_payload = _canonical_payload(project, sign_date, workers)
         artifact_id = hashlib.sha256(
@@ -145,16 +225,33 @@ def sign():
         logging.exception("payload_validation_failed")
         return jsonify({"error": str(exc), "type": "semantic", "steps": steps}), 409
 
+    if request.args.get("mode") == "job":
+        return _enqueue_render(project, sign_date, workers, artifact_id, steps)
+    return _render_now(project, sign_date, workers, artifact_id, steps)
+
+
+def _stored_pdf(project: str, sign_date: date, artifact_id: str) -> Path | None:
+    store = pdf_store()
+    store.maybe_evict()
+    return store.get(_pdf_filename(project, sign_date, artifact_id))
+
+
+def _render_now(project: str, sign_date: date, workers: List[Dict[str, bytes]], artifact_id: str, steps: List[str]):
     try:
-        pdf_path = _build_pdf(project, sign_date, workers, artifact_id=artifact_id)
-        steps.append("pdf_generated")
+        pdf_path = _stored_pdf(project, sign_date, artifact_id)
+        if pdf_path is not None:
+            metrics.count("pdf_store_hits")
+            steps.append("pdf_reused")
+        else:
+            pdf_path = _build_pdf(project, sign_date, workers, artifact_id=artifact_id)
+            steps.append("pdf_generated")
     except Exception as exc:  # pragma: no cover - runtime safety
         _log_with_context(logging.ERROR, "pdf_generation_failed", project=project, sign_date=sign_date, step="pdf")
         logging.exception("pdf_generation_failed")
         return jsonify({"error": "Failed to generate PDF.", "steps": steps}), 500
 
     try:
-        _record_signins(sign_date, [w["name"] for w in workers])
+        _record_signins(sign_date, project, [w["name"] for w in workers])
         steps.append("signins_recorded")
     except Exception:  # pragma: no cover - best effort
         _log_with_context(logging.WARNING, "signin_record_failed", project=project, sign_date=sign_date, step="today-signins")
@@ -164,12 +261,102 @@ def sign():
     return jsonify({"message": "Signatures captured.", "pdf": pdf_path.name, "artifact_id": artifact_id, "steps": steps})
 
 
+def render_queue() -> RenderQueue:
+    global _render_queue
+    with _render_queue_lock:
+        if _render_queue is None:
+            _render_queue = RenderQueue(app.config["RENDER_WORKERS"], app.config["RENDER_QUEUE_DEPTH"])
+        return _render_queue
+
+
+def _enqueue_render(
+    project: str,
+    sign_date: date,
+    workers: List[Dict[str, bytes]],
+    artifact_id: str,
+    steps: List[str],
+):
+    def record_signins() -> None:
+        try:
+            _record_signins(sign_date, project, [w["name"] for w in workers])
+        except Exception:  # pragma: no cover - best effort
+            _log_with_context(
+                logging.WARNING, "signin_record_failed", project=project, sign_date=sign_date, step="today-signins"
+            )
+            logging.exception("signin_record_failed")
+
+    def on_done(job) -> None:
+        if job.exception() is not None:
+            _log_with_context(logging.ERROR, "pdf_generation_failed", project=project, sign_date=sign_date, step="pdf")
+            return
+        record_signins()
+
+    if _stored_pdf(project, sign_date, artifact_id) is not None:
+        steps.append("pdf_reused")
+        record_signins()
+    else:
+        try:
+            render_queue().submit(
+                artifact_id,
+                _build_pdf,
+                project,
+                sign_date,
+                workers,
+                artifact_id=artifact_id,
+                on_done=on_done,
+                # The store may have evicted a finished job's PDF since.
+                reuse_if=Path.exists,
+            )
+        except QueueFullError as exc:
+            _log_with_context(logging.WARNING, "render_queue_full", project=project, sign_date=sign_date, step="queue")
+            return jsonify({"error": str(exc), "steps": steps}), 503, {"Retry-After": "1"}
+        steps.append("render_queued")
+
+    _log_with_context(logging.INFO, "sign_request_queued", project=project, sign_date=sign_date, step="queue")
+    return jsonify({
+        "message": "Signatures captured; PDF render queued.",
+        "artifact_id": artifact_id,
+        "status_url": url_for("sign_status", artifact_id=artifact_id),
+        "steps": steps,
+    }), 202
+
+
+@app.route("/sign/<artifact_id>", methods=["GET"])
+def sign_status(artifact_id: str):
+    """Render status while a job is pending, the PDF once it exists."""
+    if not ARTIFACT_ID_RE.fullmatch(artifact_id):
+        return jsonify({"error": "Invalid artifact_id."}), 400
+    job = _render_queue.get(artifact_id) if _render_queue is not None else None
+    if job is not None and not job.done():
+        status = "rendering" if job.running() else "queued"
+        return jsonify({"artifact_id": artifact_id, "status": status}), 202
+    if job is not None and job.exception() is not None:
+        return jsonify({"artifact_id": artifact_id, "status": "failed", "error": "Failed to generate PDF."}), 500
+
+    pdf_path = job.result() if job is not None else next(OUTPUT_DIR.glob(f"*_{artifact_id}.pdf"), None)
+    if pdf_path is None or not pdf_path.exists():
+        return jsonify({"error": "Unknown artifact_id."}), 404
+    return send_file(pdf_path, mimetype="application/pdf", download_name=pdf_path.name)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Stage timers and counters in the Prometheus text format."""
+    gauges = {"signature_cache_entries": len(_signature_cache), "signature_cache_bytes": _signature_cache_size}
+    if _render_queue is not None:
+        gauges["render_queue_pending"] = _render_queue.pending
+    return app.response_class(metrics.render_prometheus(gauges), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.route("/today-signins", methods=["GET"])
 def today_signins():
-    today_key = date.today().isoformat()
-    with _signin_lock:
-        names = sorted(_today_signins.get(today_key, set()))
-    return jsonify({"date": today_key, "workers": names})
+    today = date.today()
+    project = request.args.get("project")
+    names = signin_store().names(today, project)
+    body = {"date": today.isoformat(), "workers": names}
+    if project is not None:
+        body["project"] = project
+    return jsonify(body)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,94 @@
+"""Background PDF render jobs for the signature capture service."""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+DEFAULT_HISTORY = 1024
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the render queue is at its configured depth."""
+
+
+class RenderQueue:
+    """Bounded process pool keyed by artifact ID.
+
+    Submitting a key that is queued, running or finished returns the existing
+    job, so retries never render twice while its result is still usable. At most ``depth`` jobs may be waiting
+    or running; finished jobs are remembered up to ``history``.
+    """
+
+    def __init__(self, workers: int, depth: int, history: int = DEFAULT_HISTORY):
+        if workers <= 0 or depth <= 0:
+            raise ValueError("workers and depth must be positive")
+        self.workers = workers
+        self.depth = depth
+        self.history = history
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable,
+        *args,
+        on_done: Optional[Callable[[Future], None]] = None,
+        reuse_if: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ) -> Future:
+        """Submit ``fn(*args, **kwargs)`` under ``key``, or return the existing job.
+
+        A finished job is only reused if it succeeded and ``reuse_if`` (when
+        given) accepts its result; otherwise the work is submitted again.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and (not job.done() or self._reusable(job, reuse_if)):
+                return job
+            if self._active >= self.depth:
+                raise QueueFullError("Render queue is full.")
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            job = self._executor.submit(fn, *args, **kwargs)
+            self._active += 1
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._trim()
+        if on_done is not None:
+            job.add_done_callback(on_done)
+        job.add_done_callback(self._finished)
+        return job
+
+    @staticmethod
+    def _reusable(job: Future, reuse_if: Optional[Callable[[Any], bool]]) -> bool:
+        if job.exception() is not None:
+            return False
+        return reuse_if is None or reuse_if(job.result())
+
+    def _finished(self, job: Future) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _trim(self) -> None:
+        excess = len(self._jobs) - self.history
+        for key in [key for key, job in self._jobs.items() if job.done()][:max(excess, 0)]:
+            del self._jobs[key]
+
+    def get(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._active
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,115 @@
+"""Persistent sign-in roster for the signature capture service.
+
+Sign-ins live in a SQLite database in WAL mode, so several server processes
+can share one roster and readers never block the writer. The primary key
+``(sign_date, project, name)`` serves per-(day, project) queries and an
+index on ``(sign_date, name)`` serves per-day ones. Writes are buffered and
+committed in batches, once ``batch_size`` names are pending or
+``flush_interval`` seconds after the first one. Rows older than
+``retention_days`` are deleted at most once per ``PRUNE_INTERVAL_SECONDS``.
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class SigninStore:
+    def __init__(
+        self,
+        path: Path,
+        retention_days: int = DEFAULT_RETENTION_DAYS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        today: Callable[[], date] = date.today,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.today = today
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS signins (
+                sign_date TEXT NOT NULL,
+                project TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (sign_date, project, name)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS signins_date_name ON signins (sign_date, name);
+            """
+        )
+        self._pending: List[Tuple[str, str, str]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._last_prune = float("-inf")
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def record(self, sign_date: date, project: str, names: Iterable[str]) -> None:
+        rows = [(sign_date.isoformat(), project, name) for name in names]
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            elif self._timer is None and self._pending:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        prune = time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS
+        if not self._pending and not prune:
+            return
+        with self._db:
+            if self._pending:
+                self._db.executemany("INSERT OR IGNORE INTO signins VALUES (?, ?, ?)", self._pending)
+                self._pending = []
+            if prune:
+                cutoff = self.today() - timedelta(days=self.retention_days)
+                self._db.execute("DELETE FROM signins WHERE sign_date < ?", (cutoff.isoformat(),))
+                self._last_prune = time.monotonic()
+
+    def names(self, sign_date: date, project: Optional[str] = None) -> List[str]:
+        """Names signed in on ``sign_date``, optionally for one project, sorted."""
+        with self._lock:
+            self._flush_locked()
+            if project is None:
+                rows = self._db.execute(
+                    "SELECT DISTINCT name FROM signins WHERE sign_date = ? ORDER BY name",
+                    (sign_date.isoformat(),),
+                )
+            else:
+                rows = self._db.execute(
+                    "SELECT name FROM signins WHERE sign_date = ? AND project = ? ORDER BY name",
+                    (sign_date.isoformat(), project),
+                )
+            return [name for (name,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is None:
+                return
+            self._flush_locked()
+            self._db.close()
+            self._db = None
+        atexit.unregister(self.close)
@@ -0,0 +1,103 @@
+"""Content-addressed PDF store for the signature capture service.
+
+PDF filenames embed the ``artifact_id`` (the sha256 of the canonical
+payload), and identical payloads render byte-identical PDFs, so a file that
+exists is the answer. ``get`` costs one ``utime`` call, which also marks the
+file as recently used. ``put`` writes atomically. ``evict`` removes files
+idle for longer than ``max_age`` seconds, then the least recently used ones
+until the store fits in ``max_bytes``.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 90 * 24 * 3600
+EVICT_INTERVAL_SECONDS = 300
+TMP_SUFFIX = ".tmp"
+
+
+class PdfStore:
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        self._last_evict = float("-inf")
+
+    def get(self, name: str) -> Optional[Path]:
+        path = self.directory / name
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        path = self.directory / name
+        tmp = self.directory / f".{name}.{os.getpid()}-{threading.get_ident():x}{TMP_SUFFIX}"
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return path
+
+    def evict(self) -> int:
+        """Apply the age and size limits; returns how many files were removed."""
+        now = self.clock()
+        self._last_evict = now
+        expired, entries = self._evict_expired(now)
+        return expired + self._evict_oldest(entries)
+
+    def _evict_expired(self, now: float) -> Tuple[int, List[Tuple[float, int, str]]]:
+        """Remove stale temp files and expired PDFs; returns ``(removed, kept)``."""
+        removed = 0
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                st = entry.stat()
+                if entry.name.endswith(TMP_SUFFIX):
+                    # Left behind by a crashed writer.
+                    if st.st_mtime < now - EVICT_INTERVAL_SECONDS:
+                        os.unlink(entry.path)
+                elif entry.name.endswith(".pdf"):
+                    if st.st_mtime < now - self.max_age:
+                        os.unlink(entry.path)
+                        removed += 1
+                    else:
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        return removed, entries
+
+    def _evict_oldest(self, entries: List[Tuple[float, int, str]]) -> int:
+        """Remove the least recently used ``(mtime, size, path)`` entries until under ``max_bytes``."""
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+    def maybe_evict(self) -> int:
+        """``evict`` at most once per ``EVICT_INTERVAL_SECONDS``."""
+        if self.clock() - self._last_evict < EVICT_INTERVAL_SECONDS:
+            return 0
+        return self.evict()
@@ -1,9 +1,13 @@
 import base64
 import binascii
+import io
 import re
+import struct
 from datetime import date
 from typing import Dict, List, Tuple
 
+from engine import metrics
+
 
 class ValidationError(ValueError):
     """Base error for payload validation failures."""
@@ -17,6 +21,17 @@ class SignatureError(ValidationError):
     """Raised when signatures are missing, invalid, or exceed limits."""
 
 MAX_SIGNATURE_BYTES = 200_000
+# Base64 without padding slack or whitespace (b64decode(validate=True) rejects both).
+MAX_SIGNATURE_ENCODED_LENGTH = 4 * -(-MAX_SIGNATURE_BYTES // 3)
+MAX_DATA_URL_PREFIX = 128
+MAX_SIGNATURE_PIXELS = 4_000_000
+# Bounding box of normalized signatures: grayscale PNG, aspect ratio kept.
+NORMALIZED_SIGNATURE_SIZE = (600, 200)
+
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+_JPEG_MAGIC = b"\xff\xd8\xff"
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames.
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
 
 
 def safe_filename_component(value: str) -> str:
@@ -26,8 +41,6 @@ def safe_filename_component(value: str) -> str:
 
 
 def _strip_data_url(signature: str) -> str:
-    if not isinstance(signature, str):
-        raise SignatureError("Signature must be a string.")
     if signature.startswith("data:"):
         try:
             return signature.split(",", 1)[1]
@@ -36,8 +49,100 @@ def _strip_data_url(signature: str) -> str:
     return signature
 
 
-def decode_signature(signature: str) -> bytes:
+def _jpeg_size(data: bytes) -> Tuple[int, int]:
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            break
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # standalone markers
+            pos += 2
+            continue
+        (length,) = struct.unpack_from(">H", data, pos + 2)
+        if marker in _JPEG_SOF:
+            if pos + 9 > len(data):
+                break
+            height, width = struct.unpack_from(">HH", data, pos + 5)
+            return width, height
+        pos += 2 + length
+    raise SignatureError("Signature JPEG has no readable frame header.")
+
+
+def sniff_image(data: bytes) -> Tuple[str, int, int]:
+    """Return ``(format, width, height)`` from a PNG or JPEG header."""
+    if data.startswith(_PNG_MAGIC):
+        if len(data) < 24 or data[12:16] != b"IHDR":
+            raise SignatureError("Signature PNG is truncated.")
+        width, height = struct.unpack_from(">II", data, 16)
+        image_format = "PNG"
+    elif data.startswith(_JPEG_MAGIC):
+        width, height = _jpeg_size(data)
+        image_format = "JPEG"
+    else:
+        raise SignatureError("Signature must be a PNG or JPEG image.")
+    if not width or not height:
+        raise SignatureError("Signature image has no pixels.")
+    if width * height > MAX_SIGNATURE_PIXELS:
+        raise SignatureError("Signature image dimensions exceed the allowed size.")
+    return image_format, width, height
+
+
+def normalize_signature(data: bytes) -> bytes:
+    """Re-encode a signature as grayscale PNG within ``NORMALIZED_SIGNATURE_SIZE``.
+
+    Transparent pixels become white. The output depends only on the input
+    image, so normalized payloads keep stable artifact IDs.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGBA")
+    except (OSError, ValueError) as exc:
+        raise SignatureError("Signature image could not be decoded.") from exc
+    canvas = Image.new("RGBA", image.size, "white")
+    canvas.alpha_composite(image)
+    gray = canvas.convert("L")
+    gray.thumbnail(NORMALIZED_SIGNATURE_SIZE)
+    out = io.BytesIO()
+    gray.save(out, "PNG")
+    return out.getvalue()
+
+
+def _encoded_signature(signature: str) -> str:
+    """The base64 payload of ``signature``, within the encoded length limits."""
+    if not isinstance(signature, str):
+        raise SignatureError("Signature must be a string.")
+    if len(signature) > MAX_SIGNATURE_ENCODED_LENGTH + MAX_DATA_URL_PREFIX:
+        raise SignatureError("Signature exceeds maximum allowed size.")
     payload = _strip_data_url(signature).strip()
+    if len(payload) > MAX_SIGNATURE_ENCODED_LENGTH:
+        raise SignatureError("Signature exceeds maximum allowed size.")
+    return payload
+
+
+def _sniff_encoded(payload: str) -> None:
+    """Reject a non-PNG/JPEG payload from its first few decoded bytes."""
+    try:
+        head = base64.b64decode(payload[:12], validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise SignatureError("Signature must be valid base64.") from exc
+    if len(head) >= 3 and head[:3] not in (_PNG_MAGIC[:3], _JPEG_MAGIC):
+        raise SignatureError("Signature must be a PNG or JPEG image.")
+
+
+@metrics.timed("signature_decode")
+def decode_signature(signature: str) -> bytes:
+    """Decode and check a signature, cheapest checks first.
+
+    Length limits are applied to the encoded string, and the image type to
+    its first few bytes, before the full base64 decode.
+    """
+    payload = _encoded_signature(signature)
+    _sniff_encoded(payload)
     try:
         decoded = base64.b64decode(payload, validate=True)
     except (binascii.Error, ValueError) as exc:
@@ -46,10 +151,16 @@ def decode_signature(signature: str) -> bytes:
         raise SignatureError("Signature content was empty.")
     if len(decoded) > MAX_SIGNATURE_BYTES:
         raise SignatureError("Signature exceeds maximum allowed size.")
+    sniff_image(decoded)
     return decoded
 
 
-def validate_payload(payload: dict) -> Tuple[str, date, List[Dict[str, bytes]]]:
+def _worker_signature(signature: str, normalize: bool) -> bytes:
+    signature_bytes = decode_signature(signature)
+    return normalize_signature(signature_bytes) if normalize else signature_bytes
+
+
+def validate_payload(payload: dict, *, normalize: bool = False) -> Tuple[str, date, List[Dict[str, bytes]]]:
     """
     Validate and canonicalize the signature capture payload.
 
@@ -60,11 +171,11 @@ def validate_payload(payload: dict) -> Tuple[str, date, List[Dict[str, bytes]]]:
       - signDate (optional ISO-8601 date string)
     - each worker object requires:
       - name (string, non-empty, case-insensitive unique across workers)
-      - signature (base64 string; data URLs are accepted)
+      - signature (base64 PNG or JPEG; data URLs are accepted)
 
     Rejection rules
     - structural issues (wrong types, missing fields, empty values) raise PayloadShapeError
-    - signature decoding failures or size limits raise SignatureError
+    - signature decoding failures, non-PNG/JPEG images or size limits raise SignatureError
     - semantic conflicts (duplicate worker names) raise ValidationError
 
     Guarantees (output contract)
@@ -72,6 +183,7 @@ def validate_payload(payload: dict) -> Tuple[str, date, List[Dict[str, bytes]]]:
       - project is a trimmed string
       - sign_date is a date instance (defaults to today when omitted)
       - workers is a deterministic, name-sorted list of {"name", "signature_bytes"}
+      - with normalize=True, signature_bytes is the normalize_signature() form
     - worker ordering is canonicalized (case-insensitive sort) to keep PDF output stable
     """
 
@@ -115,7 +227,7 @@ def validate_payload(payload: dict) -> Tuple[str, date, List[Dict[str, bytes]]]:
             raise ValidationError("Worker names must be unique (case-insensitive).")
         seen_names.add(name_key)
 
-        signature_bytes = decode_signature(signature_raw)
+        signature_bytes = _worker_signature(signature_raw, normalize)
         validated_workers.append({"name": name, "signature_bytes": signature_bytes})
 
     validated_workers = sorted(validated_workers, key=lambda worker: worker["name"].lower())
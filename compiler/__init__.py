@@ -0,0 +1 @@
+"""Deterministic SysDNA kernel compiler."""
@@ -1,6 +1,8 @@
 import argparse
 import hashlib
 import json
+import operator
+import re
 import sys
 from pathlib import Path
 
@@ -43,6 +45,278 @@ def compute_hash(data) -> str:
     return hashlib.sha256(canonical).hexdigest()
 
 
+class DSLError(ValueError):
+    """Raised when a SysDNA rule string cannot be parsed."""
+
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<op>==|!=|>=|<=|>|<|=)
+      | (?P<paren>[()])
+      | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = {"AND", "OR", "NOT"}
+_CONSTANTS = {"true": True, "false": False, "null": None}
+_COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+def tokenize(text: str):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise DSLError(f"Unexpected input at {pos} in rule: {text!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _operand(kind: str, value: str):
+    """Literals, ALL_CAPS symbols (e.g. LATE) and lowercase variables."""
+    if kind == "number":
+        return ("lit", float(value) if "." in value else int(value))
+    if kind == "string":
+        return ("lit", value[1:-1])
+    if value in _CONSTANTS:
+        return ("lit", _CONSTANTS[value])
+    if value.isupper():
+        return ("lit", value)
+    return ("var", value)
+
+
+class _Parser:
+    """Recursive-descent parser for the SysDNA ``if``/``then`` rule DSL.
+
+    condition := term (OR term)*
+    term      := factor (AND factor)*
+    factor    := NOT factor | "(" condition ")" | operand [cmp operand]
+    action    := variable "=" operand
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        if token[0] is None:
+            raise DSLError(f"Unexpected end of rule: {self.text!r}")
+        self.pos += 1
+        return token
+
+    def _keyword(self, word: str) -> bool:
+        kind, value = self._peek()
+        if kind == "ident" and value == word:
+            self.pos += 1
+            return True
+        return False
+
+    def _finish(self, node):
+        if self.pos != len(self.tokens):
+            raise DSLError(f"Unexpected {self._peek()[1]!r} in rule: {self.text!r}")
+        return node
+
+    def condition(self):
+        return self._finish(self._or())
+
+    def _or(self):
+        node = self._and()
+        while self._keyword("OR"):
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._factor()
+        while self._keyword("AND"):
+            node = ("and", node, self._factor())
+        return node
+
+    def _factor(self):
+        if self._keyword("NOT"):
+            return ("not", self._factor())
+        kind, value = self._take()
+        if kind == "paren" and value == "(":
+            node = self._or()
+            if self._take() != ("paren", ")"):
+                raise DSLError(f"Unbalanced parentheses in rule: {self.text!r}")
+            return node
+        if kind not in ("number", "string", "ident") or value in _KEYWORDS:
+            raise DSLError(f"Expected operand, found {value!r} in rule: {self.text!r}")
+        left = _operand(kind, value)
+        op_kind, op = self._peek()
+        if op_kind == "op" and op in _COMPARISONS:
+            self.pos += 1
+            r_kind, r_value = self._take()
+            if r_kind not in ("number", "string", "ident") or r_value in _KEYWORDS:
+                raise DSLError(f"Expected operand after {op!r} in rule: {self.text!r}")
+            return ("cmp", op, left, _operand(r_kind, r_value))
+        return ("truthy", left)
+
+    def action(self):
+        kind, target = self._take()
+        if kind != "ident" or target in _KEYWORDS or target.isupper():
+            raise DSLError(f"Action must assign a variable: {self.text!r}")
+        if self._take() != ("op", "="):
+            raise DSLError(f"Action must be 'name = value': {self.text!r}")
+        kind, value = self._take()
+        if kind not in ("number", "string", "ident"):
+            raise DSLError(f"Action needs a value: {self.text!r}")
+        return self._finish(("assign", target, _operand(kind, value)))
+
+
+def parse_condition(text: str):
+    return _Parser(text).condition()
+
+
+def parse_action(text: str):
+    return _Parser(text).action()
+
+
+MISSING = object()
+
+
+def _compare(fn, a, b) -> bool:
+    if a is MISSING or b is MISSING:
+        return False
+    try:
+        return bool(fn(a, b))
+    except TypeError:
+        return False
+
+
+def _truthy(value) -> bool:
+    return value is not MISSING and bool(value)
+
+
+def _compile_scalar(node):
+    kind = node[0]
+    if kind == "lit":
+        value = node[1]
+        return lambda state: value
+    if kind == "var":
+        name = node[1]
+        return lambda state: state.get(name, MISSING)
+    if kind == "cmp":
+        fn, left, right = _COMPARISONS[node[1]], _compile_scalar(node[2]), _compile_scalar(node[3])
+        return lambda state: _compare(fn, left(state), right(state))
+    if kind == "truthy":
+        inner = _compile_scalar(node[1])
+        return lambda state: _truthy(inner(state))
+    if kind == "not":
+        inner = _compile_scalar(node[1])
+        return lambda state: not inner(state)
+    if kind == "and":
+        left, right = _compile_scalar(node[1]), _compile_scalar(node[2])
+        return lambda state: left(state) and right(state)
+    if kind == "or":
+        left, right = _compile_scalar(node[1]), _compile_scalar(node[2])
+        return lambda state: left(state) or right(state)
+    raise DSLError(f"Unknown node {kind!r}")
+
+
+def _compile_columns(node):
+    kind = node[0]
+    if kind == "lit":
+        value = node[1]
+        return lambda cols, n: [value] * n
+    if kind == "var":
+        name = node[1]
+        return lambda cols, n: cols[name] if name in cols else [MISSING] * n
+    if kind == "cmp":
+        fn, left, right = _COMPARISONS[node[1]], _compile_columns(node[2]), _compile_columns(node[3])
+        return lambda cols, n: [_compare(fn, a, b) for a, b in zip(left(cols, n), right(cols, n))]
+    if kind == "truthy":
+        inner = _compile_columns(node[1])
+        return lambda cols, n: [_truthy(v) for v in inner(cols, n)]
+    if kind == "not":
+        inner = _compile_columns(node[1])
+        return lambda cols, n: [not v for v in inner(cols, n)]
+    if kind == "and":
+        left, right = _compile_columns(node[1]), _compile_columns(node[2])
+        return lambda cols, n: [a and b for a, b in zip(left(cols, n), right(cols, n))]
+    if kind == "or":
+        left, right = _compile_columns(node[1]), _compile_columns(node[2])
+        return lambda cols, n: [a or b for a, b in zip(left(cols, n), right(cols, n))]
+    raise DSLError(f"Unknown node {kind!r}")
+
+
+class CompiledKernel:
+    """Executable form of a kernel's ``rules``.
+
+    Rules fire in order; each ``then`` assignment is visible to later rules.
+    Comparisons involving a variable that is absent are false.
+    """
+
+    def __init__(self, kernel, kernel_hash: str):
+        self.kernel_id = kernel["kernel_id"]
+        self.kernel_version = kernel["kernel_version"]
+        self.kernel_hash = kernel_hash
+        self.rules = []
+        for rule in kernel.get("rules", []):
+            condition = parse_condition(rule["if"])
+            _, target, value = parse_action(rule["then"])
+            self.rules.append((
+                target,
+                _compile_scalar(condition),
+                _compile_scalar(value),
+                _compile_columns(condition),
+                _compile_columns(value),
+            ))
+        self.outputs = list(dict.fromkeys(rule[0] for rule in self.rules))
+
+    def evaluate(self, facts):
+        """Return the variables assigned by the rules for one record."""
+        state = dict(facts)
+        derived = {}
+        for target, condition, value, _, _ in self.rules:
+            if condition(state):
+                state[target] = derived[target] = value(state)
+        return derived
+
+    def evaluate_columns(self, columns):
+        """Column-wise ``evaluate``: returns one list per output, ``None`` where unassigned."""
+        lengths = {len(col) for col in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("columns must have equal length")
+        n = lengths.pop() if lengths else 0
+        state = dict(columns)
+        for target, _, _, condition, value in self.rules:
+            previous = state.get(target, [MISSING] * n)
+            state[target] = [v if c else p for c, v, p in zip(condition(state, n), value(state, n), previous)]
+        return {name: [None if v is MISSING else v for v in state[name]] for name in self.outputs}
+
+
+_COMPILED = {}
+
+
+def compile_kernel(kernel, kernel_hash: str = None) -> CompiledKernel:
+    """Compile ``kernel`` once per ``kernel_hash`` and reuse it afterwards."""
+    if kernel_hash is None:
+        kernel_hash = compute_hash(kernel)
+    compiled = _COMPILED.get(kernel_hash)
+    if compiled is None:
+        compiled = _COMPILED[kernel_hash] = CompiledKernel(kernel, kernel_hash)
+    return compiled
+
+
 def write_json(path: Path, data):
     with path.open("w", encoding="utf-8") as handle:
         json.dump(data, handle, indent=2, sort_keys=True, ensure_ascii=False)
@@ -65,6 +339,10 @@ def main(argv=None):
     validate_sysdna(sysdna)
     kernel = build_kernel(sysdna)
     kernel_hash = compute_hash(kernel)
+    try:
+        compile_kernel(kernel, kernel_hash)
+    except (DSLError, KeyError) as exc:
+        raise SystemExit(f"SysDNA rules do not compile: {exc}") from exc
 
     write_json(args.kernel_output, kernel)
     write_hash(args.hash_output, kernel_hash)
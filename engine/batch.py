@@ -0,0 +1,156 @@
+"""Columnar batch evaluation for portfolio runs.
+
+``evaluate_columns`` walks the same rule tree as ``engine.rentguard.evaluate``
+but over parallel column sequences (lists, ``array.array`` or NumPy arrays)
+instead of one dict per tenant. Due dates become an integer ``due_day``
+(epoch-day) column, parsed once per distinct value, and the thresholds are
+read once per batch, so a portfolio is reduced to two integer column passes:
+one for ``days_late`` and one for branch codes. With NumPy installed both are
+whole-column array operations; without it they are per-row loops. Branch
+codes index ``engine.rentguard.BRANCHES`` and ``emit_columns`` turns them
+back into receipts through ``emit_branch``, which keeps decision IDs
+identical to the per-record path.
+"""
+
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from engine.rentguard import (
+    BRANCH_DELAY_BLOCK,
+    BRANCH_MASS_ANOMALY,
+    BRANCH_NOTICE,
+    BRANCH_NOTICE_WITHIN_DELAY,
+    BRANCH_OK,
+    BRANCHES,
+    build_branch,
+    emit_branch,
+)
+from engine import metrics
+from engine.ingest import epoch_day_column, epoch_day_of
+from engine.table import TenantTable
+from engine.rules import active_rules
+from engine.sink import ArtifactSink
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
+
+COLUMNS = (
+    "tenant_id",
+    "due_date",
+    "late_count_window",
+    "days_since_eligible_filing",
+    "portfolio_late_rate_milli",
+)
+
+
+def columns_from_records(records: Iterable[Mapping]) -> Mapping[str, Sequence]:
+    """Column view of ``records``; a ``TenantTable`` already is one."""
+    if isinstance(records, TenantTable):
+        return records
+    columns: Dict[str, Sequence] = {name: [] for name in COLUMNS}
+    for record in records:
+        for name in COLUMNS:
+            columns[name].append(record[name])
+    columns["due_day"] = epoch_day_column(columns["due_date"])
+    return columns
+
+
+def due_day_column(columns: Mapping[str, Sequence]) -> Sequence[int]:
+    due_days = columns.get("due_day")
+    return due_days if due_days is not None else epoch_day_column(columns["due_date"])
+
+
+def days_late_column(due_days: Sequence[int], today: date) -> array:
+    today_day = epoch_day_of(today)
+    if numpy is not None:
+        return array("q", (today_day - numpy.asarray(due_days, dtype=numpy.int64)).tobytes())
+    return array("q", [today_day - due for due in due_days])
+
+
+def branch_column(
+    days_late: Sequence[int],
+    late_count_window: Sequence[int],
+    days_since_eligible_filing: Sequence[int],
+    portfolio_late_rate_milli: Sequence[int],
+    thresholds: Optional[Mapping[str, int]] = None,
+) -> array:
+    if thresholds is None:
+        thresholds = active_rules()
+    n_rate = thresholds["N_PORTFOLIO_RATE_MILLI"]
+    x_days = thresholds["X_DAYS_LATE"]
+    y_repeat = thresholds["Y_REPEAT"]
+    z_delay = thresholds["Z_MAX_DELAY"]
+
+    if numpy is not None:
+        # Later assignments take precedence, so rules are applied innermost first.
+        codes = numpy.full(len(days_late), BRANCH_NOTICE_WITHIN_DELAY, dtype=numpy.int8)
+        codes[numpy.asarray(days_since_eligible_filing) > z_delay] = BRANCH_DELAY_BLOCK
+        codes[numpy.asarray(late_count_window) < y_repeat] = BRANCH_NOTICE
+        codes[numpy.asarray(days_late) <= x_days] = BRANCH_OK
+        codes[numpy.asarray(portfolio_late_rate_milli) > n_rate] = BRANCH_MASS_ANOMALY
+        return array("b", codes.tobytes())
+
+    out = array("b")
+    for late, repeats, delay, rate in zip(days_late, late_count_window, days_since_eligible_filing, portfolio_late_rate_milli):
+        if rate > n_rate:
+            out.append(BRANCH_MASS_ANOMALY)
+        elif late <= x_days:
+            out.append(BRANCH_OK)
+        elif repeats < y_repeat:
+            out.append(BRANCH_NOTICE)
+        elif delay > z_delay:
+            out.append(BRANCH_DELAY_BLOCK)
+        else:
+            out.append(BRANCH_NOTICE_WITHIN_DELAY)
+    return out
+
+
+def evaluate_columns(
+    columns: Mapping[str, Sequence],
+    today: Optional[date] = None,
+    thresholds: Optional[Mapping[str, int]] = None,
+) -> Tuple[array, array]:
+    """Return ``(days_late, branches)`` for every row of ``columns``."""
+
+    if today is None:
+        today = date.today()
+    with metrics.timer("date_math"):
+        days_late = days_late_column(due_day_column(columns), today)
+    with metrics.timer("rule_walk"):
+        branches = branch_column(
+            days_late,
+            columns["late_count_window"],
+            columns["days_since_eligible_filing"],
+            columns["portfolio_late_rate_milli"],
+            thresholds,
+        )
+    metrics.count("records_evaluated", len(branches))
+    return days_late, branches
+
+
+def rule_path(branch: int) -> List[str]:
+    return list(BRANCHES[branch][1])
+
+
+def build_columns(
+    records: Iterable[Mapping],
+    branches: Sequence[int],
+    thresholds: Optional[Mapping[str, int]] = None,
+    as_of: Optional[date] = None,
+) -> List[Dict]:
+    """Receipt payloads; pass the explicit ``as_of`` the branches were computed for."""
+    return [build_branch(record, branch, thresholds, as_of) for record, branch in zip(records, branches)]
+
+
+def emit_columns(
+    records: Iterable[Mapping],
+    branches: Sequence[int],
+    thresholds: Optional[Mapping[str, int]] = None,
+    sink: Optional[ArtifactSink] = None,
+    as_of: Optional[date] = None,
+) -> None:
+    for record, branch in zip(records, branches):
+        emit_branch(record, branch, thresholds, sink, as_of)
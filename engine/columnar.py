@@ -0,0 +1,260 @@
+"""Memory-mapped columnar portfolio files.
+
+``convert`` turns a CSV portfolio into a binary file of fixed-width columns
+for repeated runs; ``MappedPortfolio`` maps it back without parsing.
+Layout::
+
+    MAGIC | columns ... | tenant ID bytes | footer JSON | footer length (u64 LE) | MAGIC
+
+Every column starts on an 8-byte boundary and holds ``rows`` native-endian
+integers: ``tenant_end`` (u64 end offsets into the tenant ID bytes),
+``due_code`` (u32 index into the footer's ``dates``), and the i32 columns
+``due_day``, ``late_count_window``, ``days_since_eligible_filing`` and
+``portfolio_late_rate_milli``. The footer records the schema (type code and
+offset per column), the row count, the late count and precomputed late rate,
+and the path (relative to the columnar file), size and mtime of the source
+CSV. Opening a file whose source CSV is present but has a different size or
+mtime raises ``StaleColumnarError``.
+
+Columns are exposed as ``memoryview`` casts over the mapping, so opening a
+file costs one ``mmap`` and a footer parse whatever its size, and chunks are
+``TenantTable`` views that copy nothing until a record is built.
+
+Usage::
+
+    python -m engine.columnar portfolio.csv            # writes portfolio.rgc
+    python run.py portfolio.rgc
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from engine.ingest import DEFAULT_CHUNK_SIZE, scan_portfolio
+from engine.table import TenantTable, iter_portfolio_tables
+
+MAGIC = b"RGCOL\x00\x00\x01"
+FORMAT_VERSION = 1
+COLUMNAR_SUFFIX = ".rgc"
+
+# (name, array type code), in file order.
+COLUMNS = (
+    ("tenant_end", "Q"),
+    ("due_code", "I"),
+    ("due_day", "i"),
+    ("late_count_window", "i"),
+    ("days_since_eligible_filing", "i"),
+    ("portfolio_late_rate_milli", "i"),
+)
+
+_FOOTER_LENGTH = struct.Struct("<Q")
+_ALIGN = 8
+
+
+class ColumnarFormatError(ValueError):
+    """File is not a readable columnar portfolio."""
+
+
+class StaleColumnarError(ColumnarFormatError):
+    """The source CSV changed after the file was converted."""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def columnar_path(csv_path: str) -> Path:
+    return Path(csv_path).with_suffix(COLUMNAR_SUFFIX)
+
+
+def convert(csv_path: str, out_path: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Path:
+    """Write the columnar form of a CSV portfolio; returns its path.
+
+    The CSV is read twice, once for the late rate and once for the rows,
+    with one chunk in memory at a time. The file is written under a
+    temporary name and renamed into place.
+    """
+    out = Path(out_path) if out_path is not None else columnar_path(csv_path)
+    stats = scan_portfolio(csv_path)
+    st = os.stat(csv_path)
+    rows = stats["rows"]
+
+    schema: Dict[str, Dict[str, object]] = {}
+    offset = len(MAGIC)
+    for name, typecode in COLUMNS:
+        offset = _aligned(offset)
+        schema[name] = {"type": typecode, "offset": offset}
+        offset += rows * array(typecode).itemsize
+    ids_offset = _aligned(offset)
+
+    date_codes: Dict[str, int] = {}
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            row = 0
+            ids_end = 0
+            for table in iter_portfolio_tables(csv_path, stats["portfolio_late_rate_milli"], chunk_size=chunk_size):
+                ids, id_ends, chunk_dates, codes, *ints = table.buffers()
+                remap = [date_codes.setdefault(d, len(date_codes)) for d in chunk_dates]
+                columns = {
+                    "tenant_end": array("Q", [ids_end + end for end in id_ends]),
+                    "due_code": array("I", [remap[code] for code in codes]),
+                }
+                columns.update(zip(("due_day", "late_count_window", "days_since_eligible_filing",
+                                    "portfolio_late_rate_milli"), ints))
+                for name, typecode in COLUMNS:
+                    f.seek(schema[name]["offset"] + row * array(typecode).itemsize)
+                    columns[name].tofile(f)
+                f.seek(ids_offset + ids_end)
+                f.write(ids)
+                row += len(table)
+                ids_end += len(ids)
+            if row != rows:
+                raise ColumnarFormatError(f"{csv_path} changed during conversion")
+
+            dates = sorted(date_codes, key=date_codes.__getitem__)
+            footer = json.dumps({
+                "format": "rentguard-columnar",
+                "version": FORMAT_VERSION,
+                "byteorder": sys.byteorder,
+                "rows": rows,
+                "late": stats["late"],
+                "portfolio_late_rate_milli": stats["portfolio_late_rate_milli"],
+                "columns": schema,
+                "ids": {"offset": ids_offset, "length": ids_end},
+                "dates": dates,
+                "source": {
+                    "path": os.path.relpath(os.path.abspath(csv_path), os.path.abspath(out.parent)),
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                },
+            }, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            f.seek(ids_offset + ids_end)
+            f.write(footer)
+            f.write(_FOOTER_LENGTH.pack(len(footer)))
+            f.write(MAGIC)
+        os.replace(tmp, out)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return out
+
+
+class MappedPortfolio:
+    """A columnar portfolio file, memory-mapped read-only.
+
+    ``check_source=False`` skips the comparison with the source CSV.
+    """
+
+    def __init__(self, path: str, check_source: bool = True):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.table = None
+            self.header = self._read_footer()
+            if check_source:
+                self._check_source()
+            self.table = self._map_table()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_footer(self) -> Dict:
+        data = self._map
+        tail = len(MAGIC) + _FOOTER_LENGTH.size
+        if len(data) < len(MAGIC) + tail or data[:len(MAGIC)] != MAGIC or data[-len(MAGIC):] != MAGIC:
+            raise ColumnarFormatError(f"{self.path} is not a columnar portfolio")
+        (length,) = _FOOTER_LENGTH.unpack_from(data, len(data) - tail)
+        header = json.loads(data[len(data) - tail - length:len(data) - tail])
+        if header.get("version") != FORMAT_VERSION:
+            raise ColumnarFormatError(f"Unsupported columnar format version: {header.get('version')}")
+        if header["byteorder"] != sys.byteorder:
+            raise ColumnarFormatError(f"{self.path} was written on a {header['byteorder']}-endian machine")
+        return header
+
+    def _check_source(self) -> None:
+        source = self.header.get("source", {})
+        if not source.get("path"):
+            return
+        csv_path = self.path.parent / source["path"]
+        try:
+            st = os.stat(csv_path)
+        except FileNotFoundError:
+            # Converted files may be used without their CSV.
+            return
+        if (st.st_size, st.st_mtime_ns) != (source["size"], source["mtime_ns"]):
+            raise StaleColumnarError(f"{csv_path} changed after {self.path} was converted; convert it again")
+
+    def _map_table(self) -> TenantTable:
+        view = memoryview(self._map)
+        rows = self.header["rows"]
+        columns = {}
+        for name, typecode in COLUMNS:
+            spec = self.header["columns"][name]
+            if spec["type"] != typecode:
+                raise ColumnarFormatError(f"Column {name} has type {spec['type']}, expected {typecode}")
+            start = spec["offset"]
+            columns[name] = view[start:start + rows * array(typecode).itemsize].cast(typecode)
+        ids = self.header["ids"]
+        return TenantTable.from_buffers(
+            view[ids["offset"]:ids["offset"] + ids["length"]],
+            columns["tenant_end"],
+            self.header["dates"],
+            columns["due_code"],
+            columns["due_day"],
+            columns["late_count_window"],
+            columns["days_since_eligible_filing"],
+            columns["portfolio_late_rate_milli"],
+        )
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Same shape as ``engine.ingest.portfolio_stats``."""
+        return {key: self.header[key] for key in ("rows", "late", "portfolio_late_rate_milli")}
+
+    def __len__(self) -> int:
+        return self.header["rows"]
+
+    def tables(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TenantTable]:
+        """Zero-copy ``TenantTable`` chunks, like ``iter_portfolio_tables``."""
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        for start in range(0, len(self), chunk_size):
+            yield self.table.slice(start, start + chunk_size)
+
+    def close(self) -> None:
+        self.table = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Chunks handed out are still alive; the mapping goes with them.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a CSV portfolio to the columnar format")
+    parser.add_argument("file", help="CSV portfolio")
+    parser.add_argument("-o", "--output", help=f"Output path (default: <file>{COLUMNAR_SUFFIX})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per converted chunk")
+    args = parser.parse_args(argv)
+
+    out = convert(args.file, args.output, chunk_size=args.chunk_size)
+    print(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
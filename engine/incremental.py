@@ -0,0 +1,122 @@
+"""Incremental portfolio re-evaluation driven by per-tenant transition dates.
+
+An unchanged record's outcome can only flip on ``transition_date``, the day
+its ``days_late`` passes ``X_DAYS_LATE``; its receipt does not depend on the
+run date otherwise. ``TransitionIndex`` keeps, per tenant, a fingerprint of
+the last evaluated row, the RuleSet digest and the next transition date in a
+SQLite table indexed by that date, which serves as the priority queue of
+upcoming transitions.
+
+A run re-evaluates a record only if it is new, its row or the rules changed,
+or its transition date has arrived. Everything else is skipped, so emission
+work scales with the number of changes. The input still has to be read to
+detect changed rows. Updates are staged and written by ``commit``, which
+callers run after the emitted receipts are flushed, so a crashed run is
+re-done in full on the next one.
+"""
+
+import hashlib
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from engine.receipt import canonical_json
+from engine.rentguard import transition_date
+from engine.rules import rules_for
+
+_LOOKUP_BATCH = 500
+
+
+def row_fingerprint(record: Mapping) -> str:
+    return hashlib.blake2b(canonical_json(dict(record)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TransitionIndex:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tenants (
+                tenant_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                rules TEXT NOT NULL,
+                next_ordinal INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS tenants_next ON tenants (next_ordinal);
+            """
+        )
+        self._pending: List[Tuple[str, str, str, Optional[int]]] = []
+        self.selected = 0
+        self.skipped = 0
+
+    def _lookup(self, tenant_ids: List[str]) -> Dict[str, Tuple[str, str, Optional[int]]]:
+        found = {}
+        for start in range(0, len(tenant_ids), _LOOKUP_BATCH):
+            batch = tenant_ids[start:start + _LOOKUP_BATCH]
+            rows = self._db.execute(
+                "SELECT tenant_id, fingerprint, rules, next_ordinal FROM tenants "
+                f"WHERE tenant_id IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for tenant_id, fingerprint, rules, next_ordinal in rows:
+                found[tenant_id] = (fingerprint, rules, next_ordinal)
+        return found
+
+    def select(self, records: Iterable[Mapping], thresholds: Optional[Mapping[str, int]], as_of: date) -> List[Mapping]:
+        """Return the records that must be re-evaluated on ``as_of``.
+
+        Their new state is staged for ``commit``.
+        """
+        rules = rules_for(thresholds)
+        records = list(records)
+        stored = self._lookup([record["tenant_id"] for record in records])
+        today = as_of.toordinal()
+
+        due = []
+        for record in records:
+            fingerprint = row_fingerprint(record)
+            previous = stored.get(record["tenant_id"])
+            if previous is not None and previous[:2] == (fingerprint, rules.digest):
+                next_ordinal = previous[2]
+                if next_ordinal is None or next_ordinal > today:
+                    self.skipped += 1
+                    continue
+            transition = transition_date(record, rules)
+            next_ordinal = transition.toordinal() if transition is not None and transition > as_of else None
+            self._pending.append((record["tenant_id"], fingerprint, rules.digest, next_ordinal))
+            due.append(record)
+        self.selected += len(due)
+        return due
+
+    def commit(self) -> None:
+        if self._pending:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO tenants (tenant_id, fingerprint, rules, next_ordinal) VALUES (?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+
+    def due(self, as_of: date) -> List[str]:
+        """Tenants whose transition date has arrived, earliest first."""
+        rows = self._db.execute(
+            "SELECT tenant_id FROM tenants WHERE next_ordinal <= ? ORDER BY next_ordinal, tenant_id",
+            (as_of.toordinal(),),
+        )
+        return [tenant_id for (tenant_id,) in rows]
+
+    def next_transition(self) -> Optional[date]:
+        row = self._db.execute("SELECT MIN(next_ordinal) FROM tenants").fetchone()
+        return date.fromordinal(row[0]) if row and row[0] is not None else None
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,4 +1,32 @@
 import csv
+import json
+import os
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from engine import metrics
+
+DEFAULT_CHUNK_SIZE = 10_000
+SIDECAR_SUFFIX = ".stats.json"
+DATE_MEMO_SIZE = 4096
+
+EPOCH = date(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+def epoch_day_of(value: date) -> int:
+    return value.toordinal() - _EPOCH_ORDINAL
+
+@lru_cache(maxsize=DATE_MEMO_SIZE)
+def epoch_day(value: str) -> int:
+    """Days since 1970-01-01 for an ISO date string, parsed once per distinct value."""
+    return epoch_day_of(datetime.fromisoformat(value).date())
+
+def epoch_day_column(values: Iterable[str]) -> array:
+    """Integer epoch-day column for a column of ISO date strings."""
+    return array("l", map(epoch_day, values))
 
 def ratio_to_milli(numer: int, denom: int) -> int:
     if denom <= 0:
@@ -8,23 +36,119 @@ def ratio_to_milli(numer: int, denom: int) -> int:
         q += 1
     return int(q)
 
+def _is_late(value) -> bool:
+    return (value or "").lower() == "true"
+
+def _to_record(row: Dict[str, str], portfolio_late_rate_milli: int) -> Dict[str, object]:
+    return {
+        "tenant_id": row["tenant_id"],
+        "due_date": row["due_date"],
+        "late_count_window": int(row["late_count_window"]),
+        "days_since_eligible_filing": int(row["days_since_eligible_filing"]),
+        "portfolio_late_rate_milli": portfolio_late_rate_milli,
+    }
+
 def load_portfolio(csv_path: str):
-    records = []
     with open(csv_path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         rows = list(reader)
 
     total = len(rows)
-    late = sum(1 for r in rows if (r.get("is_late", "") or "").lower() == "true")
+    late = sum(1 for r in rows if _is_late(r.get("is_late", "")))
     portfolio_late_rate_milli = ratio_to_milli(late, total)
 
-    for r in rows:
-        records.append({
-            "tenant_id": r["tenant_id"],
-            "due_date": r["due_date"],
-            "late_count_window": int(r["late_count_window"]),
-            "days_since_eligible_filing": int(r["days_since_eligible_filing"]),
-            "portfolio_late_rate_milli": portfolio_late_rate_milli,
-        })
+    return [_to_record(r, portfolio_late_rate_milli) for r in rows]
+
+@metrics.timed("ingest_parse")
+def scan_portfolio(csv_path: str) -> Dict[str, int]:
+    """Count rows and late rows without materializing records.
+
+    Only the ``is_late`` column is inspected, so memory stays constant no
+    matter how large the portfolio is. Blank lines are skipped the same way
+    ``csv.DictReader`` skips them.
+    """
+    total = 0
+    late = 0
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        idx = header.index("is_late") if "is_late" in header else None
+        for row in reader:
+            if not row:
+                continue
+            total += 1
+            if idx is not None and idx < len(row) and _is_late(row[idx]):
+                late += 1
+    return {
+        "rows": total,
+        "late": late,
+        "portfolio_late_rate_milli": ratio_to_milli(late, total),
+    }
 
-    return records
+def _sidecar_path(csv_path: str) -> Path:
+    return Path(f"{csv_path}{SIDECAR_SUFFIX}")
+
+def _source_fingerprint(csv_path: str) -> Dict[str, int]:
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def portfolio_stats(csv_path: str, sidecar: bool = False) -> Dict[str, int]:
+    """Return ``{"rows", "late", "portfolio_late_rate_milli"}`` for a portfolio.
+
+    With ``sidecar=True`` the stats are persisted next to the CSV as
+    ``<csv>.stats.json`` and reused while the CSV size and mtime are unchanged,
+    which skips the counting pre-pass on repeated runs.
+    """
+    if not sidecar:
+        return scan_portfolio(csv_path)
+
+    path = _sidecar_path(csv_path)
+    fingerprint = _source_fingerprint(csv_path)
+    try:
+        cached = json.loads(path.read_text(encoding="utf-8"))
+        if cached.get("source") == fingerprint:
+            return cached["stats"]
+    except (FileNotFoundError, ValueError, KeyError, AttributeError):
+        pass
+
+    stats = scan_portfolio(csv_path)
+    path.write_text(
+        json.dumps({"source": fingerprint, "stats": stats}, sort_keys=True, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    return stats
+
+def iter_portfolio(
+    csv_path: str,
+    portfolio_late_rate_milli: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sidecar: bool = False,
+) -> Iterator[List[Dict[str, object]]]:
+    """Yield portfolio records in chunks of at most ``chunk_size``.
+
+    Produces the same records as ``load_portfolio`` but holds only one chunk
+    in memory, so evaluation can start before the file is fully parsed. The
+    portfolio late rate comes from ``portfolio_stats`` unless supplied.
+    """
+    return metrics.timed_iter("ingest_parse", _iter_portfolio(csv_path, portfolio_late_rate_milli, chunk_size, sidecar))
+
+def _iter_portfolio(
+    csv_path: str,
+    portfolio_late_rate_milli: Optional[int],
+    chunk_size: int,
+    sidecar: bool,
+) -> Iterator[List[Dict[str, object]]]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if portfolio_late_rate_milli is None:
+        portfolio_late_rate_milli = portfolio_stats(csv_path, sidecar=sidecar)["portfolio_late_rate_milli"]
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        chunk: List[Dict[str, object]] = []
+        for row in csv.DictReader(f):
+            chunk.append(_to_record(row, portfolio_late_rate_milli))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
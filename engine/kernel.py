@@ -0,0 +1,17 @@
+"""Load SysDNA kernels from ``kernels/`` as compiled, executable rule sets."""
+
+import json
+from pathlib import Path
+
+from compiler.compiler import CompiledKernel, build_kernel, compile_kernel, validate_sysdna
+
+KERNEL_ROOT = Path(__file__).resolve().parents[1] / "kernels"
+
+
+def load_kernel(name: str, version: str = "1.0", root: Path = KERNEL_ROOT) -> CompiledKernel:
+    """Compile ``kernels/<name>/sysdna_v<version>.json``; cached by kernel hash."""
+    path = Path(root) / name / f"sysdna_v{version}.json"
+    with path.open("r", encoding="utf-8") as handle:
+        sysdna = json.load(handle)
+    validate_sysdna(sysdna)
+    return compile_kernel(build_kernel(sysdna))
@@ -0,0 +1,361 @@
+"""Append-only segmented residue ledger.
+
+Receipt envelopes are appended to ``segment-<n>.seg`` files as length-prefixed
+canonical JSON records (4-byte big-endian length followed by UTF-8 bytes).
+A segment is rolled once it would grow past ``segment_bytes``. An on-disk
+SQLite index maps ``decision_id`` and ``tenant_id`` to ``(segment, offset)``,
+so point lookups and tenant histories never scan the directory. Segments are
+read through ``mmap``.
+
+Segments are written before the index is committed. On open, any complete
+records past the last indexed offset of the newest segment are re-indexed and
+a torn trailing record is truncated, so a crash between the two steps leaves
+a consistent ledger.
+
+Several processes may append to one ledger. Every append takes an exclusive
+``flock`` on ``ledger.lock``, follows segments rolled by other writers, and
+takes its offset from the segment's actual size. Index rows are unique per
+``(segment, offset)``, so records indexed by both their writer and a
+recovering process are stored once. Without ``fcntl`` a ledger must have a
+single writer process.
+"""
+
+import json
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from engine.sink import ArtifactSink
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".seg"
+INDEX_NAME = "index.sqlite"
+LOCK_NAME = "ledger.lock"
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_EVERY = 1000
+
+_LEN = struct.Struct(">I")
+_INSERT = "INSERT OR IGNORE INTO records (decision_id, tenant_id, segment, offset, length) VALUES (?, ?, ?, ?, ?)"
+_SEGMENT_RE = re.compile(rf"^{re.escape(SEGMENT_PREFIX)}(\d+){re.escape(SEGMENT_SUFFIX)}$")
+
+
+class LedgerError(RuntimeError):
+    """Raised when a ledger record cannot be read back."""
+
+
+class Ledger:
+    def __init__(
+        self,
+        root: Path,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        fsync: bool = True,
+    ):
+        if segment_bytes <= _LEN.size:
+            raise ValueError("segment_bytes is too small")
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(str(self.root / INDEX_NAME), check_same_thread=False, timeout=30)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                decision_id TEXT NOT NULL,
+                tenant_id TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_decision ON records (decision_id);
+            CREATE INDEX IF NOT EXISTS records_tenant ON records (tenant_id);
+            CREATE UNIQUE INDEX IF NOT EXISTS records_position ON records (segment, offset);
+            """
+        )
+        self._pending: List[Tuple[str, str, int, int, int]] = []
+        self._lock = threading.RLock()
+        self._lock_file = open(self.root / LOCK_NAME, "ab")
+        self._lock_depth = 0
+        self._maps: Dict[int, Tuple[mmap.mmap, int]] = {}
+
+        with self._exclusive():
+            segments = self.segments()
+            self._segment = segments[-1] if segments else 1
+            self._recover()
+            self._handle = self._open_segment()
+
+    # -- layout ----------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self):
+        # Unbuffered: each record reaches the file in one write, under the lock.
+        return open(self._segment_path(self._segment), "ab", buffering=0)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the thread lock and, across processes, the ledger's ``flock``."""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def segments(self) -> List[int]:
+        found = []
+        for path in self.root.iterdir():
+            match = _SEGMENT_RE.match(path.name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    # -- writes ----------------------------------------------------------
+
+    def append(self, data: str, decision_id: str, tenant_id: str) -> Tuple[int, int]:
+        with self._exclusive():
+            return self._append(data.encode("utf-8"), decision_id, tenant_id)
+
+    def append_once(self, data: str, decision_id: str, tenant_id: str) -> bool:
+        """Append unless ``decision_id`` is already stored; returns whether it was.
+
+        The check and the indexed append happen under the ledger lock, so this
+        holds across processes.
+        """
+        with self._exclusive():
+            if self.locate(decision_id) is not None:
+                return False
+            self._append(data.encode("utf-8"), decision_id, tenant_id)
+            self.flush()
+            return True
+
+    def _append(self, body: bytes, decision_id: str, tenant_id: str) -> Tuple[int, int]:
+        self._follow()
+        record_len = _LEN.size + len(body)
+        offset = os.fstat(self._handle.fileno()).st_size
+        if offset and offset + record_len > self.segment_bytes:
+            self._roll()
+            offset = 0
+
+        self._handle.write(_LEN.pack(len(body)) + body)
+        self._pending.append((decision_id, tenant_id, self._segment, offset, len(body)))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return self._segment, offset
+
+    def _follow(self) -> None:
+        """Move to the newest segment if other writers have rolled past ours."""
+        if not self._segment_path(self._segment + 1).exists():
+            return
+        self.flush()
+        self._handle.close()
+        while self._segment_path(self._segment + 1).exists():
+            self._segment += 1
+        self._handle = self._open_segment()
+
+    def _roll(self) -> None:
+        self.flush()
+        self._handle.close()
+        self._segment += 1
+        self._handle = self._open_segment()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.fsync:
+                os.fsync(self._handle.fileno())
+            if self._pending:
+                with self._db:
+                    self._db.executemany(
+                        _INSERT,
+                        self._pending,
+                    )
+                self._pending = []
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._handle.close()
+            for mapped, _ in self._maps.values():
+                mapped.close()
+            self._maps = {}
+            self._db.close()
+            self._lock_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -- reads -----------------------------------------------------------
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        cached = self._maps.get(segment)
+        if cached and cached[1] >= end:
+            return cached[0]
+        if cached:
+            cached[0].close()
+        with open(self._segment_path(segment), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < end:
+                raise LedgerError(f"Segment {segment} is shorter than its index")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = (mapped, size)
+        return mapped
+
+    def read_bytes(self, segment: int, offset: int) -> bytes:
+        """Raw canonical envelope bytes of the record at ``(segment, offset)``."""
+        with self._lock:
+            mapped = self._map(segment, offset + _LEN.size)
+            (length,) = _LEN.unpack_from(mapped, offset)
+            start = offset + _LEN.size
+            if start + length > len(mapped):
+                mapped = self._map(segment, start + length)
+            return mapped[start:start + length]
+
+    def read(self, segment: int, offset: int) -> Dict[str, Any]:
+        return json.loads(self.read_bytes(segment, offset).decode("utf-8"))
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            if self._pending:
+                self.flush()
+            return self._db.execute(sql, params).fetchall()
+
+    def locate(self, decision_id: str) -> Optional[Tuple[int, int]]:
+        rows = self._query(
+            "SELECT segment, offset FROM records WHERE decision_id = ? ORDER BY rowid LIMIT 1",
+            (decision_id,),
+        )
+        return tuple(rows[0]) if rows else None
+
+    def get(self, decision_id: str) -> Optional[Dict[str, Any]]:
+        location = self.locate(decision_id)
+        return self.read(*location) if location else None
+
+    def tenant_entries(self, tenant_id: str) -> List[Tuple[str, int, int]]:
+        """``(decision_id, segment, offset)`` for a tenant's records in append order."""
+        return self._query(
+            "SELECT decision_id, segment, offset FROM records WHERE tenant_id = ? ORDER BY segment, offset",
+            (tenant_id,),
+        )
+
+    def tenant_history(self, tenant_id: str) -> List[Dict[str, Any]]:
+        return [self.read(segment, offset) for _, segment, offset in self.tenant_entries(tenant_id)]
+
+    def scan(self) -> Iterator[Dict[str, Any]]:
+        """Yield every envelope in append order."""
+        for segment in self.segments():
+            for offset, body in _iter_records(self._segment_path(segment)):
+                yield json.loads(body.decode("utf-8"))
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM records", ())[0][0]
+
+    # -- recovery --------------------------------------------------------
+
+    def _recover(self) -> None:
+        path = self._segment_path(self._segment)
+        if not path.exists():
+            return
+        row = self._db.execute(
+            "SELECT offset, length FROM records WHERE segment = ? ORDER BY offset DESC LIMIT 1",
+            (self._segment,),
+        ).fetchone()
+        indexed_end = row[0] + _LEN.size + row[1] if row else 0
+
+        rows = []
+        good_end = indexed_end
+        for offset, body in _iter_records(path, start=indexed_end):
+            payload = json.loads(body.decode("utf-8")).get("payload", {})
+            rows.append((
+                payload.get("decision_id", ""),
+                payload.get("outputs", {}).get("tenant_id", ""),
+                self._segment,
+                offset,
+                len(body),
+            ))
+            good_end = offset + _LEN.size + len(body)
+        if rows:
+            with self._db:
+                self._db.executemany(
+                    _INSERT,
+                    rows,
+                )
+        if path.stat().st_size > good_end:
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+
+
+def _iter_records(path: Path, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, body)`` for complete records, stopping at a torn tail."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= start:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            offset = start
+            while offset + _LEN.size <= size:
+                (length,) = _LEN.unpack_from(mapped, offset)
+                end = offset + _LEN.size + length
+                if end > size:
+                    return
+                yield offset, bytes(mapped[offset + _LEN.size:end])
+                offset = end
+
+
+def iter_segment_bodies(root: Path) -> Iterator[bytes]:
+    """Yield every record body of a ledger directory in append order, read-only."""
+    root = Path(root)
+    segments = sorted(
+        (int(m.group(1)), path)
+        for path in root.iterdir()
+        for m in [_SEGMENT_RE.match(path.name)]
+        if m
+    )
+    for _, path in segments:
+        for _, body in _iter_records(path):
+            yield body
+
+
+class LedgerSink(ArtifactSink):
+    """Artifact sink that appends envelopes to a ``Ledger``."""
+
+    def __init__(self, ledger: Ledger, progress=None):
+        self.ledger = ledger
+        self.progress = progress
+        self.written = 0
+
+    def write(self, name: str, data: str, payload: Optional[Dict[str, Any]] = None) -> None:
+        if payload is None:
+            payload = json.loads(data)["payload"]
+        tenant_id = payload.get("outputs", {}).get("tenant_id", "")
+        self.ledger.append(data, payload["decision_id"], tenant_id)
+        self.written += 1
+
+    def flush(self) -> None:
+        self.ledger.flush()
+        if self.progress:
+            self.progress(f"Artifacts written: {self.written} (ledger {self.ledger.root})")
+
+    def close(self) -> None:
+        self.flush()
+        self.ledger.close()
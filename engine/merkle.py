@@ -0,0 +1,291 @@
+"""Hash-chained, Merkle-rooted residue.
+
+Every emitted receipt becomes a leaf ``H(0x00 || decision_id)`` of an
+append-only Merkle tree per epoch (one UTC day), hashed as in RFC 6962 with
+interior nodes ``H(0x01 || left || right)``. Leaves are also folded into a
+running chain head ``H(head || leaf)`` that continues across epochs, so
+dropping or reordering any receipt changes every later head.
+
+Each epoch directory holds ``level-<k>.bin`` files with the 32-byte hashes of
+every complete, aligned subtree of size ``2**k``, plus ``frontier.json`` with
+the tree size, root and chain head. Levels are append-only, so the root and an
+inclusion proof are assembled from O(log n) stored nodes, and
+``verify_inclusion`` checks a single receipt against a root in O(log n)
+without reading any other artifact.
+
+The tree is a sidecar: envelopes and decision IDs are unchanged.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from engine.sink import ArtifactSink
+
+HASH_BYTES = 32
+ZERO_HEAD = bytes(HASH_BYTES)
+FRONTIER_NAME = "frontier.json"
+
+
+def leaf_hash(decision_id: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(decision_id)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def chain_hash(head: bytes, leaf: bytes) -> bytes:
+    return hashlib.sha256(head + leaf).digest()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than ``n`` (n > 1)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+class MerkleLog:
+    """Incremental Merkle tree for one epoch, persisted level by level.
+
+    With ``directory=None`` the tree lives in memory only.
+    """
+
+    def __init__(self, directory: Optional[Path], chain_head: bytes = ZERO_HEAD):
+        self.directory = Path(directory) if directory is not None else None
+        self.size = 0
+        self.chain_head = chain_head
+        self._pending: Dict[int, List[bytes]] = {}
+        self._tail: Dict[int, bytes] = {}
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        frontier = self.directory / FRONTIER_NAME
+        if frontier.exists():
+            state = json.loads(frontier.read_text(encoding="utf-8"))
+            self.size = state["size"]
+            self.chain_head = bytes.fromhex(state["chain_head"])
+        self._truncate_levels()
+
+    def _level_path(self, level: int) -> Path:
+        return self.directory / f"level-{level:02d}.bin"
+
+    def _truncate_levels(self) -> None:
+        # Drop nodes written after the last persisted frontier.
+        level = 0
+        while True:
+            path = self._level_path(level)
+            if not path.exists():
+                break
+            expected = (self.size >> level) * HASH_BYTES
+            if path.stat().st_size > expected:
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+            level += 1
+        for level in range(self.size.bit_length()):
+            count = self.size >> level
+            if count & 1:
+                self._tail[level] = self._node(level, count - 1)
+
+    # -- writes ----------------------------------------------------------
+
+    def append(self, leaf: bytes) -> int:
+        index = self.size
+        self.chain_head = chain_hash(self.chain_head, leaf)
+        node, level, count = leaf, 0, index + 1
+        while True:
+            self._pending.setdefault(level, []).append(node)
+            if count & 1:
+                self._tail[level] = node
+                break
+            node = node_hash(self._tail.pop(level), node)
+            level += 1
+            count >>= 1
+        self.size += 1
+        return index
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        for level, nodes in sorted(self._pending.items()):
+            with open(self._level_path(level), "ab") as f:
+                f.write(b"".join(nodes))
+                f.flush()
+                os.fsync(f.fileno())
+        self._pending = {}
+        state = {"size": self.size, "root": self.root().hex(), "chain_head": self.chain_head.hex()}
+        tmp = self.directory / f"{FRONTIER_NAME}.tmp"
+        tmp.write_text(json.dumps(state, sort_keys=True, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.directory / FRONTIER_NAME)
+
+    # -- reads -----------------------------------------------------------
+
+    def _node(self, level: int, index: int) -> bytes:
+        persisted = (self.size >> level) - len(self._pending.get(level, ()))
+        if index >= persisted:
+            return self._pending[level][index - persisted]
+        with open(self._level_path(level), "rb") as f:
+            f.seek(index * HASH_BYTES)
+            return f.read(HASH_BYTES)
+
+    def _subtree(self, lo: int, hi: int) -> bytes:
+        n = hi - lo
+        if n & (n - 1) == 0 and lo % n == 0:
+            return self._node(n.bit_length() - 1, lo // n)
+        k = _split(n)
+        return node_hash(self._subtree(lo, lo + k), self._subtree(lo + k, hi))
+
+    def leaf(self, index: int) -> bytes:
+        return self._node(0, index)
+
+    def root(self, size: Optional[int] = None) -> bytes:
+        size = self.size if size is None else size
+        if size == 0:
+            return hashlib.sha256(b"").digest()
+        return self._subtree(0, size)
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        size = self.size if size is None else size
+        if not 0 <= index < size <= self.size:
+            raise IndexError("leaf index outside tree")
+        proof: List[bytes] = []
+        lo, hi = 0, size
+        while hi - lo > 1:
+            k = _split(hi - lo)
+            if index < lo + k:
+                proof.append(self._subtree(lo + k, hi))
+                hi = lo + k
+            else:
+                proof.append(self._subtree(lo, lo + k))
+                lo = lo + k
+        proof.reverse()
+        return proof
+
+    def index_of(self, decision_id: str) -> Optional[int]:
+        """Position of a receipt's leaf, found by scanning the leaf level once."""
+        self.flush()
+        target = leaf_hash(decision_id)
+        if self.directory is None:
+            leaves = b"".join(self._pending.get(0, ()))
+        else:
+            leaves = self._level_path(0).read_bytes() if self.size else b""
+        for i in range(self.size):
+            if leaves[i * HASH_BYTES:(i + 1) * HASH_BYTES] == target:
+                return i
+        return None
+
+
+def verify_inclusion(leaf: bytes, index: int, size: int, proof: List[bytes], root: bytes) -> bool:
+    """RFC 9162 section 2.1.3.2 inclusion check."""
+    if index >= size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for p in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+def utc_epoch() -> str:
+    return datetime.datetime.utcnow().date().isoformat()
+
+
+class ChainedSink(ArtifactSink):
+    """Wrap a sink and add every receipt to the chain and its epoch tree."""
+
+    def __init__(self, inner: ArtifactSink, root: Path, clock: Callable[[], str] = utc_epoch):
+        self.inner = inner
+        self.root = Path(root)
+        self.clock = clock
+        self.epoch: Optional[str] = None
+        self.log: Optional[MerkleLog] = None
+
+    def _log_for(self, epoch: str) -> MerkleLog:
+        if self.log is not None and self.epoch == epoch:
+            return self.log
+        head = ZERO_HEAD
+        if self.log is not None:
+            self.log.flush()
+            head = self.log.chain_head
+        else:
+            previous = [p for p in epochs(self.root) if p < epoch]
+            if previous:
+                head = MerkleLog(self.root / previous[-1]).chain_head
+        self.epoch = epoch
+        self.log = MerkleLog(self.root / epoch, chain_head=head)
+        return self.log
+
+    def write(self, name: str, data: str, payload: Optional[Dict] = None) -> None:
+        if payload is None:
+            payload = json.loads(data)["payload"]
+        self.inner.write(name, data, payload=payload)
+        self._log_for(self.clock()).append(leaf_hash(payload["decision_id"]))
+
+    def flush(self) -> None:
+        self.inner.flush()
+        if self.log is not None:
+            self.log.flush()
+
+    def close(self) -> None:
+        if self.log is not None:
+            self.log.flush()
+        self.inner.close()
+
+
+def epochs(root: Path) -> List[str]:
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if (p / FRONTIER_NAME).exists())
+
+
+def prove(root: Path, epoch: str, decision_id: str, index: Optional[int] = None) -> Dict[str, object]:
+    """Build a self-contained inclusion proof for a receipt in ``epoch``."""
+    log = MerkleLog(Path(root) / epoch)
+    if index is None:
+        index = log.index_of(decision_id)
+        if index is None:
+            raise KeyError(decision_id)
+    return {
+        "epoch": epoch,
+        "decision_id": decision_id,
+        "leaf_index": index,
+        "tree_size": log.size,
+        "root": log.root().hex(),
+        "proof": [p.hex() for p in log.inclusion_proof(index)],
+    }
+
+
+def verify_proof(proof: Dict[str, object], decision_id: Optional[str] = None) -> bool:
+    did = decision_id or proof["decision_id"]
+    return verify_inclusion(
+        leaf_hash(did),
+        int(proof["leaf_index"]),
+        int(proof["tree_size"]),
+        [bytes.fromhex(p) for p in proof["proof"]],
+        bytes.fromhex(proof["root"]),
+    )
+
+
+def audit_epoch(root: Path, epoch: str, decision_ids: List[str]) -> bool:
+    """Full recomputation: do ``decision_ids``, in order, produce the epoch root?"""
+    log = MerkleLog(Path(root) / epoch)
+    if len(decision_ids) != log.size:
+        return False
+    rebuilt = MerkleLog(None)
+    for did in decision_ids:
+        rebuilt.append(leaf_hash(did))
+    return rebuilt.root() == log.root()
@@ -0,0 +1,173 @@
+"""Process-wide stage timers and counters.
+
+Recording is off until ``enable()`` is called. Per-record code checks
+``metrics.ENABLED`` before reading the clock, so a disabled run pays one
+attribute load per site. Coarser sites use ``timer``, which returns a shared
+no-op context manager while disabled, or the ``timed`` decorator.
+
+``render_prometheus`` formats everything in the Prometheus text exposition
+format for the services' metrics endpoints; ``format_profile`` is the table
+printed by ``run.py --profile``. Numbers cover the current process only;
+work done in pool workers is not included.
+"""
+
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+STAGES = (
+    "ingest_parse",
+    "date_math",
+    "rule_walk",
+    "canonical_serialization",
+    "sha256",
+    "artifact_write",
+    "zip_build",
+    "pdf_render",
+    "signature_decode",
+)
+NAMESPACE = "rentguard"
+
+ENABLED = False
+
+_lock = threading.Lock()
+_stages: Dict[str, List[float]] = {}
+_counters: Dict[str, int] = {}
+_NULL = nullcontext()
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = on
+
+
+def reset() -> None:
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def observe(stage: str, seconds: float, calls: int = 1) -> None:
+    with _lock:
+        slot = _stages.get(stage)
+        if slot is None:
+            slot = _stages[stage] = [0, 0.0]
+        slot[0] += calls
+        slot[1] += seconds
+
+
+def count(name: str, n: int = 1) -> None:
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, perf_counter() - self.started)
+
+
+def timer(stage: str):
+    return _Timer(stage) if ENABLED else _NULL
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of ``timer``."""
+    def decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(stage, perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def timed_iter(stage: str, iterable: Iterable) -> Iterator:
+    """Charge the time spent producing each item of ``iterable`` to ``stage``."""
+    if not ENABLED:
+        return iter(iterable)
+    return _timed_iter(stage, iter(iterable))
+
+
+def _timed_iter(stage: str, iterator: Iterator) -> Iterator:
+    while True:
+        started = perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            observe(stage, perf_counter() - started)
+        yield item
+
+
+def snapshot() -> Dict[str, Dict]:
+    with _lock:
+        return {
+            "stages": {stage: {"calls": int(calls), "seconds": seconds} for stage, (calls, seconds) in _stages.items()},
+            "counters": dict(_counters),
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(
+    gauges: Optional[Mapping[str, float]] = None,
+    counters: Optional[Mapping[str, int]] = None,
+) -> str:
+    """Prometheus text format.
+
+    ``gauges`` adds point-in-time values and ``counters`` adds monotonic
+    counts kept outside this module, exported with a ``_total`` suffix.
+    """
+    data = snapshot()
+    totals = dict(data["counters"])
+    for name, value in (counters or {}).items():
+        totals[name] = totals.get(name, 0) + value
+    stages = data["stages"]
+    lines = [
+        f"# HELP {NAMESPACE}_stage_seconds_total Wall time spent per stage.",
+        f"# TYPE {NAMESPACE}_stage_seconds_total counter",
+    ]
+    lines += [f'{NAMESPACE}_stage_seconds_total{{stage="{_escape(s)}"}} {v["seconds"]:.9f}' for s, v in sorted(stages.items())]
+    lines += [
+        f"# HELP {NAMESPACE}_stage_calls_total Timed calls per stage.",
+        f"# TYPE {NAMESPACE}_stage_calls_total counter",
+    ]
+    lines += [f'{NAMESPACE}_stage_calls_total{{stage="{_escape(s)}"}} {v["calls"]}' for s, v in sorted(stages.items())]
+    for name, value in sorted(totals.items()):
+        lines += [f"# TYPE {NAMESPACE}_{name}_total counter", f"{NAMESPACE}_{name}_total {value}"]
+    for name, value in sorted((gauges or {}).items()):
+        lines += [f"# TYPE {NAMESPACE}_{name} gauge", f"{NAMESPACE}_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def format_profile() -> str:
+    data = snapshot()
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    rows = sorted(data["stages"].items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+    lines = [f"{'stage':<24} {'calls':>10} {'total ms':>12} {'mean us':>10}"]
+    for stage, value in rows:
+        calls, seconds = value["calls"], value["seconds"]
+        lines.append(f"{stage:<24} {calls:>10} {seconds * 1e3:>12.1f} {seconds * 1e6 / max(calls, 1):>10.1f}")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<24} {value:>10}")
+    return "\n".join(lines)
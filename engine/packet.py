@@ -0,0 +1,234 @@
+"""Judge Packet assembly and the content-addressed packet cache.
+
+A server-assembled packet is a ZIP of a tenant's stored receipt envelopes,
+byte for byte, followed by ``manifest.json``. Entries use a fixed timestamp,
+so a packet is fully determined by its decision IDs and
+``PACKET_FORMAT_VERSION``. That pair is the cache key.
+
+``PacketCache`` keeps finished packets in a memory tier and an optional disk
+tier. Each tier is bounded by total bytes and evicts least recently used
+packets first.
+"""
+
+import hashlib
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from engine.receipt import canonical_json
+
+PACKET_FORMAT_VERSION = "1"
+PACKET_ENTRY_TIME = (1980, 1, 1, 0, 0, 0)
+PACKET_SUFFIX = ".zip"
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+READ_CHUNK = 64 * 1024
+
+Entry = Tuple[str, int, int]
+
+
+def packet_key(decision_ids: Iterable[str]) -> str:
+    return hashlib.sha256(
+        canonical_json({"format": PACKET_FORMAT_VERSION, "decision_ids": sorted(decision_ids)}).encode("utf-8")
+    ).hexdigest()
+
+
+class _PacketStream:
+    """Write-only file object for ``zipfile``; bytes are drained per entry.
+
+    Having no ``seek``/``tell``, it makes ``ZipFile`` emit data descriptors
+    instead of rewriting local headers, so finished entries can be sent.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _packet_entry(zipf: zipfile.ZipFile, name: str, data: bytes) -> None:
+    info = zipfile.ZipInfo(name, date_time=PACKET_ENTRY_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    zipf.writestr(info, data)
+
+
+def iter_tenant_packet(store, tenant_id: str, entries: List[Entry]) -> Iterator[bytes]:
+    """Yield the ZIP for ``tenant_id``'s stored receipts one entry at a time.
+
+    ``store`` is an ``engine.ledger.Ledger`` and ``entries`` come from its
+    ``tenant_entries``.
+    """
+    stream = _PacketStream()
+    with zipfile.ZipFile(stream, mode="w") as zipf:
+        for decision_id, segment, offset in entries:
+            _packet_entry(zipf, f"{tenant_id}_{decision_id[:12]}.json", store.read_bytes(segment, offset))
+            yield stream.drain()
+        manifest = {"tenant_id": tenant_id, "decision_ids": [did for did, _, _ in entries]}
+        _packet_entry(zipf, "manifest.json", canonical_json(manifest).encode("utf-8"))
+    yield stream.drain()
+
+
+def _iter_file(handle) -> Iterator[bytes]:
+    with handle:
+        while True:
+            chunk = handle.read(READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+class PacketCache:
+    """Two-tier, size-bounded LRU cache of finished packets.
+
+    The memory tier holds packet bytes up to ``memory_bytes`` in total. The
+    disk tier, enabled by passing ``directory``, holds ``<key>.zip`` files up
+    to ``disk_bytes``. Disk files are written atomically and their mtime
+    serves as the recency mark, so the tier survives restarts. Packets larger
+    than a tier's budget are not stored in that tier.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        disk_bytes: int = DEFAULT_DISK_BYTES,
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_size = sum(size for _, size, _ in self._disk_files())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{PACKET_SUFFIX}"
+
+    def _disk_files(self) -> List[Tuple[float, int, Path]]:
+        found = []
+        for path in self.directory.glob(f"*{PACKET_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, path))
+        return found
+
+    # -- reads -----------------------------------------------------------
+
+    def open(self, key: str) -> Optional[Iterator[bytes]]:
+        """Return an iterator over the cached packet, or ``None`` on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return iter((data,))
+        if self.directory is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        if os.fstat(handle.fileno()).st_size <= self.memory_bytes:
+            with handle:
+                data = handle.read()
+            self._remember(key, data)
+            return iter((data,))
+        return _iter_file(handle)
+
+    def get(self, key: str) -> Optional[bytes]:
+        chunks = self.open(key)
+        return b"".join(chunks) if chunks is not None else None
+
+    # -- writes ----------------------------------------------------------
+
+    def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        if self.directory is not None and len(data) <= self.disk_bytes:
+            self._store(key, data)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous)
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _store(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if path.exists():
+            os.utime(path)
+            return
+        tmp = self.directory / f".{key}.{os.getpid()}-{threading.get_ident():x}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_size += len(data)
+            if self._disk_size <= self.disk_bytes:
+                return
+            for _, size, victim in sorted(self._disk_files()):
+                if self._disk_size <= self.disk_bytes:
+                    break
+                if victim == path:
+                    continue
+                try:
+                    victim.unlink()
+                except FileNotFoundError:
+                    continue
+                self._disk_size -= size
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass ``chunks`` through and cache the packet once it is complete.
+
+        Buffering stops, and nothing is cached, once the packet outgrows
+        both tiers.
+        """
+        limit = max(self.memory_bytes, self.disk_bytes if self.directory is not None else 0)
+        parts: Optional[List[bytes]] = []
+        size = 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > limit:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            self.put(key, b"".join(parts))
@@ -0,0 +1,70 @@
+"""Multi-process portfolio evaluation with serial-identical output.
+
+Workers receive each chunk together with the run date and the run's
+``RuleSet``, so nothing depends on the worker's view of
+``engine.rules.ACTIVE``. They return finished receipt payloads; the parent
+consumes them in submission order and is the only process that writes
+artifacts, which keeps filenames, contents and ordering the same as a serial
+run.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+from engine.batch import build_columns, columns_from_records, evaluate_columns
+from engine.rules import rules_for
+
+T = TypeVar("T")
+
+
+def map_ordered(fn: Callable[..., T], items: Iterable[Any], jobs: int, *args: Any) -> Iterator[T]:
+    """Yield ``fn(item, *args)`` for each item, in input order.
+
+    Runs inline when ``jobs == 1``; otherwise keeps at most ``2 * jobs``
+    items in flight on a process pool so streamed input stays bounded.
+    """
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1")
+    if jobs == 1:
+        for item in items:
+            yield fn(item, *args)
+        return
+
+    window = 2 * jobs
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item, *args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def evaluate_chunk(
+    chunk: List[Dict[str, Any]],
+    today: date,
+    thresholds: Mapping[str, int],
+    as_of: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    _, branches = evaluate_columns(columns_from_records(chunk), today=today, thresholds=thresholds)
+    return build_columns(chunk, branches, thresholds, as_of)
+
+
+def evaluate_parallel(
+    chunks: Iterable[List[Dict[str, Any]]],
+    jobs: int,
+    today: date,
+    thresholds: Mapping[str, int],
+    as_of: Optional[date] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield receipt payloads for every record of ``chunks`` in input order.
+
+    ``as_of`` is the caller's explicit run date, if any; it is recorded in
+    each receipt as ``current_date``.
+    """
+    thresholds = rules_for(thresholds)
+    for payloads in map_ordered(evaluate_chunk, chunks, jobs, today, thresholds, as_of):
+        yield from payloads
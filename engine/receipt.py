@@ -17,4 +17,4 @@ def sha256_hex(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 def decision_id_for(payload_without_id: Dict[str, Any]) -> str:
-    return sha256_hex(canonical_json(payload_without_id)
+    return sha256_hex(canonical_json(payload_without_id))
@@ -1,74 +1,125 @@
-from datetime import date, datetime
-from engine.rules import ACTIVE
-from engine.residue import emit_decision
+from datetime import date, datetime, timedelta
+from engine import metrics
+from engine.ingest import epoch_day, epoch_day_of
+from engine.rules import active_rules, rules_for
+from engine.residue import build_decision, envelope_for, write_decision
+
+# Terminal branches of the rule tree as (rule_id, rule_path). The index of each
+# entry is the branch code shared with the columnar evaluator in engine.batch.
+BRANCHES = (
+    ("RG-MASS-ANOMALY", ("RG-MASS-ANOMALY",)),
+    ("RG-DELAY-BLOCK", ("RG-MASS-ANOMALY", "RG-LATE-X", "RG-REPEAT-Y", "RG-DELAY-BLOCK")),
+    ("RG-LATE-X", ("RG-MASS-ANOMALY", "RG-LATE-X", "RG-REPEAT-Y", "RG-DELAY-BLOCK")),
+    ("RG-LATE-X", ("RG-MASS-ANOMALY", "RG-LATE-X", "RG-REPEAT-Y")),
+    ("RG-OK", ("RG-MASS-ANOMALY", "RG-LATE-X", "RG-OK")),
+)
+
+BRANCH_MASS_ANOMALY = 0
+BRANCH_DELAY_BLOCK = 1
+BRANCH_NOTICE_WITHIN_DELAY = 2
+BRANCH_NOTICE = 3
+BRANCH_OK = 4
+
+OUTCOMES = {
+    "RG-MASS-ANOMALY": {
+        "status": "REFUSED",
+        "rule_name": "Portfolio Integrity Breach",
+        "decision": "ENFORCEMENT_REFUSED",
+        "explanation": "Abnormally high portfolio lateness suggests systemic or data error.",
+    },
+    "RG-DELAY-BLOCK": {
+        "status": "REFUSED",
+        "rule_name": "Filing Delay Exceeded",
+        "decision": "FILING_DELAY_REFUSED",
+        "explanation": "Filing delayed beyond allowable window.",
+    },
+    "RG-LATE-X": {
+        "status": "APPROVED",
+        "rule_name": "Notice Required",
+        "decision": "NOTICE_MANDATED",
+        "explanation": "Tenant late beyond threshold.",
+    },
+    "RG-OK": {
+        "status": "APPROVED",
+        "rule_name": "Within Policy",
+        "decision": "NO_ACTION",
+        "explanation": "Tenant within acceptable bounds.",
+    },
+}
 
 def days_between(a, b):
     return (b - a).days
 
-def evaluate(record):
-    today = date.today()
-    rule_path = []
+def parse_due_date(value):
+    return datetime.fromisoformat(value).date()
 
-    due = datetime.fromisoformat(record["due_date"]).date()
-    days_late = days_between(due, today)
+def branch_for(record, days_late, thresholds=None):
+    if thresholds is None:
+        thresholds = active_rules()
 
     # RG-MASS-ANOMALY
-    rule_path.append("RG-MASS-ANOMALY")
-    if record["portfolio_late_rate_milli"] > ACTIVE["N_PORTFOLIO_RATE_MILLI"]:
-        emit_decision(
-            status="REFUSED",
-            tenant_id=record["tenant_id"],
-            rule_id="RG-MASS-ANOMALY",
-            rule_name="Portfolio Integrity Breach",
-            decision="ENFORCEMENT_REFUSED",
-            rule_path=rule_path,
-            context=record,
-            explanation="Abnormally high portfolio lateness suggests systemic or data error.",
-        )
-        return
+    if record["portfolio_late_rate_milli"] > thresholds["N_PORTFOLIO_RATE_MILLI"]:
+        return BRANCH_MASS_ANOMALY
 
     # RG-LATE-X
-    rule_path.append("RG-LATE-X")
-    if days_late > ACTIVE["X_DAYS_LATE"]:
+    if days_late > thresholds["X_DAYS_LATE"]:
         # RG-REPEAT-Y
-        rule_path.append("RG-REPEAT-Y")
-        if record["late_count_window"] >= ACTIVE["Y_REPEAT"]:
+        if record["late_count_window"] >= thresholds["Y_REPEAT"]:
             # RG-DELAY-BLOCK
-            rule_path.append("RG-DELAY-BLOCK")
-            if record["days_since_eligible_filing"] > ACTIVE["Z_MAX_DELAY"]:
-                emit_decision(
-                    status="REFUSED",
-                    tenant_id=record["tenant_id"],
-                    rule_id="RG-DELAY-BLOCK",
-                    rule_name="Filing Delay Exceeded",
-                    decision="FILING_DELAY_REFUSED",
-                    rule_path=rule_path,
-                    context=record,
-                    explanation="Filing delayed beyond allowable window.",
-                )
-                return
-
-        emit_decision(
-            status="APPROVED",
-            tenant_id=record["tenant_id"],
-            rule_id="RG-LATE-X",
-            rule_name="Notice Required",
-            decision="NOTICE_MANDATED",
-            rule_path=rule_path,
-            context=record,
-            explanation="Tenant late beyond threshold.",
-        )
-        return
+            if record["days_since_eligible_filing"] > thresholds["Z_MAX_DELAY"]:
+                return BRANCH_DELAY_BLOCK
+            return BRANCH_NOTICE_WITHIN_DELAY
+        return BRANCH_NOTICE
 
     # RG-OK
-    rule_path.append("RG-OK")
-    emit_decision(
-        status="APPROVED",
+    return BRANCH_OK
+
+def transition_date(record, thresholds=None):
+    """First date on which ``days_late`` passes ``X_DAYS_LATE`` for ``record``.
+
+    ``days_late`` is the only input that changes with the date and it only
+    grows, so this is the one day on which the outcome of an unchanged record
+    can flip. Returns ``None`` when RG-MASS-ANOMALY decides regardless of
+    the date.
+    """
+    if thresholds is None:
+        thresholds = active_rules()
+    if record["portfolio_late_rate_milli"] > thresholds["N_PORTFOLIO_RATE_MILLI"]:
+        return None
+    return parse_due_date(record["due_date"]) + timedelta(days=thresholds["X_DAYS_LATE"] + 1)
+
+def context_for(record, as_of=None):
+    """Receipt context for ``record``.
+
+    An explicit ``as_of`` is recorded as ``current_date``, which is the date
+    ``engine.verify`` replays the decision on.
+    """
+    if as_of is None:
+        return record
+    return {**record, "current_date": as_of.isoformat()}
+
+def build_branch(record, branch, thresholds=None, as_of=None):
+    rule_id, rule_path = BRANCHES[branch]
+    return build_decision(
         tenant_id=record["tenant_id"],
-        rule_id="RG-OK",
-        rule_name="Within Policy",
-        decision="NO_ACTION",
-        rule_path=rule_path,
-        context=record,
-        explanation="Tenant within acceptable bounds.",
+        rule_id=rule_id,
+        rule_path=list(rule_path),
+        context=context_for(record, as_of),
+        thresholds=thresholds,
+        **OUTCOMES[rule_id],
     )
+
+def emit_branch(record, branch, thresholds=None, sink=None, as_of=None):
+    return write_decision(build_branch(record, branch, thresholds, as_of), sink)
+
+def evaluate(record, thresholds=None, sink=None, persist=True, as_of=None):
+    """Evaluate ``record`` as of ``as_of`` (default: today's local date)."""
+    thresholds = rules_for(thresholds)
+    with metrics.timer("date_math"):
+        days_late = epoch_day_of(as_of or date.today()) - epoch_day(record["due_date"])
+    with metrics.timer("rule_walk"):
+        branch = branch_for(record, days_late, thresholds)
+    metrics.count("records_evaluated")
+    if not persist:
+        return envelope_for(build_branch(record, branch, thresholds, as_of))
+    return emit_branch(record, branch, thresholds, sink, as_of)
@@ -1,17 +1,126 @@
 import datetime
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
 
-from engine.rules import ACTIVE
-from engine.receipt import RECEIPT_SPEC_VERSION, canonical_json, decision_id_for
+from engine import metrics
+from engine.rules import RuleSet, rules_for
+from engine.receipt import RECEIPT_SPEC_VERSION, canonical_json, decision_id_for, sha256_hex
+from engine.sink import ArtifactSink, DirectorySink
 
 ARTIFACT_DIR = Path("artifacts")
 
 def utc_now_iso() -> str:
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
-def emit_decision(
+class CanonicalPayload(dict):
+    """Receipt payload that carries its canonical JSON text as ``canonical``.
+
+    The text is computed when the payload is built; treat the dict as
+    read-only afterwards.
+    """
+
+    canonical: Optional[str] = None
+
+
+class DecisionEncoder:
+    """Splice per-tenant fields into precomputed canonical receipt fragments.
+
+    The thresholds block, the threshold part of ``inputs_milli``, the product
+    header and the ``gates``/``outputs`` prefix of each rule branch are encoded
+    once; only ``context``, the portfolio rate and ``tenant_id`` are encoded
+    per decision. Output is byte-identical to ``canonical_json`` because the
+    fragments are assembled in sorted-key order.
+    """
+
+    def __init__(self, rules: RuleSet):
+        self.rules = thresholds = rules
+        self._inputs_tail = canonical_json({
+            "x_days_late": int(thresholds["X_DAYS_LATE"]) * 1000,
+            "y_repeat": int(thresholds["Y_REPEAT"]) * 1000,
+            "z_max_delay": int(thresholds["Z_MAX_DELAY"]) * 1000,
+        })[1:]
+        self._suffix = (
+            ',"product":"RentGuard","product_version":"1.0","receipt_spec":'
+            + canonical_json(RECEIPT_SPEC_VERSION)
+            + ',"thresholds":'
+            + rules.canonical
+            + "}"
+        )
+        self._branches: Dict[tuple, Tuple[str, str]] = {}
+
+    def _branch_fragments(self, key: tuple) -> Tuple[str, str]:
+        fragments = self._branches.get(key)
+        if fragments is None:
+            rule_path, status, rule_id, rule_name, decision, explanation = key
+            outputs = canonical_json({
+                "status": status,
+                "rule_id": rule_id,
+                "rule_name": rule_name,
+                "decision": decision,
+                "explanation": explanation,
+            })
+            gates = (
+                '","gates":' + canonical_json({"rule_path": list(rule_path)})
+                + ',"inputs_milli":{"portfolio_late_rate_milli":'
+            )
+            # "tenant_id" sorts after every other outputs key.
+            outputs = ',"outputs":' + outputs[:-1] + ',"tenant_id":'
+            fragments = self._branches[key] = (gates, outputs)
+        return fragments
+
+    def encode(
+        self,
+        status: str,
+        tenant_id: str,
+        rule_id: str,
+        rule_name: str,
+        decision: str,
+        rule_path: List[str],
+        context: Dict[str, Any],
+        explanation: str,
+    ):
+        """Return ``(decision_id, canonical_payload_text)``."""
+        if metrics.ENABLED:
+            started = perf_counter()
+        gates, outputs = self._branch_fragments((tuple(rule_path), status, rule_id, rule_name, decision, explanation))
+        head = '{"artifacts":{},"context":' + canonical_json(context) + ',"decision_id":"'
+        tail = (
+            gates
+            + str(int(context["portfolio_late_rate_milli"]))
+            + "," + self._inputs_tail
+            + outputs
+            + canonical_json(tenant_id)
+            + "}"
+            + self._suffix
+        )
+        if metrics.ENABLED:
+            encoded = perf_counter()
+            metrics.observe("canonical_serialization", encoded - started)
+        did = sha256_hex(head + tail)
+        if metrics.ENABLED:
+            metrics.observe("sha256", perf_counter() - encoded)
+        return did, head + did + tail
+
+
+_ENCODERS: Dict[Any, DecisionEncoder] = {}
+_MAX_ENCODERS = 64
+
+def encoder_for(thresholds: Optional[Dict[str, int]] = None) -> DecisionEncoder:
+    """Encoder for a RuleSet, or for a plain threshold mapping (keyed by its items)."""
+    if thresholds is None or isinstance(thresholds, RuleSet):
+        key = rules_for(thresholds)
+    else:
+        key = tuple(sorted(thresholds.items()))
+    encoder = _ENCODERS.get(key)
+    if encoder is None:
+        if len(_ENCODERS) >= _MAX_ENCODERS:
+            _ENCODERS.clear()
+        encoder = _ENCODERS[key] = DecisionEncoder(rules_for(thresholds))
+    return encoder
+
+def build_decision(
     status: str,
     tenant_id: str,
     rule_id: str,
@@ -20,19 +129,32 @@ def emit_decision(
     rule_path: List[str],
     context: Dict[str, Any],
     explanation: str,
-):
-    ARTIFACT_DIR.mkdir(exist_ok=True)
+    thresholds: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    encoder = encoder_for(thresholds)
+    thresholds = encoder.rules
+
+    did, text = encoder.encode(
+        status=status,
+        tenant_id=tenant_id,
+        rule_id=rule_id,
+        rule_name=rule_name,
+        decision=decision,
+        rule_path=rule_path,
+        context=context,
+        explanation=explanation,
+    )
 
-    core = {
+    core = CanonicalPayload({
         "receipt_spec": RECEIPT_SPEC_VERSION,
         "product": "RentGuard",
         "product_version": "1.0",
-        "decision_id": "",
+        "decision_id": did,
         "inputs_milli": {
             "portfolio_late_rate_milli": int(context["portfolio_late_rate_milli"]),
-            "x_days_late": int(ACTIVE["X_DAYS_LATE"]) * 1000,
-            "y_repeat": int(ACTIVE["Y_REPEAT"]) * 1000,
-            "z_max_delay": int(ACTIVE["Z_MAX_DELAY"]) * 1000,
+            "x_days_late": int(thresholds["X_DAYS_LATE"]) * 1000,
+            "y_repeat": int(thresholds["Y_REPEAT"]) * 1000,
+            "z_max_delay": int(thresholds["Z_MAX_DELAY"]) * 1000,
         },
         "gates": {
             "rule_path": list(rule_path),
@@ -46,27 +168,75 @@ def emit_decision(
             "explanation": explanation,
         },
         "artifacts": {},
-        "thresholds": ACTIVE,
+        "thresholds": thresholds,
         "context": context,
-    }
-
-    did = decision_id_for(core | {"decision_id": ""})
-    core["decision_id"] = did
+    })
+    core.canonical = text
+    return core
 
-    envelope = {
+def envelope_for(core: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "timestamp_utc": utc_now_iso(),
         "payload": core,
     }
 
-    fname = f"{status}_{tenant_id}_{did[:12]}.json"
-    path = ARTIFACT_DIR / fname
+def envelope_json(envelope: Dict[str, Any]) -> str:
+    text = getattr(envelope["payload"], "canonical", None)
+    if text is None:
+        return canonical_json(envelope)
+    # "payload" sorts before "timestamp_utc", the envelope's only other key.
+    return '{"payload":' + text + ',"timestamp_utc":' + canonical_json(envelope["timestamp_utc"]) + "}"
+
+def artifact_name(core: Dict[str, Any]) -> str:
+    outputs = core["outputs"]
+    return f"{outputs['status']}_{outputs['tenant_id']}_{core['decision_id'][:12]}.json"
+
+def write_decision(core: Dict[str, Any], sink: Optional[ArtifactSink] = None) -> Dict[str, Any]:
+    if sink is None:
+        sink = DirectorySink(ARTIFACT_DIR)
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(canonical_json(envelope))
+    envelope = envelope_for(core)
+    if not metrics.ENABLED:
+        sink.write(artifact_name(core), envelope_json(envelope), payload=core)
+        return envelope
+    with metrics.timer("canonical_serialization"):
+        data = envelope_json(envelope)
+    with metrics.timer("artifact_write"):
+        sink.write(artifact_name(core), data, payload=core)
+    metrics.count("artifacts_written")
+    return envelope
 
-    print(f"Artifact written: {path}")
+def emit_decision(
+    status: str,
+    tenant_id: str,
+    rule_id: str,
+    rule_name: str,
+    decision: str,
+    rule_path: List[str],
+    context: Dict[str, Any],
+    explanation: str,
+    thresholds: Optional[Dict[str, int]] = None,
+    sink: Optional[ArtifactSink] = None,
+) -> Dict[str, Any]:
+    core = build_decision(
+        status=status,
+        tenant_id=tenant_id,
+        rule_id=rule_id,
+        rule_name=rule_name,
+        decision=decision,
+        rule_path=rule_path,
+        context=context,
+        explanation=explanation,
+        thresholds=thresholds,
+    )
+    return write_decision(core, sink)
 
-def emit_override(original_decision_id: str, actor: str, reason: str):
+def emit_override(
+    original_decision_id: str,
+    actor: str,
+    reason: str,
+    sink: Optional[ArtifactSink] = None,
+) -> Dict[str, Any]:
     payload = {
         "receipt_spec": RECEIPT_SPEC_VERSION,
         "product": "RentGuard",
@@ -85,8 +255,9 @@ def emit_override(original_decision_id: str, actor: str, reason: str):
     did = decision_id_for(payload | {"decision_id": ""})
     payload["decision_id"] = did
 
-    envelope = {"timestamp_utc": utc_now_iso(), "payload": payload}
-    ARTIFACT_DIR.mkdir(exist_ok=True)
-    path = ARTIFACT_DIR / f"FORCE_OVERRIDE_{did[:12]}.json"
-    path.write_text(canonical_json(envelope), encoding="utf-8")
-    print(f"Artifact written: {path}")
+    if sink is None:
+        sink = DirectorySink(ARTIFACT_DIR)
+
+    envelope = envelope_for(payload)
+    sink.write(f"FORCE_OVERRIDE_{did[:12]}.json", canonical_json(envelope), payload=payload)
+    return envelope
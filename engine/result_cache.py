@@ -0,0 +1,142 @@
+"""Idempotent evaluation result cache.
+
+Evaluation is deterministic in the input record, the thresholds and the
+as-of date, so ``evaluation_key`` hashes exactly those three. ``ResultCache``
+maps the key to the receipt envelope that was returned for it, plus whether
+that envelope has been persisted. A retry gets the same receipt back without
+re-evaluating; the ledger itself refuses a second copy of a stored decision.
+
+The memory tier is an LRU bounded by entry count. The optional disk tier
+keeps one ``<key>.json`` file per entry and can be shared by several
+processes. Both tiers expire entries ``ttl`` seconds after they are stored.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from engine.receipt import canonical_json, sha256_hex
+from engine.rules import rules_for
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 300.0
+ENTRY_SUFFIX = ".json"
+
+
+def evaluation_key(record: Mapping[str, Any], thresholds: Mapping[str, int], as_of: date) -> str:
+    return sha256_hex(canonical_json({
+        "as_of": as_of.isoformat(),
+        "input": dict(record),
+        "rules": rules_for(thresholds).digest,
+    }))
+
+
+class ResultCache:
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, list] = {}
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.prune()
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Serialize concurrent evaluations of the same key in this process."""
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._key_locks[key]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{ENTRY_SUFFIX}"
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return self.clock() - entry["stored_at"] < self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"envelope", "persisted", "stored_at"}`` or ``None``."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._fresh(entry):
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read(key) if self.directory is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, envelope: Dict[str, Any], persisted: bool) -> None:
+        entry = {"envelope": envelope, "persisted": persisted, "stored_at": self.clock()}
+        self._remember(key, entry)
+        if self.directory is not None:
+            tmp = self.directory / f".{key}.{os.getpid()}-{threading.get_ident():x}.tmp"
+            tmp.write_text(canonical_json(entry), encoding="utf-8")
+            os.replace(tmp, self._path(key))
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if self._fresh(entry):
+            return entry
+        path.unlink(missing_ok=True)
+        return None
+
+    def prune(self) -> int:
+        """Delete expired disk entries; returns how many were removed."""
+        removed = 0
+        cutoff = self.clock() - self.ttl
+        for path in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
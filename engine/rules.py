@@ -1,3 +1,7 @@
+from typing import Mapping, Optional
+
+from engine.receipt import canonical_json, sha256_hex
+
 DEFAULTS = {
     "X_DAYS_LATE": 5,
     "Y_REPEAT": 2,
@@ -6,9 +10,71 @@ DEFAULTS = {
     "N_PORTFOLIO_RATE_MILLI": 400,  # 0.400 expressed as milli-rate
 }
 
+# Process-wide thresholds used when no RuleSet is passed. Prefer passing a
+# RuleSet explicitly; configure() is kept for single-tenant scripts.
 ACTIVE = DEFAULTS.copy()
 
 def configure(overrides):
     for k, v in overrides.items():
         if k in ACTIVE:
             ACTIVE[k] = v
+
+
+class RuleSet(dict):
+    """Immutable, hashable set of thresholds.
+
+    Missing keys are filled from ``DEFAULTS``; unknown keys are rejected.
+    ``canonical`` holds the canonical JSON encoding and ``digest`` its
+    sha256, both computed once, so a RuleSet can key caches and be shared
+    between receipts and threads without copying.
+    """
+
+    __slots__ = ("canonical", "digest")
+
+    def __init__(self, values: Optional[Mapping[str, int]] = None, **overrides: int):
+        merged = dict(DEFAULTS)
+        for source in (values or {}, overrides):
+            for key, value in source.items():
+                if key not in DEFAULTS:
+                    raise ValueError(f"Unknown threshold: {key}")
+                merged[key] = int(value)
+        super().__init__(merged)
+        self.canonical = canonical_json(merged)
+        self.digest = sha256_hex(self.canonical)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("RuleSet is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __reduce__(self):
+        return (RuleSet, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"RuleSet({dict.__repr__(self)})"
+
+    def replace(self, **overrides: int) -> "RuleSet":
+        return RuleSet(self, **overrides)
+
+
+DEFAULT_RULES = RuleSet()
+
+_active_rules = DEFAULT_RULES
+
+def active_rules() -> RuleSet:
+    """Snapshot of ``ACTIVE`` as a RuleSet, rebuilt only when ACTIVE changes."""
+    global _active_rules
+    if _active_rules != ACTIVE:
+        _active_rules = RuleSet(ACTIVE)
+    return _active_rules
+
+def rules_for(thresholds: Optional[Mapping[str, int]] = None) -> RuleSet:
+    if thresholds is None:
+        return active_rules()
+    if isinstance(thresholds, RuleSet):
+        return thresholds
+    return RuleSet(thresholds)
@@ -0,0 +1,150 @@
+"""Artifact sinks used by engine.residue to persist receipt envelopes.
+
+A sink receives ``(name, data)`` pairs where ``name`` is the legacy artifact
+filename (``{status}_{tenant}_{id}.json``) and ``data`` is the canonical JSON
+envelope. The deterministic payload is passed alongside as ``payload`` for
+sinks that index by its fields. ``DirectorySink`` keeps the one-file-per-decision layout.
+``BufferedSink`` groups envelopes into NDJSON batch files, one canonical
+envelope per line, written atomically with a single fsync per batch and one
+aggregate progress line per batch instead of one per artifact.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+BATCH_PREFIX = "batch-"
+BATCH_SUFFIX = ".ndjson"
+DEFAULT_BATCH_SIZE = 1000
+
+_BATCH_RE = re.compile(rf"^{re.escape(BATCH_PREFIX)}(\d+){re.escape(BATCH_SUFFIX)}$")
+
+Progress = Optional[Callable[[str], None]]
+
+
+class ArtifactSink:
+    """Interface for artifact destinations."""
+
+    def write(self, name: str, data: str, payload: Optional[Dict] = None) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class DirectorySink(ArtifactSink):
+    """One file per artifact, written immediately."""
+
+    def __init__(self, directory: Path, progress: Progress = print):
+        self.directory = Path(directory)
+        self.progress = progress
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name: str, data: str, payload: Optional[Dict] = None) -> None:
+        path = self.directory / name
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+        if self.progress:
+            self.progress(f"Artifact written: {path}")
+
+
+class BufferedSink(ArtifactSink):
+    """Buffer envelopes and write them as NDJSON batch files.
+
+    Each flush writes a temporary file with one ``fsync`` and hard-links it
+    to ``batch-<seq>.ndjson``, so readers never observe a partial batch.
+    Sequence numbers continue after the highest batch already present and the
+    link fails on a taken name, so several processes can share a directory.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fsync: bool = True,
+        progress: Progress = print,
+    ):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.progress = progress
+        self.written = 0
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._next_seq = max((seq for seq, _ in iter_batch_files(self.directory)), default=0) + 1
+
+    def write(self, name: str, data: str, payload: Optional[Dict] = None) -> None:
+        with self._lock:
+            self._buffer.append(data)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        body = "\n".join(self._buffer) + "\n"
+        tmp = self.directory / f".{BATCH_PREFIX}{os.getpid()}-{id(self):x}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(body)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            path = self._publish(tmp)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+        self.written += len(self._buffer)
+        self._buffer = []
+        if self.progress:
+            self.progress(f"Artifacts written: {self.written} (batch {path.name})")
+
+    def _publish(self, tmp: Path) -> Path:
+        # link() claims the next free name and publishes the data in one step.
+        while True:
+            path = self.directory / f"{BATCH_PREFIX}{self._next_seq:08d}{BATCH_SUFFIX}"
+            self._next_seq += 1
+            try:
+                os.link(tmp, path)
+                return path
+            except FileExistsError:
+                continue
+
+
+def iter_batch_files(directory: Path) -> Iterator[Tuple[int, Path]]:
+    """Yield ``(seq, path)`` for every batch file in ``directory``, in order."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+    found = []
+    for path in directory.iterdir():
+        match = _BATCH_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    yield from sorted(found)
+
+
+def read_batch(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
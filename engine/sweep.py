@@ -0,0 +1,269 @@
+"""Threshold sweep: decision histograms for a grid of thresholds.
+
+Every branch test compares one per-tenant quantity with one threshold, so a
+tenant's outcome under any grid cell depends only on where its
+``days_late``, ``late_count_window``, ``days_since_eligible_filing`` and
+``portfolio_late_rate_milli`` fall between the grid values. ``SweepIndex``
+reduces a portfolio once to counts of distinct quantity tuples. ``sweep``
+bins those tuples against the grid, turns the 4-d bin counts into cumulative
+counts, and then reads each cell's histogram with a handful of lookups,
+independent of the portfolio size:
+
+* suffix sums over ``days_late`` bins, ``late_count_window`` bins and
+  ``delay`` bins, prefix sums over portfolio rate bins;
+* ``late = S[x+1, 0, 0, n]``, ``repeat = S[x+1, y+1, 0, n]``,
+  ``blocked = S[x+1, y+1, z+1, n]``, ``within_rate = S[0, 0, 0, n]``.
+
+The result matches ``engine.batch.branch_column`` for every cell.
+
+Usage::
+
+    python -m engine.sweep portfolio.csv --grid X_DAYS_LATE=3,5,10 --grid Z_MAX_DELAY=60,90
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from engine.batch import columns_from_records, days_late_column, due_day_column
+from engine.ingest import DEFAULT_CHUNK_SIZE, portfolio_stats
+from engine.rentguard import (
+    BRANCH_DELAY_BLOCK,
+    BRANCH_MASS_ANOMALY,
+    BRANCH_NOTICE,
+    BRANCH_NOTICE_WITHIN_DELAY,
+    BRANCH_OK,
+    BRANCHES,
+    OUTCOMES,
+)
+from engine.columnar import COLUMNAR_SUFFIX, ColumnarFormatError, MappedPortfolio
+from engine.rules import rules_for
+from engine.table import iter_portfolio_tables
+
+SWEEP_KEYS = ("X_DAYS_LATE", "Y_REPEAT", "Z_MAX_DELAY", "N_PORTFOLIO_RATE_MILLI")
+DECISIONS = tuple(OUTCOMES[rule_id]["decision"] for rule_id, _ in BRANCHES)
+
+Key = Tuple[int, int, int, int]
+
+
+class SweepIndex:
+    """Portfolio reduced to counts of ``(days_late, repeats, delay, rate)``.
+
+    With ``tenants=True`` the tenant IDs behind each tuple are kept as well.
+    """
+
+    def __init__(self, tenants: bool = False):
+        self.counts: Counter = Counter()
+        self.tenants: Optional[Dict[Key, List[str]]] = defaultdict(list) if tenants else None
+        self.rows = 0
+
+    def add_columns(self, columns: Mapping[str, Sequence], today: date) -> None:
+        keys = zip(
+            days_late_column(due_day_column(columns), today),
+            columns["late_count_window"],
+            columns["days_since_eligible_filing"],
+            columns["portfolio_late_rate_milli"],
+        )
+        if self.tenants is None:
+            self.counts.update(keys)
+        else:
+            for key, tenant_id in zip(keys, columns["tenant_id"]):
+                self.counts[key] += 1
+                self.tenants[key].append(tenant_id)
+        self.rows += len(columns["due_date"])
+
+    def add_records(self, records: Iterable[Mapping], today: date) -> None:
+        self.add_columns(columns_from_records(records), today)
+
+    def add_tables(self, tables: Iterable[Mapping[str, Sequence]], today: date) -> None:
+        for table in tables:
+            self.add_columns(table, today)
+
+
+def _axis_values(grid: Mapping[str, Sequence[int]], base: Mapping[str, int]) -> Dict[str, List[int]]:
+    unknown = set(grid) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot sweep thresholds: {', '.join(sorted(unknown))}")
+    axes = {}
+    for name in SWEEP_KEYS:
+        values = [int(v) for v in grid.get(name, (base[name],))]
+        if not values:
+            raise ValueError(f"Grid axis {name} is empty")
+        axes[name] = values
+    return axes
+
+
+def _accumulate(cells: List[int], dims: Tuple[int, ...], axis: int, reverse: bool) -> None:
+    """In-place running sum of a flat row-major array along ``axis``."""
+    stride = 1
+    for size in dims[axis + 1:]:
+        stride *= size
+    block = stride * dims[axis]
+    steps = range(dims[axis] - 2, -1, -1) if reverse else range(1, dims[axis])
+    delta = stride if reverse else -stride
+    for start in range(0, len(cells), block):
+        for step in steps:
+            row = start + step * stride
+            for i in range(row, row + stride):
+                cells[i] += cells[i + delta]
+
+
+class _Binner:
+    """Map a quantity tuple to its grid bin ``(bx, by, bz, bn)``.
+
+    ``bx > i`` iff ``days_late > X[i]``, ``by > j`` iff ``repeats >= Y[j]``,
+    ``bz > k`` iff ``delay > Z[k]`` and ``bn > n`` iff ``rate > N[n]``.
+    Bins are memoized per distinct value on each axis.
+    """
+
+    def __init__(self, edges: Tuple[List[int], ...]):
+        xs, ys, zs, ns = edges
+        self._finders = (
+            lambda v: bisect_left(xs, v),
+            lambda v: bisect_right(ys, v),
+            lambda v: bisect_left(zs, v),
+            lambda v: bisect_left(ns, v),
+        )
+        self._memo: Tuple[Dict[int, int], ...] = ({}, {}, {}, {})
+
+    def __call__(self, key: Key) -> Key:
+        out = []
+        for value, seen, find in zip(key, self._memo, self._finders):
+            found = seen.get(value)
+            if found is None:
+                found = seen[value] = find(value)
+            out.append(found)
+        return tuple(out)
+
+
+def _bin_branch(b: Tuple[int, int, int, int], i: int, j: int, k: int, n: int) -> int:
+    bx, by, bz, bn = b
+    if bn > n:
+        return BRANCH_MASS_ANOMALY
+    if bx <= i:
+        return BRANCH_OK
+    if by <= j:
+        return BRANCH_NOTICE
+    if bz > k:
+        return BRANCH_DELAY_BLOCK
+    return BRANCH_NOTICE_WITHIN_DELAY
+
+
+def _cumulative_cells(counts: Mapping[Key, int], bin_of: _Binner, dims: Tuple[int, ...]) -> List[int]:
+    """Bin ``counts`` into a flat 4-d array and turn it into cumulative counts."""
+    cells = [0] * (dims[0] * dims[1] * dims[2] * dims[3])
+    for key, count in counts.items():
+        bx, by, bz, bn = bin_of(key)
+        cells[((bx * dims[1] + by) * dims[2] + bz) * dims[3] + bn] += count
+    for axis in range(3):
+        _accumulate(cells, dims, axis, reverse=True)
+    _accumulate(cells, dims, 3, reverse=False)
+    return cells
+
+
+def sweep(
+    index: SweepIndex,
+    grid: Mapping[str, Sequence[int]],
+    base: Optional[Mapping[str, int]] = None,
+    tenants: bool = False,
+) -> Iterator[Dict]:
+    """Yield ``{"thresholds", "counts"[, "tenants"]}`` for every grid cell.
+
+    ``grid`` maps threshold names to candidate values; thresholds left out
+    keep their ``base`` value (the active rules by default). Cells follow
+    ``itertools.product`` order over ``SWEEP_KEYS``. ``counts`` and
+    ``tenants`` are keyed by decision.
+    """
+    if tenants and index.tenants is None:
+        raise ValueError("SweepIndex was built without tenants")
+    axes = _axis_values(grid, rules_for(base))
+    edges = tuple(sorted(set(axes[name])) for name in SWEEP_KEYS)
+    dims = tuple(len(e) + 1 for e in edges)
+
+    bin_of = _Binner(edges)
+    cells = _cumulative_cells(index.counts, bin_of, dims)
+
+    def at(a: int, b: int, c: int, d: int) -> int:
+        return cells[((a * dims[1] + b) * dims[2] + c) * dims[3] + d]
+
+    members: Dict[Key, List[str]] = defaultdict(list)
+    if tenants:
+        for key, ids in index.tenants.items():
+            members[bin_of(key)].extend(ids)
+
+    positions = [{v: p for p, v in enumerate(e)} for e in edges]
+    for values in itertools.product(*(axes[name] for name in SWEEP_KEYS)):
+        i, j, k, n = (pos[v] for pos, v in zip(positions, values))
+        within_rate = at(0, 0, 0, n)
+        late = at(i + 1, 0, 0, n)
+        repeat = at(i + 1, j + 1, 0, n)
+        blocked = at(i + 1, j + 1, k + 1, n)
+        by_branch = {
+            BRANCH_MASS_ANOMALY: index.rows - within_rate,
+            BRANCH_DELAY_BLOCK: blocked,
+            BRANCH_NOTICE_WITHIN_DELAY: repeat - blocked,
+            BRANCH_NOTICE: late - repeat,
+            BRANCH_OK: within_rate - late,
+        }
+        counts = dict.fromkeys(DECISIONS, 0)
+        for branch, count in by_branch.items():
+            counts[DECISIONS[branch]] += count
+        cell = {"thresholds": dict(zip(SWEEP_KEYS, values)), "counts": counts}
+        if tenants:
+            lists: Dict[str, List[str]] = {decision: [] for decision in counts}
+            for b, ids in members.items():
+                lists[DECISIONS[_bin_branch(b, i, j, k, n)]].extend(ids)
+            cell["tenants"] = lists
+        yield cell
+
+
+def _parse_grid(specs: Sequence[str]) -> Dict[str, List[int]]:
+    grid: Dict[str, List[int]] = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        try:
+            grid[name.strip()] = [int(v) for v in values.split(",") if v.strip()]
+        except ValueError:
+            raise ValueError(f"Grid values must be integers: {spec}") from None
+    return grid
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RentGuard threshold sweep")
+    parser.add_argument("file", help=f"CSV or columnar ({COLUMNAR_SUFFIX}) portfolio")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...", help="Threshold values to sweep")
+    parser.add_argument("--tenants", action="store_true", help="Include tenant IDs per decision in every cell")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per streamed CSV chunk")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Evaluation date (YYYY-MM-DD, default today)")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = _parse_grid(args.grid)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    today = args.as_of or date.today()
+    index = SweepIndex(tenants=args.tenants)
+    if args.file.endswith(COLUMNAR_SUFFIX):
+        try:
+            portfolio = MappedPortfolio(args.file)
+        except ColumnarFormatError as exc:
+            parser.error(str(exc))
+        with portfolio:
+            index.add_tables(portfolio.tables(args.chunk_size), today)
+    else:
+        stats = portfolio_stats(args.file)
+        tables = iter_portfolio_tables(args.file, stats["portfolio_late_rate_milli"], chunk_size=args.chunk_size)
+        index.add_tables(tables, today)
+    for cell in sweep(index, grid, tenants=args.tenants):
+        print(json.dumps(cell, sort_keys=True, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
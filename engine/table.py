@@ -0,0 +1,245 @@
+"""Struct-of-arrays portfolio storage.
+
+``TenantTable`` holds a portfolio chunk as typed columns instead of one dict
+per tenant: tenant IDs in a single UTF-8 buffer with an offset array, due
+dates as codes into a table of distinct strings plus an integer ``due_day``
+(epoch-day) column, and the counters as 32-bit ``array`` columns. A tenant
+costs about 40 bytes instead of the ~300 of a dict with boxed values.
+
+``iter_portfolio_tables`` reads a CSV portfolio straight into tables without
+building a dict per row. A table is accepted wherever the engine takes a chunk:
+
+* ``table[name]`` returns a column, so it can be passed to
+  ``engine.batch.evaluate_columns`` and ``engine.sweep`` as is;
+* iterating it yields one record dict at a time, so ``build_columns``,
+  ``emit_columns`` and the parallel workers materialize a tenant's dict only
+  while its receipt is being built and written.
+"""
+
+import csv
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from engine import metrics
+from engine.ingest import DEFAULT_CHUNK_SIZE, epoch_day, portfolio_stats
+
+RECORD_FIELDS = (
+    "tenant_id",
+    "due_date",
+    "late_count_window",
+    "days_since_eligible_filing",
+    "portfolio_late_rate_milli",
+)
+_INT_COLUMNS = ("due_day", "late_count_window", "days_since_eligible_filing", "portfolio_late_rate_milli")
+
+
+class TenantTable:
+    __slots__ = (
+        "_ids",
+        "_id_start",
+        "_id_ends",
+        "_dates",
+        "_date_codes",
+        "_date_index",
+        "due_day",
+        "late_count_window",
+        "days_since_eligible_filing",
+        "portfolio_late_rate_milli",
+    )
+
+    def __init__(self):
+        self._ids = bytearray()
+        self._id_start = 0
+        self._id_ends = array("I")
+        self._dates: List[str] = []
+        self._date_codes = array("I")
+        self._date_index: Dict[str, int] = {}
+        self.due_day = array("i")
+        self.late_count_window = array("i")
+        self.days_since_eligible_filing = array("i")
+        self.portfolio_late_rate_milli = array("i")
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> "TenantTable":
+        table = cls()
+        for record in records:
+            table.append(
+                record["tenant_id"],
+                record["due_date"],
+                record["late_count_window"],
+                record["days_since_eligible_filing"],
+                record["portfolio_late_rate_milli"],
+            )
+        return table
+
+    def append(
+        self,
+        tenant_id: str,
+        due_date: str,
+        late_count_window: int,
+        days_since_eligible_filing: int,
+        portfolio_late_rate_milli: int,
+    ) -> None:
+        due = epoch_day(due_date)
+        code = self._date_index.get(due_date)
+        if code is None:
+            code = self._date_index[due_date] = len(self._dates)
+            self._dates.append(due_date)
+        self._ids += tenant_id.encode("utf-8")
+        self._id_ends.append(len(self._ids))
+        self._date_codes.append(code)
+        self.due_day.append(due)
+        self.late_count_window.append(late_count_window)
+        self.days_since_eligible_filing.append(days_since_eligible_filing)
+        self.portfolio_late_rate_milli.append(portfolio_late_rate_milli)
+
+    def __len__(self) -> int:
+        return len(self._id_ends)
+
+    def slice(self, start: int, stop: int) -> "TenantTable":
+        """Rows ``start:stop`` as a read-only table.
+
+        Columns are sliced, not copied, when they are memoryviews, as in
+        ``engine.columnar``.
+        """
+        return TenantTable.from_buffers(
+            self._ids,
+            self._id_ends[start:stop],
+            self._dates,
+            self._date_codes[start:stop],
+            *(getattr(self, name)[start:stop] for name in _INT_COLUMNS),
+            id_start=self._id_ends[start - 1] if start else self._id_start,
+        )
+
+    # -- columns ---------------------------------------------------------
+
+    def _tenant_id(self, i: int) -> str:
+        start = self._id_ends[i - 1] if i else self._id_start
+        return str(self._ids[start:self._id_ends[i]], "utf-8")
+
+    @property
+    def tenant_id(self) -> List[str]:
+        return [self._tenant_id(i) for i in range(len(self))]
+
+    @property
+    def due_date(self) -> List[str]:
+        dates = self._dates
+        return [dates[code] for code in self._date_codes]
+
+    def __getitem__(self, name: str) -> Sequence:
+        if name not in RECORD_FIELDS and name != "due_day":
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    # -- records ---------------------------------------------------------
+
+    def record(self, i: int) -> Dict[str, object]:
+        return {
+            "tenant_id": self._tenant_id(i),
+            "due_date": self._dates[self._date_codes[i]],
+            "late_count_window": self.late_count_window[i],
+            "days_since_eligible_filing": self.days_since_eligible_filing[i],
+            "portfolio_late_rate_milli": self.portfolio_late_rate_milli[i],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    @classmethod
+    def from_buffers(
+        cls,
+        ids,
+        id_ends: Sequence[int],
+        dates: List[str],
+        date_codes: Sequence[int],
+        due_day: Sequence[int],
+        late_count_window: Sequence[int],
+        days_since_eligible_filing: Sequence[int],
+        portfolio_late_rate_milli: Sequence[int],
+        id_start: int = 0,
+    ) -> "TenantTable":
+        """Read-only table over existing buffers, in ``buffers()`` order.
+
+        ``id_ends`` holds end offsets into ``ids``; the first tenant ID starts
+        at ``id_start``.
+        """
+        table = cls.__new__(cls)
+        table._ids = ids
+        table._id_start = id_start
+        table._id_ends = id_ends
+        table._dates = dates
+        table._date_codes = date_codes
+        table._date_index = None
+        table.due_day = due_day
+        table.late_count_window = late_count_window
+        table.days_since_eligible_filing = days_since_eligible_filing
+        table.portfolio_late_rate_milli = portfolio_late_rate_milli
+        return table
+
+    def buffers(self) -> tuple:
+        """This table's rows as compact buffers, in ``from_buffers`` order."""
+        start = self._id_start
+        end = self._id_ends[-1] if len(self) else start
+        return (
+            bytes(self._ids[start:end]),
+            array("I", [e - start for e in self._id_ends]),
+            self._dates,
+            array("I", self._date_codes),
+            *(array("i", getattr(self, name)) for name in _INT_COLUMNS),
+        )
+
+    def __reduce__(self):
+        # buffers() copies only this table's rows, so views pickle compactly.
+        return (_restore, self.buffers())
+
+
+def _restore(ids, id_ends, dates, date_codes, *columns) -> TenantTable:
+    table = TenantTable.from_buffers(bytearray(ids), id_ends, dates, date_codes, *columns)
+    table._date_index = {value: code for code, value in enumerate(dates)}
+    return table
+
+
+def iter_portfolio_tables(
+    csv_path: str,
+    portfolio_late_rate_milli: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sidecar: bool = False,
+) -> Iterator[TenantTable]:
+    """Table-valued ``engine.ingest.iter_portfolio``: same records, same chunking."""
+    return metrics.timed_iter("ingest_parse", _iter_portfolio_tables(csv_path, portfolio_late_rate_milli, chunk_size, sidecar))
+
+
+def _iter_portfolio_tables(
+    csv_path: str,
+    portfolio_late_rate_milli: Optional[int],
+    chunk_size: int,
+    sidecar: bool,
+) -> Iterator[TenantTable]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if portfolio_late_rate_milli is None:
+        portfolio_late_rate_milli = portfolio_stats(csv_path, sidecar=sidecar)["portfolio_late_rate_milli"]
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        tenant, due, late, delay = (
+            header.index(name) for name in ("tenant_id", "due_date", "late_count_window", "days_since_eligible_filing")
+        )
+        table = TenantTable()
+        for row in reader:
+            if not row:
+                continue
+            table.append(row[tenant], row[due], int(row[late]), int(row[delay]), portfolio_late_rate_milli)
+            if len(table) >= chunk_size:
+                yield table
+                table = TenantTable()
+        if len(table):
+            yield table
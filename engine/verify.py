@@ -0,0 +1,172 @@
+"""Bulk replay verifier for the Receipt Spec replay invariant.
+
+For every receipt found in an artifacts directory (``*.json`` files and
+``batch-*.ndjson`` files), a single artifact file, or a segmented ledger, the
+verifier:
+
+1. recomputes ``decision_id`` from the canonical payload;
+2. re-runs the rule tree on the recorded ``context`` with the recorded
+   ``thresholds``;
+3. rebuilds the receipt for the replayed branch and diffs it against the
+   stored ``gates``, ``inputs_milli`` and ``outputs``.
+
+Replay uses the receipt's ``context.current_date`` when the evaluation was
+given an explicit as-of date. Otherwise it uses the UTC date of the envelope
+timestamp and accepts the neighbouring days as well: ``evaluate`` used the
+local calendar date, which may differ from the UTC date by one.
+
+Receipts are verified in chunks across a process pool. Failures are streamed
+as one JSON line each and a summary line closes the report.
+
+Usage::
+
+    python -m engine.verify artifacts/ --jobs 8
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from engine.ledger import INDEX_NAME, iter_segment_bodies
+from engine.parallel import map_ordered
+from engine.receipt import decision_id_for
+from engine.rentguard import branch_for, build_branch, days_between, parse_due_date
+from engine.sink import BATCH_SUFFIX
+
+DEFAULT_CHUNK = 2000
+
+OK = "ok"
+ID_MISMATCH = "decision_id_mismatch"
+REPLAY_MISMATCH = "replay_mismatch"
+UNREADABLE = "unreadable"
+SKIPPED = "skipped"
+
+
+# -- sources -------------------------------------------------------------
+
+def _iter_file(path: Path) -> Iterator[str]:
+    if path.name.endswith(BATCH_SUFFIX):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+    else:
+        yield path.read_text(encoding="utf-8")
+
+
+def iter_receipt_texts(source: Path) -> Iterator[str]:
+    """Yield raw envelope JSON from a ledger, artifacts directory or file."""
+    source = Path(source)
+    if source.is_file():
+        yield from _iter_file(source)
+        return
+    if (source / INDEX_NAME).exists():
+        for body in iter_segment_bodies(source):
+            yield body.decode("utf-8")
+        return
+    for path in sorted(source.iterdir()):
+        if path.is_file() and (path.suffix == ".json" or path.name.endswith(BATCH_SUFFIX)):
+            yield from _iter_file(path)
+
+
+def _chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -- checks --------------------------------------------------------------
+
+def _as_of_candidates(envelope: Dict[str, Any]) -> List[date]:
+    recorded = envelope["payload"]["context"].get("current_date")
+    if recorded:
+        return [date.fromisoformat(recorded)]
+    stamped = date.fromisoformat(str(envelope.get("timestamp_utc", ""))[:10])
+    return [stamped, stamped - timedelta(days=1), stamped + timedelta(days=1)]
+
+
+def _diff(stored: Dict[str, Any], rebuilt: Dict[str, Any]) -> Dict[str, Any]:
+    diff = {}
+    for section in ("gates", "inputs_milli", "outputs"):
+        if stored.get(section) != rebuilt.get(section):
+            diff[section] = {"stored": stored.get(section), "replayed": rebuilt.get(section)}
+    return diff
+
+
+def verify_envelope(envelope: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Return ``(status, detail)`` for one receipt envelope."""
+    payload = envelope.get("payload")
+    if not isinstance(payload, dict) or "decision_id" not in payload:
+        return UNREADABLE, {"error": "envelope has no payload"}
+
+    did = payload["decision_id"]
+    expected = decision_id_for(payload | {"decision_id": ""})
+    if expected != did:
+        return ID_MISMATCH, {"decision_id": did, "recomputed": expected}
+
+    if payload.get("gates", {}).get("force_override"):
+        return SKIPPED, None
+
+    context = payload["context"]
+    thresholds = payload["thresholds"]
+    due = parse_due_date(context["due_date"])
+    rebuilt = None
+    for as_of in _as_of_candidates(envelope):
+        branch = branch_for(context, days_between(due, as_of), thresholds)
+        rebuilt = build_branch(context, branch, thresholds)
+        if rebuilt["decision_id"] == did:
+            return OK, None
+    return REPLAY_MISMATCH, {"decision_id": did, "diff": _diff(payload, rebuilt)}
+
+
+def verify_chunk(texts: List[str]) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    counts: Counter = Counter()
+    failures: List[Dict[str, Any]] = []
+    for text in texts:
+        try:
+            status, detail = verify_envelope(json.loads(text))
+        except (ValueError, KeyError, TypeError) as exc:
+            status, detail = UNREADABLE, {"error": f"{type(exc).__name__}: {exc}"}
+        counts[status] += 1
+        if status not in (OK, SKIPPED):
+            failures.append({"status": status, **(detail or {})})
+    return dict(counts), failures
+
+
+def verify(source: Path, jobs: int = 1, chunk_size: int = DEFAULT_CHUNK) -> Iterator[Dict[str, Any]]:
+    """Yield failure records as they are found, then a final summary record."""
+    totals: Counter = Counter()
+    chunks = _chunked(iter_receipt_texts(source), chunk_size)
+    for counts, failures in map_ordered(verify_chunk, chunks, jobs):
+        totals.update(counts)
+        yield from failures
+    summary = {status: totals.get(status, 0) for status in (OK, SKIPPED, ID_MISMATCH, REPLAY_MISMATCH, UNREADABLE)}
+    yield {"summary": True, "receipts": sum(totals.values()), **summary}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RentGuard receipt replay verifier")
+    parser.add_argument("source", type=Path, help="Artifacts directory, artifact file or ledger directory")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="Receipts per worker task")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for entry in verify(args.source, jobs=args.jobs, chunk_size=args.chunk_size):
+        print(json.dumps(entry, sort_keys=True, ensure_ascii=False), flush=True)
+        if not entry.get("summary"):
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
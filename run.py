@@ -1,18 +1,41 @@
 import argparse
 import json
+from datetime import date
 
+from engine import metrics
+from engine.batch import columns_from_records, emit_columns, evaluate_columns
 from engine.rentguard import evaluate
-from engine.rules import configure
-from engine.ingest import load_portfolio
+from engine.parallel import evaluate_parallel
+from engine.residue import ARTIFACT_DIR, write_decision
+from engine.ledger import Ledger, LedgerSink
+from engine.merkle import ChainedSink
+from engine.rules import DEFAULT_RULES
+from engine.sink import BufferedSink, DirectorySink
+from engine.table import iter_portfolio_tables
+from engine.columnar import COLUMNAR_SUFFIX, ColumnarFormatError, MappedPortfolio
+from engine.ingest import DEFAULT_CHUNK_SIZE, portfolio_stats
+from engine.incremental import TransitionIndex
 
 parser = argparse.ArgumentParser(description="RentGuard Enforcement Engine")
-parser.add_argument("file", help="Path to JSON record or CSV portfolio")
+parser.add_argument("file", help=f"Path to JSON record, CSV portfolio or columnar ({COLUMNAR_SUFFIX}) portfolio")
 parser.add_argument("--late-days", type=int, help="Override X_DAYS_LATE")
 parser.add_argument("--repeat", type=int, help="Override Y_REPEAT")
 parser.add_argument("--max-delay", type=int, help="Override Z_MAX_DELAY")
 parser.add_argument("--portfolio-rate-milli", type=int, help="Override N_PORTFOLIO_RATE_MILLI (0-1000)")
+parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per streamed CSV chunk")
+parser.add_argument("--stats-sidecar", action="store_true", help="Cache portfolio stats in <csv>.stats.json")
+parser.add_argument("--jobs", type=int, default=1, help="Worker processes for CSV portfolios")
+parser.add_argument(
+    "--batch-size", type=int, default=0, help="Write artifacts as NDJSON batches of this size (0 = one file each)"
+)
+parser.add_argument("--ledger", help="Append artifacts to the segmented ledger in this directory")
+parser.add_argument("--chain", help="Hash-chain artifacts into per-day Merkle trees under this directory")
+parser.add_argument("--as-of", type=date.fromisoformat, help="Evaluation date (YYYY-MM-DD, default today)")
+parser.add_argument("--profile", action="store_true", help="Print time per stage at the end (excludes --jobs workers)")
+parser.add_argument("--incremental", help="State file; only re-evaluate CSV tenants that changed or reached a transition date")
 
 args = parser.parse_args()
+metrics.enable(args.profile)
 
 overrides = {}
 if args.late_days is not None:
@@ -24,13 +47,48 @@ if args.max_delay is not None:
 if args.portfolio_rate_milli is not None:
     overrides["N_PORTFOLIO_RATE_MILLI"] = args.portfolio_rate_milli
 
-configure(overrides)
+rules = DEFAULT_RULES.replace(**overrides)
 
-if args.file.endswith(".csv"):
-    records = load_portfolio(args.file)
-    print(f"Loading portfolio: {len(records)} records found.")
-    for r in records:
-        evaluate(r)
+if args.ledger:
+    sink = LedgerSink(Ledger(args.ledger), progress=print)
+elif args.batch_size > 0:
+    sink = BufferedSink(ARTIFACT_DIR, batch_size=args.batch_size)
+else:
+    sink = DirectorySink(ARTIFACT_DIR)
+if args.chain:
+    sink = ChainedSink(sink, args.chain)
+
+
+def evaluate_portfolio(chunks, stats):
+    print(f"Loading portfolio: {stats['rows']} records found.")
+    today = args.as_of or date.today()
+    index = TransitionIndex(args.incremental) if args.incremental else None
+    if index is not None:
+        chunks = (due for due in (index.select(chunk, rules, today) for chunk in chunks) if due)
+    if args.jobs > 1:
+        for payload in evaluate_parallel(chunks, args.jobs, today, rules, as_of=args.as_of):
+            write_decision(payload, sink)
+    else:
+        for chunk in chunks:
+            _, branches = evaluate_columns(columns_from_records(chunk), today=today, thresholds=rules)
+            emit_columns(chunk, branches, rules, sink=sink, as_of=args.as_of)
+    if index is not None:
+        sink.flush()
+        index.commit()
+        print(f"Incremental run: {index.selected} re-evaluated, {index.skipped} unchanged.")
+        index.close()
+
+
+if args.file.endswith(COLUMNAR_SUFFIX):
+    try:
+        portfolio = MappedPortfolio(args.file)
+    except ColumnarFormatError as exc:
+        parser.error(str(exc))
+    with portfolio:
+        evaluate_portfolio(portfolio.tables(args.chunk_size), portfolio.stats)
+elif args.file.endswith(".csv"):
+    stats = portfolio_stats(args.file, sidecar=args.stats_sidecar)
+    evaluate_portfolio(iter_portfolio_tables(args.file, stats["portfolio_late_rate_milli"], chunk_size=args.chunk_size), stats)
 else:
     with open(args.file, encoding="utf-8") as f:
         record = json.load(f)
@@ -39,4 +97,9 @@ else:
     if "portfolio_late_rate_milli" not in record and "portfolio_late_rate" in record:
         record["portfolio_late_rate_milli"] = int(round(float(record["portfolio_late_rate"]) * 1000))
 
-    evaluate(record)
+    evaluate(record, rules, sink=sink, as_of=args.as_of)
+
+sink.close()
+
+if args.profile:
+    print(metrics.format_profile())
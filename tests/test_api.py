@@ -0,0 +1,215 @@
+import asyncio
+import io
+import json
+from pathlib import Path
+import sys
+import zipfile
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.index as api_index
+from engine.ledger import iter_segment_bodies
+from engine.result_cache import DEFAULT_TTL_SECONDS, ResultCache
+from engine.verify import verify
+
+LEDGERS = [
+    {"tenant_id": "T-1", "due_date": "2024-01-01", "balance": 10.5,
+     "late_count_window": 3, "days_since_eligible_filing": 120, "portfolio_late_rate_milli": 0},
+    {"tenant_id": "T-2", "due_date": "2099-01-01", "balance": 0,
+     "late_count_window": 0, "days_since_eligible_filing": 0, "portfolio_late_rate_milli": 0},
+    {"tenant_id": "T-3", "due_date": "2024-01-01", "balance": 1,
+     "late_count_window": 0, "days_since_eligible_filing": 0, "portfolio_late_rate_milli": 900},
+]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr("engine.residue.utc_now_iso", lambda: "2024-12-01T00:00:00Z")
+    monkeypatch.setattr(api_index, "ARTIFACT_DIR", tmp_path / "artifacts")
+    monkeypatch.setattr(api_index, "_artifact_sink", None)
+    monkeypatch.setattr(api_index, "_packet_cache", None)
+    monkeypatch.setattr(api_index, "_result_cache", None)
+    yield TestClient(api_index.app)
+    if api_index._artifact_sink is not None:
+        api_index._artifact_sink.close()
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_ndjson_batch_matches_single_evaluations(client):
+    body = "\n".join(json.dumps(ledger) for ledger in LEDGERS[:2]) + "\nnot json\n\n" + json.dumps(LEDGERS[2])
+    response = client.post("/api/evaluate/batch?chunk_size=2", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = _lines(response)
+    assert lines[2] == {"row": 3, "error": "Line is not valid JSON"}
+    singles = [client.post("/api/evaluate", json=ledger).json() for ledger in LEDGERS]
+    assert [lines[i] for i in (0, 1, 3)] == singles
+    assert [line["payload"]["outputs"]["decision"] for line in singles] == [
+        "FILING_DELAY_REFUSED",
+        "NO_ACTION",
+        "ENFORCEMENT_REFUSED",
+    ]
+
+
+def test_csv_batch_persists_through_shared_sink(client, tmp_path):
+    body = (
+        "tenant_id,due_date,balance,is_late,late_count_window,days_since_eligible_filing\n"
+        "T-001,2024-10-01,150.50,true,2,95\n"
+        "T-002,not-a-date,0,false,0,0\n"
+        "T-003,2024-09-01,212.25,true,3,112\n"
+    )
+    response = client.post(
+        "/api/evaluate/batch?persist=true&portfolio_late_rate_milli=667",
+        content=body,
+        headers={"content-type": "text/csv"},
+    )
+    lines = _lines(response)
+    assert lines[1] == {"row": 2, "error": "due_date must be an ISO date"}
+    assert lines[0]["payload"]["context"]["portfolio_late_rate_milli"] == 667
+
+    persisted = [json.loads(body) for body in iter_segment_bodies(tmp_path / "artifacts" / api_index.STORE_NAME)]
+    assert persisted == [lines[0], lines[2]]
+
+
+def test_current_date_is_the_as_of_date(client):
+    single = client.post("/api/evaluate", json=dict(LEDGERS[0], current_date="2023-12-30")).json()
+    assert single["payload"]["outputs"]["decision"] == "NO_ACTION"
+    body = json.dumps(dict(LEDGERS[0], current_date="2023-12-30")) + "\n" + json.dumps(LEDGERS[0])
+    lines = _lines(client.post("/api/evaluate/batch?as_of=2024-06-01", content=body))
+    assert lines[0] == single
+    assert lines[1]["payload"]["outputs"]["decision"] == "FILING_DELAY_REFUSED"
+    assert client.post("/api/evaluate", json=dict(LEDGERS[0], current_date="soon")).status_code == 400
+
+
+def test_scoring_inputs_are_required(client):
+    record = {k: v for k, v in LEDGERS[0].items() if k != "portfolio_late_rate_milli"}
+    assert client.post("/api/evaluate", json=record).status_code == 422
+
+
+def test_malformed_due_date_is_rejected(client):
+    response = client.post("/api/evaluate", json=dict(LEDGERS[0], due_date="2024-13-01"))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "due_date must be an ISO date"
+
+
+def test_batch_as_of_date_is_recorded_for_replay(client, tmp_path):
+    body = "\n".join(json.dumps(ledger) for ledger in LEDGERS)
+    lines = _lines(client.post("/api/evaluate/batch?persist=true&as_of=2024-01-20", content=body))
+    assert [line["payload"]["context"]["current_date"] for line in lines] == ["2024-01-20"] * 3
+    single = client.post("/api/evaluate?persist=true", json=dict(LEDGERS[1], current_date="2024-01-20")).json()
+    assert single["payload"]["decision_id"] == lines[1]["payload"]["decision_id"]
+
+    *failures, summary = verify(tmp_path / "artifacts" / api_index.STORE_NAME)
+    assert failures == []
+    assert summary["receipts"] == summary["ok"] == 3
+
+
+def test_repeated_evaluate_returns_cached_receipt_and_persists_once(client, tmp_path, monkeypatch):
+    preview = client.post("/api/evaluate", json=LEDGERS[0]).json()
+    monkeypatch.setattr("engine.residue.utc_now_iso", lambda: "2024-12-02T00:00:00Z")
+    first = client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json()
+    retry = client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json()
+    assert preview == first == retry
+    assert api_index.result_cache().hits == 2
+
+    persisted = list(iter_segment_bodies(tmp_path / "artifacts" / api_index.STORE_NAME))
+    assert [json.loads(body) for body in persisted] == [first]
+
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_batch_stops_evaluating_when_client_disconnects(client, monkeypatch, spec_version):
+    evaluated = []
+    evaluate_chunk = api_index._evaluate_batch_chunk
+
+    def counting(items, *args):
+        evaluated.append(items)
+        return evaluate_chunk(items, *args)
+
+    monkeypatch.setattr(api_index, "_evaluate_batch_chunk", counting)
+    body = "\n".join(json.dumps(LEDGERS[i % 3]) for i in range(200)).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": spec_version},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": "/api/evaluate/batch",
+        "raw_path": b"/api/evaluate/batch",
+        "root_path": "",
+        "query_string": b"chunk_size=1",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # The client hangs up once the first line has arrived.
+        while not any(m["type"] == "http.response.body" and m.get("body") for m in sent):
+            await asyncio.sleep(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        await asyncio.sleep(0)
+
+    asyncio.run(api_index.app(scope, receive, send))
+    assert 0 < len(evaluated) < 200
+
+
+def test_persisting_retry_after_cache_expiry_is_not_duplicated(client, tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(api_index, "_result_cache", ResultCache(clock=lambda: now[0]))
+    first = client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json()
+    now[0] += DEFAULT_TTL_SECONDS + 1
+    retry = client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json()
+    assert retry["payload"]["decision_id"] == first["payload"]["decision_id"]
+    assert api_index.result_cache().misses == 2
+
+    persisted = list(iter_segment_bodies(tmp_path / "artifacts" / api_index.STORE_NAME))
+    assert [json.loads(body) for body in persisted] == [first]
+
+
+def test_judge_packet_streams_stored_receipts_for_tenant(client):
+    first = client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json()
+    client.post("/api/evaluate?persist=true", json=LEDGERS[1])
+    second = client.post("/api/evaluate?persist=true", json=dict(LEDGERS[0], balance=99)).json()
+    assert client.post("/api/evaluate?persist=true", json=LEDGERS[0]).json() == first
+
+    response = client.post("/api/judge-packet", json={"tenant_id": "T-1"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=T-1.zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zipf:
+        names = zipf.namelist()
+        ids = [first["payload"]["decision_id"], second["payload"]["decision_id"]]
+        assert names == [f"T-1_{did[:12]}.json" for did in ids] + ["manifest.json"]
+        assert [json.loads(zipf.read(name)) for name in names[:2]] == [first, second]
+        assert json.loads(zipf.read("manifest.json")) == {"tenant_id": "T-1", "decision_ids": ids}
+
+    assert client.get("/api/judge-packet/T-1").content == response.content
+    assert api_index.packet_cache().hits == 1
+    etag = response.headers["etag"]
+    assert client.get("/api/judge-packet/T-1", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/judge-packet/T-9").status_code == 404
+
+
+def test_metrics_endpoint_reports_engine_stages(client):
+    with client:
+        client.post("/api/evaluate", json=LEDGERS[0])
+        resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'rentguard_stage_calls_total{stage="rule_walk"}' in resp.text
+    assert "# TYPE rentguard_result_cache_misses_total counter\nrentguard_result_cache_misses_total 1" in resp.text
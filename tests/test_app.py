@@ -1,6 +1,8 @@
 import base64
 import hashlib
+import io
 import json
+from collections import OrderedDict
 from datetime import date
 from pathlib import Path
 import sys
@@ -12,16 +14,35 @@ if str(ROOT) not in sys.path:
 import pytest
 
 from backend.app import _build_pdf, _canonical_payload
+from backend.store import PdfStore
 from backend.validation import (
     MAX_SIGNATURE_BYTES,
     PayloadShapeError,
     SignatureError,
     ValidationError,
+    decode_signature,
+    normalize_signature,
     safe_filename_component,
+    sniff_image,
     validate_payload,
 )
 
 
+@pytest.fixture(autouse=True)
+def signin_db(monkeypatch, tmp_path):
+    import backend.app as backend_app
+
+    monkeypatch.setattr(backend_app, "SIGNIN_DB", tmp_path / "signins.sqlite3")
+    monkeypatch.setattr(backend_app, "_signin_store", None)
+    yield
+    if backend_app._signin_store is not None:
+        backend_app._signin_store.close()
+
+
+PNG_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAAEklEQVR42mP8z/C/HwAE/wJ/lrZBrgAAAABJRU5ErkJggg=="
+PNG_BYTES = base64.b64decode(PNG_BASE64)
+
+
 def _payload_with_workers(signature: str, sign_date: str | None = None):
     payload = {
         "project": "Test Project",
@@ -43,7 +64,7 @@ def test_missing_required_fields():
 
 
 def test_duplicate_worker_names_case_insensitive():
-    sig = base64.b64encode(b"sig").decode()
+    sig = PNG_BASE64
     payload = {
         "project": "Demo",
         "workers": [
@@ -56,12 +77,12 @@ def test_duplicate_worker_names_case_insensitive():
 
 
 def test_signature_with_data_url_prefix_decodes():
-    raw = base64.b64encode(b"signature-bytes").decode()
+    raw = PNG_BASE64
     payload = _payload_with_workers(f"data:image/png;base64,{raw}")
     project, sign_date, workers = validate_payload(payload)
     assert project == "Test Project"
     assert isinstance(sign_date, date)
-    assert workers[0]["signature_bytes"] == b"signature-bytes"
+    assert workers[0]["signature_bytes"] == PNG_BYTES
 
 
 def test_oversized_signature_rejected():
@@ -71,8 +92,35 @@ def test_oversized_signature_rejected():
         validate_payload(payload)
 
 
+def test_signature_type_and_size_checked_before_decoding():
+    with pytest.raises(SignatureError, match="maximum"):
+        decode_signature("A" * (10 * MAX_SIGNATURE_BYTES))
+    with pytest.raises(SignatureError, match="PNG or JPEG"):
+        decode_signature(base64.b64encode(b"GIF89a" + b"\0" * 64).decode())
+    with pytest.raises(SignatureError, match="dimensions"):
+        decode_signature(base64.b64encode(PNG_BYTES[:16] + (50_000).to_bytes(4, "big") * 2 + PNG_BYTES[24:]).decode())
+
+
+def test_sniff_and_normalize_signature_images():
+    from PIL import Image
+
+    rgba = Image.new("RGBA", (1200, 300), (0, 0, 0, 0))
+    rgba.paste((0, 0, 0, 255), (100, 100, 1100, 120))
+    jpeg, png = io.BytesIO(), io.BytesIO()
+    rgba.convert("RGB").save(jpeg, "JPEG")
+    rgba.save(png, "PNG")
+    assert sniff_image(jpeg.getvalue()) == ("JPEG", 1200, 300)
+    assert sniff_image(png.getvalue()) == ("PNG", 1200, 300)
+
+    normalized = normalize_signature(png.getvalue())
+    assert normalized == normalize_signature(png.getvalue())
+    image = Image.open(io.BytesIO(normalized))
+    assert (image.mode, image.size) == ("L", (600, 150))
+    assert image.getpixel((0, 0)) == 255 and image.getpixel((300, 55)) < 128
+
+
 def test_invalid_sign_date_rejected():
-    raw = base64.b64encode(b"sig").decode()
+    raw = PNG_BASE64
     payload = _payload_with_workers(raw, sign_date="2024-13-01")
     with pytest.raises(PayloadShapeError):
         validate_payload(payload)
@@ -84,7 +132,7 @@ def test_safe_filename_component_sanitizes():
 
 
 def test_workers_are_sorted_deterministically():
-    sig = base64.b64encode(b"sig").decode()
+    sig = PNG_BASE64
     payload = {
         "project": "Demo",
         "workers": [
@@ -104,6 +152,7 @@ def test_build_pdf_smoke(monkeypatch, tmp_path):
         {"name": "Bob", "signature_bytes": signature_bytes},
     ]
     monkeypatch.setattr("backend.app.OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr("backend.app._pdf_store", PdfStore(tmp_path))
     pdf_path = _build_pdf("Demo Project", date(2024, 1, 1), workers, artifact_id="abc123")
     assert pdf_path.exists()
     assert pdf_path.stat().st_size > 0
@@ -111,7 +160,7 @@ def test_build_pdf_smoke(monkeypatch, tmp_path):
 
 
 def test_canonical_payload_hash_is_stable():
-    sig = base64.b64encode(b"sig").decode()
+    sig = PNG_BASE64
     payload = _payload_with_workers(sig, sign_date="2024-01-15")
     project, sign_date, workers = validate_payload(payload)
     canonical_payload = _canonical_payload(project, sign_date, workers)
@@ -125,3 +174,119 @@ def test_canonical_payload_hash_is_stable():
     ).hexdigest()
     assert canonical_payload == canonical_payload_2
     assert artifact_id == artifact_id_2
+
+
+def test_signature_images_are_cached_and_embedded_once(monkeypatch, tmp_path):
+    from PIL import Image
+
+    import backend.app as backend_app
+    from backend.app import _signature_image
+
+    monkeypatch.setattr(backend_app, "_signature_cache", OrderedDict())
+    monkeypatch.setattr(backend_app, "_signature_cache_size", 0)
+
+    def png(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 10), color).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    red, blue = png("red"), png("blue")
+    first, size = _signature_image(red)
+    again, cached_size = _signature_image(red)
+    assert first is not again and size == cached_size == (40, 10)
+    assert len(backend_app._signature_cache) == 1
+
+    workers = [{"name": f"W{i}", "signature_bytes": red if i % 2 else blue} for i in range(6)]
+    monkeypatch.setattr("backend.app.OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr("backend.app._pdf_store", PdfStore(tmp_path))
+    pdf_bytes = _build_pdf("Demo Project", date(2024, 1, 1), workers).read_bytes()
+    assert pdf_bytes.count(b"/Subtype /Image") == 2
+
+
+def test_sign_job_mode_renders_in_background(monkeypatch, tmp_path):
+    import time
+
+    import backend.app as backend_app
+    from backend.jobs import RenderQueue
+
+    monkeypatch.setattr(backend_app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(backend_app, "_pdf_store", PdfStore(tmp_path))
+    monkeypatch.setattr(backend_app, "_render_queue", RenderQueue(workers=1, depth=4))
+    client = backend_app.app.test_client()
+    try:
+        payload = _payload_with_workers(PNG_BASE64, sign_date="2024-01-15")
+        resp = client.post("/sign?mode=job", json=payload)
+        assert resp.status_code == 202
+        body = resp.get_json()
+        assert body["steps"] == ["validated_payload", "render_queued"]
+        assert client.post("/sign?mode=job", json=payload).get_json()["artifact_id"] == body["artifact_id"]
+
+        for _ in range(200):
+            status = client.get(body["status_url"])
+            if status.status_code != 202:
+                break
+            time.sleep(0.05)
+        assert status.status_code == 200
+        assert status.mimetype == "application/pdf" and status.data.startswith(b"%PDF")
+        assert client.get(f"/sign/{'0' * 64}").status_code == 404
+        assert client.get("/sign/not-an-id").status_code == 400
+
+        # Once the store evicts the PDF, a retry renders it again.
+        for path in tmp_path.glob("*.pdf"):
+            path.unlink()
+        assert client.post("/sign?mode=job", json=payload).get_json()["steps"] == ["validated_payload", "render_queued"]
+        backend_app._render_queue.get(body["artifact_id"]).result(timeout=10)
+        assert client.get(body["status_url"]).status_code == 200
+    finally:
+        backend_app._render_queue.shutdown()
+
+
+def test_sign_reuses_stored_pdf(monkeypatch, tmp_path):
+    import backend.app as backend_app
+
+    monkeypatch.setattr(backend_app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(backend_app, "_pdf_store", PdfStore(tmp_path))
+    client = backend_app.app.test_client()
+    payload = _payload_with_workers(PNG_BASE64, sign_date="2024-01-15")
+
+    first = client.post("/sign", json=payload).get_json()
+    pdf_bytes = (tmp_path / first["pdf"]).read_bytes()
+    assert "pdf_generated" in first["steps"]
+    assert _build_pdf("Test Project", date(2024, 1, 15), validate_payload(payload)[2],
+                      artifact_id=first["artifact_id"]).read_bytes() == pdf_bytes
+
+    monkeypatch.setattr(backend_app, "_build_pdf", None)
+    second = client.post("/sign", json=payload).get_json()
+    assert "pdf_reused" in second["steps"] and second["pdf"] == first["pdf"]
+
+
+def test_today_signins_by_project(monkeypatch, tmp_path):
+    import backend.app as backend_app
+
+    monkeypatch.setattr(backend_app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(backend_app, "_pdf_store", PdfStore(tmp_path))
+    client = backend_app.app.test_client()
+    for project, names in (("North", ["Cy", "Ann"]), ("South", ["Bo", "Ann"])):
+        payload = {"project": project, "workers": [{"name": n, "signature": PNG_BASE64} for n in names]}
+        assert "signins_recorded" in client.post("/sign", json=payload).get_json()["steps"]
+
+    assert client.get("/today-signins").get_json()["workers"] == ["Ann", "Bo", "Cy"]
+    body = client.get("/today-signins?project=South").get_json()
+    assert (body["project"], body["workers"]) == ("South", ["Ann", "Bo"])
+
+
+def test_metrics_endpoint_reports_decode_and_render(monkeypatch, tmp_path):
+    import backend.app as backend_app
+    from engine import metrics
+
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    monkeypatch.setattr(backend_app, "_metrics_configured", False)
+    monkeypatch.setattr(backend_app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(backend_app, "_pdf_store", PdfStore(tmp_path))
+    client = backend_app.app.test_client()
+    assert not metrics.ENABLED
+    client.post("/sign", json=_payload_with_workers(PNG_BASE64, sign_date="2024-01-15"))
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'rentguard_stage_calls_total{stage="signature_decode"}' in text
+    assert 'rentguard_stage_calls_total{stage="pdf_render"}' in text
+    assert "rentguard_signature_cache_entries" in text
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from engine import batch
+from engine.batch import columns_from_records, emit_columns, evaluate_columns, rule_path
+from engine.rentguard import branch_for, days_between, evaluate, parse_due_date
+
+
+def _grid_records(today):
+    records = []
+    for i, days_late in enumerate((-3, 0, 5, 6, 40)):
+        for repeats in (0, 1, 2, 3):
+            for delay in (0, 90, 91, 200):
+                for rate in (0, 400, 401):
+                    records.append({
+                        "tenant_id": f"T-{i}-{repeats}-{delay}-{rate}",
+                        "due_date": (today - timedelta(days=days_late)).isoformat(),
+                        "late_count_window": repeats,
+                        "days_since_eligible_filing": delay,
+                        "portfolio_late_rate_milli": rate,
+                    })
+    return records
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_branch_codes_match_per_record_tree(monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(batch, "numpy", None)
+    today = date(2024, 12, 1)
+    records = _grid_records(today)
+    days_late, branches = evaluate_columns(columns_from_records(records), today=today)
+    for record, late, branch in zip(records, days_late, branches):
+        expected_late = days_between(parse_due_date(record["due_date"]), today)
+        assert late == expected_late
+        assert branch == branch_for(record, expected_late)
+
+
+def test_evaluate_uses_explicit_as_of_date(tmp_path):
+    as_of = date(2024, 12, 1)
+    records = _grid_records(as_of)
+    _, branches = evaluate_columns(columns_from_records(records), today=as_of)
+    for record, branch in zip(records[::7], branches[::7]):
+        envelope = evaluate(record, persist=False, as_of=as_of)
+        assert envelope["payload"]["gates"]["rule_path"] == rule_path(branch)
+
+
+def test_rule_path_for_delay_block():
+    today = date(2024, 12, 1)
+    record = _grid_records(today)[-1]
+    record.update({"late_count_window": 3, "days_since_eligible_filing": 200, "portfolio_late_rate_milli": 0})
+    _, branches = evaluate_columns(columns_from_records([record]), today=today)
+    assert rule_path(branches[0]) == ["RG-MASS-ANOMALY", "RG-LATE-X", "RG-REPEAT-Y", "RG-DELAY-BLOCK"]
+
+
+def test_emitted_artifacts_match_per_record_path(monkeypatch, tmp_path):
+    records = _grid_records(date.today())
+
+    serial_dir = tmp_path / "serial"
+    monkeypatch.setattr("engine.residue.ARTIFACT_DIR", serial_dir)
+    for record in records:
+        evaluate(dict(record))
+
+    batch_dir = tmp_path / "batch"
+    monkeypatch.setattr("engine.residue.ARTIFACT_DIR", batch_dir)
+    _, branches = evaluate_columns(columns_from_records(records))
+    emit_columns(records, branches)
+
+    serial_names = sorted(p.name for p in serial_dir.iterdir())
+    assert serial_names == sorted(p.name for p in batch_dir.iterdir())
+    assert len(serial_names) == len(records)
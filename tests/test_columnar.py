@@ -0,0 +1,67 @@
+import pickle
+from datetime import date
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.batch import build_columns, columns_from_records, evaluate_columns
+from engine.columnar import ColumnarFormatError, MappedPortfolio, StaleColumnarError, convert
+from engine.ingest import iter_portfolio, portfolio_stats
+
+TODAY = date(2024, 12, 1)
+
+
+def _write_portfolio(path, n):
+    rows = ["tenant_id,due_date,balance,is_late,late_count_window,days_since_eligible_filing"]
+    rows += [f"T-{i}-é,2024-{1 + i % 12:02d}-01,10,{'true' if i % 3 else 'false'},{i % 4},{i * 11}" for i in range(n)]
+    path.write_text("\n".join(rows) + "\n\n", encoding="utf-8")
+
+
+def test_mapped_portfolio_matches_csv(tmp_path):
+    csv_path = tmp_path / "portfolio.csv"
+    _write_portfolio(csv_path, 25)
+    out = convert(str(csv_path), chunk_size=7)
+    assert out == tmp_path / "portfolio.rgc"
+
+    with MappedPortfolio(str(out)) as portfolio:
+        assert portfolio.stats == portfolio_stats(str(csv_path))
+        tables = list(portfolio.tables(10))
+        chunks = list(iter_portfolio(str(csv_path), chunk_size=10))
+        assert [list(t) for t in tables] == chunks
+        for table, chunk in zip(tables, chunks):
+            days_late, branches = evaluate_columns(table, today=TODAY)
+            assert (days_late, branches) == evaluate_columns(columns_from_records(chunk), today=TODAY)
+            assert build_columns(table, branches) == build_columns(chunk, branches)
+        assert list(pickle.loads(pickle.dumps(tables[1]))) == chunks[1]
+        del tables, table
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bogus.rgc"
+    path.write_bytes(b"tenant_id,due_date\n" * 4)
+    with pytest.raises(ColumnarFormatError):
+        MappedPortfolio(str(path))
+
+
+def test_refuses_file_older_than_its_csv(tmp_path):
+    csv_path = tmp_path / "portfolio.csv"
+    _write_portfolio(csv_path, 5)
+    out = convert(str(csv_path))
+    with MappedPortfolio(str(out)) as portfolio:
+        assert len(portfolio) == 5
+
+    _write_portfolio(csv_path, 6)
+    with pytest.raises(StaleColumnarError):
+        MappedPortfolio(str(out))
+    with MappedPortfolio(str(out), check_source=False) as portfolio:
+        assert len(portfolio) == 5
+
+    csv_path.unlink()
+    with MappedPortfolio(str(out)) as portfolio:
+        list(portfolio.tables(2))
+    assert portfolio._map.closed
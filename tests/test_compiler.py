@@ -0,0 +1,48 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from compiler.compiler import DSLError, build_kernel, compile_kernel, compute_hash, parse_condition
+from engine.kernel import load_kernel
+
+
+def test_rentguard_kernel_chains_rules():
+    kernel = load_kernel("RentGuard")
+    assert kernel.evaluate({"late_days": 4, "notice_sent": False}) == {"status": "LATE", "action": "EMIT_NOTICE"}
+    assert kernel.evaluate({"late_days": 4, "notice_sent": True}) == {"status": "LATE"}
+    assert kernel.evaluate({"late_days": 3, "notice_sent": False}) == {}
+    assert kernel.evaluate({}) == {}
+
+
+def test_columns_match_scalar_evaluation():
+    kernel = load_kernel("ValuGuard")
+    rows = [
+        {"volatility": 5, "threshold": 3, "liquidity": 0},
+        {"volatility": 5, "threshold": 3, "liquidity": 1},
+        {"volatility": 2, "threshold": 3, "liquidity": 0},
+    ]
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    result = kernel.evaluate_columns(columns)
+    assert result["flag"] == [kernel.evaluate(row).get("flag") for row in rows]
+    assert result["flag"] == ["ILLUSORY_LIQUIDITY", None, None]
+
+
+def test_compiled_kernels_are_cached_by_hash():
+    sysdna = {"id": "K", "version": "1", "status": "ACTIVE", "rules": [{"if": "x >= 2 OR NOT (y == 1)", "then": "z = 7"}]}
+    kernel = build_kernel(sysdna)
+    compiled = compile_kernel(kernel)
+    assert compile_kernel(build_kernel(dict(sysdna))) is compiled
+    assert compiled.kernel_hash == compute_hash(kernel)
+    assert compiled.evaluate({"x": 0, "y": 1}) == {}
+    assert compiled.evaluate({"x": 0, "y": 2}) == {"z": 7}
+
+
+@pytest.mark.parametrize("text", ["late_days >", "(a == 1", "a == 1 b", "AND a", "a ~ 1"])
+def test_malformed_conditions_raise(text):
+    with pytest.raises(DSLError):
+        parse_condition(text)
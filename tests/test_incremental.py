@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.incremental import TransitionIndex
+from engine.rentguard import BRANCH_NOTICE, BRANCH_OK, branch_for, days_between, parse_due_date, transition_date
+from engine.rules import DEFAULT_RULES
+
+TODAY = date(2024, 12, 1)
+RECORDS = [
+    {"tenant_id": "T-1", "due_date": "2024-11-29", "late_count_window": 0, "days_since_eligible_filing": 0,
+     "portfolio_late_rate_milli": 100},
+    {"tenant_id": "T-2", "due_date": "2024-10-01", "late_count_window": 3, "days_since_eligible_filing": 95,
+     "portfolio_late_rate_milli": 100},
+    {"tenant_id": "T-3", "due_date": "2024-11-30", "late_count_window": 0, "days_since_eligible_filing": 0,
+     "portfolio_late_rate_milli": 900},
+]
+
+
+def _ids(records):
+    return [record["tenant_id"] for record in records]
+
+
+def test_transition_date_is_the_day_the_branch_flips():
+    record = RECORDS[0]
+    flip = transition_date(record, DEFAULT_RULES)
+    assert flip == date(2024, 12, 5)
+    due = parse_due_date(record["due_date"])
+    assert branch_for(record, days_between(due, flip - timedelta(days=1)), DEFAULT_RULES) == BRANCH_OK
+    assert branch_for(record, days_between(due, flip), DEFAULT_RULES) == BRANCH_NOTICE
+    assert transition_date(RECORDS[2], DEFAULT_RULES) is None
+
+
+def test_only_changed_or_transitioning_tenants_are_selected(tmp_path):
+    path = tmp_path / "state.sqlite"
+    with TransitionIndex(path) as index:
+        assert _ids(index.select(RECORDS, DEFAULT_RULES, TODAY)) == ["T-1", "T-2", "T-3"]
+        index.commit()
+
+    with TransitionIndex(path) as index:
+        assert index.next_transition() == date(2024, 12, 5)
+        assert index.select(RECORDS, DEFAULT_RULES, TODAY + timedelta(days=3)) == []
+        changed = [RECORDS[0], dict(RECORDS[1], late_count_window=4), RECORDS[2]]
+        assert _ids(index.select(changed, DEFAULT_RULES, TODAY + timedelta(days=3))) == ["T-2"]
+        index.commit()
+
+        assert index.due(TODAY + timedelta(days=4)) == ["T-1"]
+        assert _ids(index.select(changed, DEFAULT_RULES, TODAY + timedelta(days=4))) == ["T-1"]
+        index.commit()
+        assert index.due(TODAY + timedelta(days=30)) == []
+        assert index.select(changed, DEFAULT_RULES, TODAY + timedelta(days=30)) == []
+
+        stricter = DEFAULT_RULES.replace(X_DAYS_LATE=3)
+        assert len(index.select(changed, stricter, TODAY + timedelta(days=30))) == 3
+        assert (index.selected, index.skipped) == (5, 10)
@@ -0,0 +1,51 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from engine.ingest import iter_portfolio, load_portfolio, portfolio_stats, scan_portfolio
+
+CSV = """tenant_id,due_date,balance,is_late,late_count_window,days_since_eligible_filing
+T-001,2024-10-01,150.50,true,2,95
+T-002,2024-11-01,0,false,0,0
+
+T-003,2024-09-01,212.25,TRUE,3,112
+T-004,2024-09-15,10,,1,4
+"""
+
+
+@pytest.fixture
+def portfolio_csv(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_scan_matches_full_load(portfolio_csv):
+    stats = scan_portfolio(portfolio_csv)
+    records = load_portfolio(portfolio_csv)
+    assert stats["rows"] == len(records) == 4
+    assert stats["late"] == 2
+    assert stats["portfolio_late_rate_milli"] == records[0]["portfolio_late_rate_milli"] == 500
+
+
+def test_iter_portfolio_chunks_reproduce_load(portfolio_csv):
+    chunks = list(iter_portfolio(portfolio_csv, chunk_size=3))
+    assert [len(c) for c in chunks] == [3, 1]
+    assert [r for c in chunks for r in c] == load_portfolio(portfolio_csv)
+
+
+def test_sidecar_reused_until_csv_changes(portfolio_csv):
+    first = portfolio_stats(portfolio_csv, sidecar=True)
+    assert Path(portfolio_csv + ".stats.json").exists()
+    assert portfolio_stats(portfolio_csv, sidecar=True) == first
+
+    with open(portfolio_csv, "a", encoding="utf-8") as f:
+        f.write("T-005,2024-09-20,10,true,1,4\n")
+    updated = portfolio_stats(portfolio_csv, sidecar=True)
+    assert updated["rows"] == 5
+    assert updated["late"] == 3
@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from backend.jobs import QueueFullError, RenderQueue
+
+
+def test_render_queue_is_bounded_and_keyed():
+    queue = RenderQueue(workers=1, depth=1)
+    try:
+        slow = queue.submit("a", time.sleep, 0.3)
+        assert queue.submit("a", time.sleep, 0.3) is slow
+        with pytest.raises(QueueFullError):
+            queue.submit("b", time.sleep, 0)
+        slow.result(timeout=10)
+        for _ in range(100):
+            if not queue.pending:
+                break
+            time.sleep(0.01)
+        assert queue.submit("b", time.sleep, 0).result(timeout=10) is None
+        assert queue.get("a") is slow
+    finally:
+        queue.shutdown()
+
+
+def test_finished_job_is_resubmitted_when_result_is_rejected():
+    queue = RenderQueue(workers=1, depth=2)
+    try:
+        first = queue.submit("a", str, 1)
+        assert first.result(timeout=10) == "1"
+        assert queue.submit("a", str, 1, reuse_if=lambda result: True) is first
+        again = queue.submit("a", str, 2, reuse_if=lambda result: False)
+        assert again is not first and again.result(timeout=10) == "2"
+        assert queue.get("a") is again
+    finally:
+        queue.shutdown()
@@ -0,0 +1,70 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.ledger import Ledger, LedgerSink
+from engine.rentguard import evaluate
+
+
+def _record(i, tenant=None):
+    return {
+        "tenant_id": tenant or f"T-{i}",
+        "due_date": f"2024-01-{1 + i % 28:02d}",
+        "late_count_window": i % 4,
+        "days_since_eligible_filing": i,
+        "portfolio_late_rate_milli": 100,
+    }
+
+
+def test_point_lookup_and_tenant_history(tmp_path):
+    with LedgerSink(Ledger(tmp_path, segment_bytes=4096, flush_every=7)) as sink:
+        envelopes = [evaluate(_record(i, tenant="T-A" if i % 3 == 0 else None), sink=sink) for i in range(40)]
+
+    with Ledger(tmp_path) as ledger:
+        assert len(ledger.segments()) > 1
+        assert len(ledger) == 40
+        for envelope in envelopes:
+            assert ledger.get(envelope["payload"]["decision_id"]) == envelope
+        history = ledger.tenant_history("T-A")
+        assert history == [e for e in envelopes if e["payload"]["outputs"]["tenant_id"] == "T-A"]
+        assert list(ledger.scan()) == envelopes
+        assert ledger.get("0" * 64) is None
+
+
+def test_recovers_unindexed_and_torn_tail(tmp_path):
+    ledger = Ledger(tmp_path, flush_every=1000)
+    sink = LedgerSink(ledger)
+    envelopes = [evaluate(_record(i), sink=sink) for i in range(5)]
+    # Simulate a crash: segment bytes reach disk, index rows do not, and a
+    # partial record is left at the end of the segment.
+    ledger._handle.write(b"\x00\x00\x01\x00{\"partial")
+    ledger._handle.flush()
+    ledger._pending = []
+    ledger._db.close()
+    ledger._handle.close()
+
+    with Ledger(tmp_path) as reopened:
+        assert len(reopened) == 5
+        assert reopened.get(envelopes[-1]["payload"]["decision_id"]) == envelopes[-1]
+        extra = evaluate(_record(99), sink=LedgerSink(reopened))
+        assert list(reopened.scan()) == envelopes + [extra]
+
+
+def test_two_writers_share_one_ledger(tmp_path):
+    first = Ledger(tmp_path, segment_bytes=2048, flush_every=5)
+    second = Ledger(tmp_path, segment_bytes=2048, flush_every=3)
+    envelopes = []
+    for i in range(30):
+        envelopes.append(evaluate(_record(i), sink=LedgerSink(first if i % 2 else second)))
+    assert not first.append_once("{}", envelopes[0]["payload"]["decision_id"], "T-0")
+    first.close()
+    second.close()
+
+    with Ledger(tmp_path) as ledger:
+        assert len(ledger.segments()) > 1
+        assert len(ledger) == 30
+        for envelope in envelopes:
+            assert ledger.get(envelope["payload"]["decision_id"]) == envelope
@@ -0,0 +1,92 @@
+import hashlib
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.merkle import (
+    ChainedSink,
+    MerkleLog,
+    audit_epoch,
+    chain_hash,
+    leaf_hash,
+    node_hash,
+    prove,
+    verify_inclusion,
+    verify_proof,
+)
+from engine.rentguard import evaluate
+from engine.sink import BufferedSink
+
+
+def _did(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def _reference_root(leaves):
+    if len(leaves) == 1:
+        return leaves[0]
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return node_hash(_reference_root(leaves[:k]), _reference_root(leaves[k:]))
+
+
+def test_roots_and_proofs_for_every_size(tmp_path):
+    log = MerkleLog(tmp_path / "epoch")
+    leaves = []
+    for n in range(1, 34):
+        leaves.append(leaf_hash(_did(n)))
+        log.append(leaves[-1])
+        if n % 5 == 0:
+            log.flush()
+        root = log.root()
+        assert root == _reference_root(leaves)
+        for i in range(n):
+            assert verify_inclusion(leaves[i], i, n, log.inclusion_proof(i), root)
+        assert not verify_inclusion(leaf_hash(_did(-1)), 0, n, log.inclusion_proof(0), root)
+
+
+def test_persisted_log_reopens_and_discards_unflushed_nodes(tmp_path):
+    log = MerkleLog(tmp_path)
+    for i in range(11):
+        log.append(leaf_hash(_did(i)))
+    log.flush()
+    root, head = log.root(), log.chain_head
+    # Crash after a level write but before the frontier moves.
+    with open(tmp_path / "level-00.bin", "ab") as f:
+        f.write(leaf_hash(_did(99)))
+    reopened = MerkleLog(tmp_path)
+    assert reopened.size == 11
+    assert reopened.root() == root
+    assert reopened.chain_head == head
+    reopened.append(leaf_hash(_did(11)))
+    assert reopened.root() == _reference_root([leaf_hash(_did(i)) for i in range(12)])
+
+
+def test_chained_sink_proves_emitted_receipts(tmp_path):
+    record = {
+        "due_date": "2024-01-01",
+        "late_count_window": 3,
+        "days_since_eligible_filing": 10,
+        "portfolio_late_rate_milli": 100,
+    }
+    days = iter(["2024-12-01"] * 6 + ["2024-12-02"] * 4)
+    chained = ChainedSink(BufferedSink(tmp_path / "artifacts", progress=None), tmp_path / "chain", clock=lambda: next(days))
+    with chained:
+        envelopes = [evaluate(dict(record, tenant_id=f"T-{i}"), sink=chained) for i in range(10)]
+
+    ids = [e["payload"]["decision_id"] for e in envelopes]
+    proof = prove(tmp_path / "chain", "2024-12-01", ids[4])
+    assert proof["tree_size"] == 6
+    assert verify_proof(proof)
+    assert not verify_proof(proof, decision_id=ids[7])
+    assert audit_epoch(tmp_path / "chain", "2024-12-02", ids[6:])
+    assert not audit_epoch(tmp_path / "chain", "2024-12-02", ids[6:9] + ids[:1])
+
+    day_one = MerkleLog(tmp_path / "chain" / "2024-12-01")
+    day_two = MerkleLog(tmp_path / "chain" / "2024-12-02")
+    head = day_one.chain_head
+    for did in ids[6:]:
+        head = chain_hash(head, leaf_hash(did))
+    assert day_two.chain_head == head
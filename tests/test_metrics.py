@@ -0,0 +1,63 @@
+from datetime import date
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from engine import metrics
+from engine.batch import emit_columns, evaluate_columns
+from engine.sink import BufferedSink
+from engine.table import TenantTable
+
+
+@pytest.fixture
+def recording():
+    was_enabled = metrics.ENABLED
+    metrics.reset()
+    yield
+    metrics.enable(was_enabled)
+    metrics.reset()
+
+
+def _table(n):
+    return TenantTable.from_records(
+        {
+            "tenant_id": f"T-{i}",
+            "due_date": "2024-10-01",
+            "late_count_window": i % 3,
+            "days_since_eligible_filing": 100,
+            "portfolio_late_rate_milli": 200,
+        }
+        for i in range(n)
+    )
+
+
+def test_disabled_metrics_record_nothing(recording, tmp_path):
+    metrics.enable(False)
+    table = _table(5)
+    with BufferedSink(tmp_path, progress=None) as sink:
+        emit_columns(table, evaluate_columns(table, today=date(2024, 12, 1))[1], sink=sink)
+    assert metrics.snapshot() == {"stages": {}, "counters": {}}
+
+
+def test_stages_and_counters_are_recorded_and_rendered(recording, tmp_path):
+    metrics.enable()
+    table = _table(5)
+    with BufferedSink(tmp_path, progress=None) as sink:
+        emit_columns(table, evaluate_columns(table, today=date(2024, 12, 1))[1], sink=sink)
+
+    data = metrics.snapshot()
+    assert data["counters"] == {"records_evaluated": 5, "artifacts_written": 5}
+    assert data["stages"]["rule_walk"]["calls"] == 1
+    assert data["stages"]["sha256"]["calls"] == 5
+    assert data["stages"]["artifact_write"]["calls"] == 5
+
+    text = metrics.render_prometheus({"packet_cache_hits": 2})
+    assert 'rentguard_stage_calls_total{stage="sha256"} 5' in text
+    assert "# TYPE rentguard_records_evaluated_total counter\nrentguard_records_evaluated_total 5" in text
+    assert "rentguard_packet_cache_hits 2" in text
+    assert metrics.format_profile().splitlines()[1].startswith("date_math")
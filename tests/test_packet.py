@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.packet import PacketCache, packet_key
+
+
+def test_packet_key_ignores_order():
+    assert packet_key(["b" * 64, "a" * 64]) == packet_key(["a" * 64, "b" * 64])
+    assert packet_key(["a" * 64]) != packet_key(["a" * 64, "b" * 64])
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PacketCache(memory_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    cache = PacketCache(tmp_path, memory_bytes=0, disk_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    os.utime(tmp_path / "a.zip", (1, 1))
+    cache.put("c", b"cccc")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.zip", "c.zip"]
+
+    reopened = PacketCache(tmp_path, memory_bytes=0, disk_bytes=10)
+    assert reopened.get("b") == b"bbbb"
+    assert reopened.get("a") is None
+
+
+def test_tee_caches_only_complete_packets_within_budget(tmp_path):
+    cache = PacketCache(tmp_path, memory_bytes=4, disk_bytes=8)
+    assert b"".join(cache.tee("k", [b"abc", b"def"])) == b"abcdef"
+    assert cache.get("k") == b"abcdef"
+    assert b"".join(cache.tee("big", [b"x" * 5, b"y" * 5])) == b"x" * 5 + b"y" * 5
+    assert cache.get("big") is None
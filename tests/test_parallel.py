@@ -0,0 +1,54 @@
+from datetime import date
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.batch import columns_from_records, emit_columns, evaluate_columns
+from engine.parallel import evaluate_parallel
+from engine.residue import write_decision
+from engine.rules import DEFAULTS
+
+
+def _records(n):
+    return [
+        {
+            "tenant_id": f"T-{i:03d}",
+            "due_date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "late_count_window": i % 4,
+            "days_since_eligible_filing": (i * 37) % 150,
+            "portfolio_late_rate_milli": 250,
+        }
+        for i in range(n)
+    ]
+
+
+def _snapshot(directory):
+    return [(p.name, p.read_bytes()) for p in sorted(directory.iterdir())]
+
+
+def test_parallel_run_is_byte_identical_to_serial(monkeypatch, tmp_path):
+    monkeypatch.setattr("engine.residue.utc_now_iso", lambda: "2024-12-01T00:00:00Z")
+    records = _records(57)
+    chunks = [records[i:i + 10] for i in range(0, len(records), 10)]
+    today = date(2024, 12, 1)
+    thresholds = dict(DEFAULTS, X_DAYS_LATE=30)
+
+    serial_dir = tmp_path / "serial"
+    monkeypatch.setattr("engine.residue.ARTIFACT_DIR", serial_dir)
+    for chunk in chunks:
+        _, branches = evaluate_columns(columns_from_records(chunk), today=today, thresholds=thresholds)
+        emit_columns(chunk, branches, thresholds)
+    serial_order = [r["tenant_id"] for r in records]
+
+    parallel_dir = tmp_path / "parallel"
+    monkeypatch.setattr("engine.residue.ARTIFACT_DIR", parallel_dir)
+    parallel_order = []
+    for payload in evaluate_parallel(iter(chunks), 3, today, thresholds):
+        write_decision(payload)
+        parallel_order.append(payload["outputs"]["tenant_id"])
+
+    assert parallel_order == serial_order
+    assert _snapshot(parallel_dir) == _snapshot(serial_dir)
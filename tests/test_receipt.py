@@ -0,0 +1,45 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.receipt import canonical_json, decision_id_for
+from engine.rentguard import BRANCHES, build_branch
+from engine.residue import envelope_for, envelope_json
+from engine.rules import DEFAULTS
+
+CONTEXTS = [
+    {
+        "tenant_id": "T-001",
+        "due_date": "2024-10-01",
+        "late_count_window": 2,
+        "days_since_eligible_filing": 95,
+        "portfolio_late_rate_milli": 667,
+    },
+    {
+        "tenant_id": "Ténant \"Ω\" 7",
+        "due_date": "2024-10-01",
+        "balance": 150.5,
+        "current_date": None,
+        "no_notice_sent": True,
+        "late_count_window": 0,
+        "days_since_eligible_filing": 0,
+        "portfolio_late_rate_milli": 0,
+    },
+]
+
+
+def test_encoded_payload_is_byte_identical_to_canonical_json():
+    for thresholds in (DEFAULTS, dict(DEFAULTS, X_DAYS_LATE=12, N_PORTFOLIO_RATE_MILLI=999)):
+        for context in CONTEXTS:
+            for branch in range(len(BRANCHES)):
+                core = build_branch(context, branch, thresholds)
+                plain = dict(core)
+                assert core.canonical == canonical_json(plain)
+                assert core["decision_id"] == decision_id_for(plain | {"decision_id": ""})
+
+                envelope = envelope_for(core)
+                expected = {"timestamp_utc": envelope["timestamp_utc"], "payload": plain}
+                assert envelope_json(envelope) == canonical_json(expected)
@@ -0,0 +1,39 @@
+from datetime import date
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.result_cache import ResultCache, evaluation_key
+from engine.rules import DEFAULTS
+
+RECORD = {"tenant_id": "T-1", "due_date": "2024-01-01", "balance": 10.5}
+ENVELOPE = {"payload": {"decision_id": "ab" * 32}, "timestamp_utc": "2024-12-01T00:00:00Z"}
+
+
+def test_key_covers_input_thresholds_and_as_of():
+    key = evaluation_key(RECORD, DEFAULTS, date(2024, 12, 1))
+    assert key == evaluation_key(dict(reversed(list(RECORD.items()))), DEFAULTS, date(2024, 12, 1))
+    assert key != evaluation_key(dict(RECORD, balance=11), DEFAULTS, date(2024, 12, 1))
+    assert key != evaluation_key(RECORD, dict(DEFAULTS, X_DAYS_LATE=6), date(2024, 12, 1))
+    assert key != evaluation_key(RECORD, DEFAULTS, date(2024, 12, 2))
+
+
+def test_memory_tier_is_lru_with_ttl():
+    now = [0.0]
+    cache = ResultCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", ENVELOPE, persisted=False)
+    cache.put("b", ENVELOPE, persisted=True)
+    assert cache.get("a")["persisted"] is False
+    cache.put("c", ENVELOPE, persisted=False)
+    assert cache.get("b") is None
+    now[0] = 10
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    ResultCache(tmp_path).put("k", ENVELOPE, persisted=True)
+    entry = ResultCache(tmp_path).get("k")
+    assert entry["envelope"] == ENVELOPE and entry["persisted"] is True
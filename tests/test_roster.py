@@ -0,0 +1,33 @@
+from datetime import date
+from pathlib import Path
+import sqlite3
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.roster import SigninStore
+
+
+def test_roster_batches_persists_and_prunes(tmp_path):
+    path = tmp_path / "signins.sqlite3"
+    today = date(2024, 3, 31)
+    store = SigninStore(path, retention_days=30, batch_size=4, flush_interval=60, today=lambda: today)
+    store.record(date(2024, 1, 1), "Old", ["Zed"])
+    store.record(today, "North", ["Cy", "Ann"])
+    store.record(today, "South", ["Ann"])
+    store.record(today, "South", ["Bo", "Ann"])
+
+    # The first four names were committed as one batch, pruning the old one;
+    # the last two are pending.
+    count = sqlite3.connect(str(path)).execute("SELECT COUNT(*) FROM signins").fetchone()[0]
+    assert count == 3
+    assert store.names(today) == ["Ann", "Bo", "Cy"]
+    assert store.names(today, "South") == ["Ann", "Bo"]
+    store.close()
+
+    reopened = SigninStore(path, today=lambda: today)
+    assert reopened.names(today, "North") == ["Ann", "Cy"]
+    assert reopened.names(date(2024, 1, 1)) == []
+    reopened.close()
@@ -0,0 +1,45 @@
+import pickle
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from engine import rules
+from engine.receipt import canonical_json, sha256_hex
+from engine.rentguard import BRANCH_NOTICE, build_branch
+from engine.rules import DEFAULT_RULES, DEFAULTS, RuleSet, active_rules
+
+CONTEXT = {"tenant_id": "T-1", "due_date": "2024-01-01", "late_count_window": 0,
+           "days_since_eligible_filing": 0, "portfolio_late_rate_milli": 100}
+
+
+def test_ruleset_is_frozen_hashable_and_precomputed():
+    strict = DEFAULT_RULES.replace(X_DAYS_LATE=3)
+    assert strict["X_DAYS_LATE"] == 3 and DEFAULT_RULES == DEFAULTS
+    assert strict == RuleSet({"X_DAYS_LATE": 3}) and hash(strict) == hash(RuleSet(X_DAYS_LATE=3))
+    assert strict.canonical == canonical_json(dict(strict))
+    assert strict.digest == sha256_hex(strict.canonical)
+    assert pickle.loads(pickle.dumps(strict)).digest == strict.digest
+    with pytest.raises(TypeError):
+        strict["X_DAYS_LATE"] = 9
+    with pytest.raises(ValueError):
+        RuleSet(UNKNOWN=1)
+
+
+def test_active_rules_tracks_configure(monkeypatch):
+    monkeypatch.setattr(rules, "ACTIVE", dict(DEFAULTS))
+    assert active_rules() is active_rules() == DEFAULT_RULES
+    rules.configure({"Y_REPEAT": 4})
+    assert active_rules()["Y_REPEAT"] == 4
+
+
+def test_receipts_embed_the_ruleset_and_match_plain_dicts():
+    strict = RuleSet(X_DAYS_LATE=12)
+    core = build_branch(CONTEXT, BRANCH_NOTICE, strict)
+    assert core["thresholds"] is strict
+    assert core["decision_id"] == build_branch(CONTEXT, BRANCH_NOTICE, dict(strict))["decision_id"]
+    assert core["decision_id"] != build_branch(CONTEXT, BRANCH_NOTICE, DEFAULT_RULES)["decision_id"]
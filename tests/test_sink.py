@@ -0,0 +1,72 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.rentguard import evaluate
+from engine.sink import BufferedSink, DirectorySink, iter_batch_files, read_batch
+
+
+def _record(i):
+    return {
+        "tenant_id": f"T-{i}",
+        "due_date": "2024-01-01",
+        "late_count_window": 3,
+        "days_since_eligible_filing": 10,
+        "portfolio_late_rate_milli": 100,
+    }
+
+
+def test_buffered_sink_batches_and_reports_in_aggregate(monkeypatch, tmp_path):
+    monkeypatch.setattr("engine.residue.utc_now_iso", lambda: "2024-12-01T00:00:00Z")
+    messages = []
+    with BufferedSink(tmp_path / "batched", batch_size=4, progress=messages.append) as sink:
+        batched = [evaluate(_record(i), sink=sink) for i in range(10)]
+
+    files = list(iter_batch_files(tmp_path / "batched"))
+    assert [seq for seq, _ in files] == [1, 2, 3]
+    assert [env for _, path in files for env in read_batch(path)] == batched
+    assert len(messages) == 3
+    assert messages[-1].startswith("Artifacts written: 10")
+
+
+def test_buffered_lines_match_directory_files(monkeypatch, tmp_path):
+    monkeypatch.setattr("engine.residue.utc_now_iso", lambda: "2024-12-01T00:00:00Z")
+    directory = DirectorySink(tmp_path / "files", progress=None)
+    with BufferedSink(tmp_path / "batched", batch_size=100, progress=None) as buffered:
+        for i in range(3):
+            evaluate(_record(i), sink=directory)
+            evaluate(_record(i), sink=buffered)
+
+    file_bodies = sorted(p.read_text(encoding="utf-8") for p in (tmp_path / "files").iterdir())
+    (_, batch_path), = iter_batch_files(tmp_path / "batched")
+    assert sorted(batch_path.read_text(encoding="utf-8").splitlines()) == file_bodies
+
+
+def test_new_sink_continues_sequence(tmp_path):
+    with BufferedSink(tmp_path, batch_size=1, progress=None) as sink:
+        sink.write("a.json", "{}")
+    with BufferedSink(tmp_path, batch_size=1, progress=None) as sink:
+        sink.write("b.json", "{}")
+    assert [seq for seq, _ in iter_batch_files(tmp_path)] == [1, 2]
+
+
+def test_taken_batch_name_is_skipped_without_leaving_files(tmp_path):
+    with BufferedSink(tmp_path, batch_size=1, progress=None) as sink:
+        # Another writer publishes the name this sink would claim next.
+        (tmp_path / "batch-00000001.ndjson").write_text("{}\n", encoding="utf-8")
+        sink.write("a.json", '{"a":1}')
+    assert [(seq, path.read_text(encoding="utf-8")) for seq, path in iter_batch_files(tmp_path)] == [
+        (1, "{}\n"),
+        (2, '{"a":1}\n'),
+    ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["batch-00000001.ndjson", "batch-00000002.ndjson"]
+
+
+def test_evaluate_without_persist_writes_nothing(monkeypatch, tmp_path):
+    monkeypatch.setattr("engine.residue.ARTIFACT_DIR", tmp_path / "artifacts")
+    envelope = evaluate(_record(1), persist=False)
+    assert envelope["payload"]["outputs"]["decision"] == "NOTICE_MANDATED"
+    assert not (tmp_path / "artifacts").exists()
@@ -0,0 +1,26 @@
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.store import PdfStore
+
+
+def test_store_gets_puts_and_evicts(tmp_path):
+    now = [10_000_000.0]
+    store = PdfStore(tmp_path, max_bytes=250, max_age=1000, clock=lambda: now[0])
+    assert store.get("a.pdf") is None
+    for i, name in enumerate(["a.pdf", "b.pdf", "c.pdf", "d.pdf"]):
+        path = store.put(name, b"x" * 100)
+        os.utime(path, (now[0] - 10 * (4 - i), now[0] - 10 * (4 - i)))
+    os.utime(tmp_path / "a.pdf", (now[0] - 5000, now[0] - 5000))
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+    # a.pdf is expired; b.pdf is the least recently used of the rest.
+    assert store.evict() == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["c.pdf", "d.pdf"]
+    assert store.get("c.pdf") == tmp_path / "c.pdf"
+    assert store.maybe_evict() == 0
@@ -0,0 +1,64 @@
+import itertools
+import random
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from engine.batch import columns_from_records, evaluate_columns
+from engine.rules import DEFAULT_RULES
+from engine.sweep import DECISIONS, SWEEP_KEYS, SweepIndex, sweep
+
+TODAY = date(2024, 12, 1)
+GRID = {"X_DAYS_LATE": [10, 0, 5], "Y_REPEAT": [1, 3], "Z_MAX_DELAY": [30, 90], "N_PORTFOLIO_RATE_MILLI": [200, 400]}
+
+
+def _portfolio(n=400, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "tenant_id": f"T-{i}",
+            "due_date": (TODAY - timedelta(days=rng.randint(-5, 20))).isoformat(),
+            "late_count_window": rng.randint(0, 4),
+            "days_since_eligible_filing": rng.choice([0, 30, 31, 90, 91, 120]),
+            "portfolio_late_rate_milli": rng.choice([100, 200, 300, 400, 500]),
+        }
+        for i in range(n)
+    ]
+
+
+def test_sweep_matches_per_cell_evaluation():
+    records = _portfolio()
+    index = SweepIndex(tenants=True)
+    index.add_records(records[:150], TODAY)
+    index.add_records(records[150:], TODAY)
+    cells = list(sweep(index, GRID, tenants=True))
+    assert len(cells) == 3 * 2 * 2 * 2
+
+    columns = columns_from_records(records)
+    for cell, values in zip(cells, itertools.product(*(GRID[name] for name in SWEEP_KEYS))):
+        rules = DEFAULT_RULES.replace(**dict(zip(SWEEP_KEYS, values)))
+        assert cell["thresholds"] == dict(zip(SWEEP_KEYS, values))
+        _, branches = evaluate_columns(columns, today=TODAY, thresholds=rules)
+        expected = {decision: [] for decision in DECISIONS}
+        for record, branch in zip(records, branches):
+            expected[DECISIONS[branch]].append(record["tenant_id"])
+        assert cell["counts"] == {decision: len(ids) for decision, ids in expected.items()}
+        assert {d: sorted(ids) for d, ids in cell["tenants"].items()} == {d: sorted(ids) for d, ids in expected.items()}
+
+
+def test_unswept_thresholds_use_base_rules():
+    index = SweepIndex()
+    index.add_records(_portfolio(50), TODAY)
+    (cell,) = sweep(index, {"X_DAYS_LATE": [7]}, base=DEFAULT_RULES)
+    assert cell["thresholds"] == {"X_DAYS_LATE": 7, "Y_REPEAT": 2, "Z_MAX_DELAY": 90, "N_PORTFOLIO_RATE_MILLI": 400}
+    assert sum(cell["counts"].values()) == 50
+    with pytest.raises(ValueError):
+        next(sweep(index, {"Z_WINDOW_DAYS": [1]}))
+    with pytest.raises(ValueError):
+        next(sweep(index, {}, tenants=True))
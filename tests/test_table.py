@@ -0,0 +1,67 @@
+import pickle
+import tracemalloc
+from datetime import date
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.batch import build_columns, columns_from_records, evaluate_columns
+from engine.ingest import iter_portfolio
+from engine.table import TenantTable, iter_portfolio_tables
+
+TODAY = date(2024, 12, 1)
+
+
+def _records(n):
+    return [
+        {
+            "tenant_id": f"T-{i:07d}",
+            "due_date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "late_count_window": i % 5,
+            "days_since_eligible_filing": (i * 7) % 200,
+            "portfolio_late_rate_milli": 250,
+        }
+        for i in range(n)
+    ]
+
+
+def test_table_round_trips_records_and_pickles():
+    records = _records(50)
+    table = TenantTable.from_records(records)
+    assert len(table) == 50 and list(table) == records
+    assert table["tenant_id"] == [r["tenant_id"] for r in records]
+    assert list(table["late_count_window"]) == [r["late_count_window"] for r in records]
+    assert list(pickle.loads(pickle.dumps(table))) == records
+
+
+def test_tables_evaluate_and_build_like_records(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    rows = ["tenant_id,due_date,balance,is_late,late_count_window,days_since_eligible_filing"]
+    rows += [f"T-{i},2024-{1 + i % 12:02d}-01,10,{'true' if i % 3 else 'false'},{i % 4},{i * 11}" for i in range(25)]
+    path.write_text("\n".join(rows) + "\n\n", encoding="utf-8")
+
+    tables = list(iter_portfolio_tables(str(path), chunk_size=10))
+    chunks = list(iter_portfolio(str(path), chunk_size=10))
+    assert [list(t) for t in tables] == chunks
+    for table, chunk in zip(tables, chunks):
+        days_late, branches = evaluate_columns(table, today=TODAY)
+        assert (days_late, branches) == evaluate_columns(columns_from_records(chunk), today=TODAY)
+        assert build_columns(table, branches) == build_columns(chunk, branches)
+
+
+def test_table_is_at_least_five_times_smaller():
+    def retained(build):
+        tracemalloc.start()
+        value = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del value
+        return size
+
+    n = 20_000
+    dict_bytes = retained(lambda: _records(n))
+    table_bytes = retained(lambda: TenantTable.from_records(iter(_records(n))))
+    assert dict_bytes >= 5 * table_bytes
@@ -0,0 +1,104 @@
+import json
+from datetime import date
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.batch import columns_from_records, emit_columns, evaluate_columns
+from engine.ledger import Ledger, LedgerSink
+from engine.parallel import evaluate_parallel
+from engine.receipt import decision_id_for
+from engine.rentguard import evaluate
+from engine.residue import emit_override, write_decision
+from engine.sink import BufferedSink, DirectorySink
+from engine.verify import verify
+
+
+def _record(i):
+    return {
+        "tenant_id": f"T-{i}",
+        "due_date": f"2024-{1 + i % 12:02d}-01",
+        "late_count_window": i % 4,
+        "days_since_eligible_filing": i * 13,
+        "portfolio_late_rate_milli": 100,
+    }
+
+
+def _summary(entries):
+    *failures, summary = entries
+    return failures, summary
+
+
+def test_clean_directory_and_ledger_verify(tmp_path):
+    directory = DirectorySink(tmp_path / "files", progress=None)
+    with BufferedSink(tmp_path / "files", batch_size=4, progress=None) as batched, \
+            LedgerSink(Ledger(tmp_path / "ledger")) as ledger:
+        for i in range(9):
+            evaluate(_record(i), sink=directory)
+            evaluate(_record(i + 100), sink=batched)
+            evaluate(_record(i), sink=ledger)
+        emit_override("0" * 64, "ops@example.com", "manual hold", sink=directory)
+
+    failures, summary = _summary(list(verify(tmp_path / "files", jobs=2, chunk_size=3)))
+    assert failures == []
+    assert summary["receipts"] == 19
+    assert summary["ok"] == 18
+    assert summary["skipped"] == 1
+
+    failures, summary = _summary(list(verify(tmp_path / "ledger")))
+    assert failures == []
+    assert summary["ok"] == 9
+
+
+def test_tampered_receipts_are_reported(tmp_path):
+    sink = DirectorySink(tmp_path, progress=None)
+    evaluate(_record(1), sink=sink)
+    evaluate(_record(2), sink=sink)
+    first, second = sorted(tmp_path.iterdir())
+
+    envelope = json.loads(first.read_text(encoding="utf-8"))
+    envelope["payload"]["outputs"]["decision"] = "NO_ACTION"
+    first.write_text(json.dumps(envelope), encoding="utf-8")
+
+    # Consistent ID, but outputs no longer follow from the recorded inputs.
+    envelope = json.loads(second.read_text(encoding="utf-8"))
+    envelope["payload"]["gates"]["rule_path"] = ["RG-OK"]
+    envelope["payload"]["decision_id"] = decision_id_for(envelope["payload"] | {"decision_id": ""})
+    second.write_text(json.dumps(envelope), encoding="utf-8")
+
+    failures, summary = _summary(list(verify(tmp_path)))
+    assert sorted(f["status"] for f in failures) == ["decision_id_mismatch", "replay_mismatch"]
+    replay = next(f for f in failures if f["status"] == "replay_mismatch")
+    assert "gates" in replay["diff"]
+    assert summary["ok"] == 0
+
+
+def test_recorded_as_of_date_is_replayed(tmp_path):
+    sink = DirectorySink(tmp_path, progress=None)
+    record = dict(_record(3), current_date="2024-04-03")
+    envelope = evaluate(record, sink=sink, as_of=date(2024, 4, 3))
+    assert envelope["payload"]["outputs"]["decision"] == "NO_ACTION"
+
+    failures, summary = _summary(list(verify(tmp_path)))
+    assert failures == [] and summary["ok"] == 1
+
+
+def test_back_dated_runs_record_their_as_of_date(tmp_path):
+    as_of = date(2024, 10, 3)
+    records = [_record(i) for i in range(8, 11)]
+    sink = DirectorySink(tmp_path, progress=None)
+    for record in records:
+        envelope = evaluate(record, sink=sink, as_of=as_of)
+        assert envelope["payload"]["context"]["current_date"] == "2024-10-03"
+    _, branches = evaluate_columns(columns_from_records(records), today=as_of)
+    emit_columns(records, branches, sink=sink, as_of=as_of)
+    for payload in evaluate_parallel([records], 1, as_of, None, as_of=as_of):
+        write_decision(payload, sink)
+
+    # All three paths write the same three receipts.
+    failures, summary = _summary(list(verify(tmp_path)))
+    assert failures == []
+    assert summary["receipts"] == summary["ok"] == 3
@@ -211,31 +211,26 @@ export default function AppPage() {
       const [headerLine, ...rows] = text.trim().split(/\r?\n/);
       if (!headerLine || !rows.length) throw new Error("CSV contained no rows");
       const headers = headerLine.split(",").map((h) => h.trim());
-      const values = rows[0].split(",").map((v) => v.trim());
-      const row: Record<string, string> = {};
-      headers.forEach((h, idx) => {
-        row[h] = values[idx];
-      });
-      if (!row["tenant_id"] || !row["due_date"] || !row["balance"]) {
+      if (!["tenant_id", "due_date", "balance"].every((h) => headers.includes(h))) {
         throw new Error("CSV must include tenant_id,due_date,balance");
       }
-      const ledger = {
-        tenant_id: row["tenant_id"],
-        due_date: row["due_date"],
-        balance: Number(row["balance"]),
-        no_notice_sent: row["no_notice_sent"] ? row["no_notice_sent"].toLowerCase() !== "false" : true
-      };
-      const res = await fetch(`${API_BASE}/evaluate`, {
+      const res = await fetch(`${API_BASE}/evaluate/batch`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(ledger)
+        headers: { "Content-Type": "text/csv" },
+        body: text
       });
       if (!res.ok) {
         const detail = await res.json().catch(() => null);
         throw new Error(detail?.detail || "CSV evaluation failed");
       }
-      const payload = await res.json();
-      setArtifacts((current) => [payload, ...current]);
+      const lines = (await res.text()).split("\n").filter((line) => line.trim());
+      const results = lines.map((line) => JSON.parse(line));
+      const failed = results.filter((result) => result.error);
+      const payloads = results.filter((result) => !result.error);
+      if (failed.length) {
+        setError(`${failed.length} CSV row(s) could not be evaluated (first: row ${failed[0].row}, ${failed[0].error})`);
+      }
+      setArtifacts((current) => [...payloads.reverse(), ...current]);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Unknown error");
     } finally {